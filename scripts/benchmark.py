@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Measure the performance of pymediainfo on the files in tests/data and on large synthetic
+XML reports, optionally saving the results as JSON to compare runs over time.
+"""
+
+# pylint: disable=protected-access
+
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import datetime
+import io
+import json
+import os
+import pickle
+import platform
+import statistics
+import timeit
+import xml.etree.ElementTree as ET
+from typing import Any, Callable, Iterator
+
+import pymediainfo
+from pymediainfo import MediaInfo, MediaInfoParser
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "tests", "data")
+DEFAULT_FILES = ("sample.mp4", "sample.mkv", "sample_with_cover.mp3", "aac_he_v2.aac")
+# Attributes retrieved by the parse_fields benchmarks
+FIELDS = {"General": ["duration", "format"], "Video": ["width", "height"], "Audio": ["channel_s"]}
+
+Benchmark = tuple[str, Callable[[], Any], int]
+
+
+def measure(function: Callable[[], Any], number: int, repeat: int) -> dict[str, Any]:
+    timings = [timing / number for timing in timeit.repeat(function, number=number, repeat=repeat)]
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "stdev": statistics.stdev(timings) if repeat > 1 else 0.0,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def synthetic_xml(track_count: int) -> str:
+    """Build a report with `track_count` tracks by repeating those of tests/data/sample.xml."""
+    sample = ET.parse(os.path.join(DATA_DIR, "sample.xml")).getroot()
+    tracks = sample.findall("File/track")
+    root = ET.Element("MediaInfo")
+    file_element = ET.SubElement(root, "File")
+    for index in range(track_count):
+        file_element.append(tracks[index % len(tracks)])
+    return ET.tostring(root, encoding="unicode")
+
+
+def file_benchmarks(path: str, number: int) -> Iterator[Benchmark]:
+    name = os.path.basename(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    yield f"parse_path[{name}]", lambda: MediaInfo.parse(path), number
+    # Each parser is closed once its benchmark has run
+    with MediaInfoParser() as parser:
+        xml = parser.inform(path)
+        yield f"parse_parser[{name}]", lambda: parser.parse(path), number
+    with MediaInfoParser(backend="json") as json_parser:
+        json_report, field_names, rewritten_values = json_parser._analyze(
+            path, json_parser._inform_json
+        )
+        yield f"parse_json_backend[{name}]", lambda: json_parser.parse(path), number
+    with MediaInfoParser(typed=True) as typed_parser:
+        yield f"parse_typed[{name}]", lambda: typed_parser.parse(path), number
+    with MediaInfoParser(fields=FIELDS) as fields_parser:
+        yield f"parse_fields[{name}]", lambda: fields_parser.parse(path), number
+    media_info = MediaInfo(xml)
+    attribute_names = [list(track.to_data()) for track in media_info.tracks]
+    pickled = pickle.dumps(media_info)
+    json_output = media_info.to_json()
+    binary = media_info.to_bytes()
+
+    def access_attributes() -> None:
+        for track, names in zip(media_info.tracks, attribute_names):
+            for attribute_name in names:
+                getattr(track, attribute_name)
+            # Missing attributes return None
+            getattr(track, "missing_attribute")
+
+    yield f"parse_file[{name}]", lambda: MediaInfo.parse(io.BytesIO(data)), number
+    yield f"decode_xml[{name}]", lambda: MediaInfo(xml), number * 10
+    yield f"decode_xml_lazy[{name}]", lambda: MediaInfo(xml, lazy=True), number * 10
+    # Only the conversion of libmediainfo's output to Track objects
+    yield (
+        f"decode_json_backend[{name}]",
+        lambda: MediaInfo._from_json(json_report, field_names, rewritten_values),
+        number * 10,
+    )
+    yield f"access_attributes[{name}]", access_attributes, number * 10
+    yield f"to_json[{name}]", media_info.to_json, number * 10
+    yield f"pickle_dumps[{name}]", lambda: pickle.dumps(media_info), number * 10
+    yield f"pickle_loads[{name}]", lambda: pickle.loads(pickled), number * 10
+    yield f"to_bytes[{name}]", media_info.to_bytes, number * 10
+    # Round trips, using the same representation of the tracks as pickle and to_bytes
+    yield (
+        f"from_json[{name}]",
+        lambda: MediaInfo._from_data(json.loads(json_output)),
+        number * 10,
+    )
+    yield f"from_bytes[{name}]", lambda: MediaInfo.from_bytes(binary), number * 10
+
+
+def benchmarks(paths: list[str], number: int, threads: int, tracks: int) -> Iterator[Benchmark]:
+    def load_library() -> None:
+        MediaInfo.clear_library_cache()
+        MediaInfo.can_parse()
+
+    yield "load_library", load_library, number
+    for path in paths:
+        yield from file_benchmarks(path, number)
+    xml = synthetic_xml(tracks)
+    yield f"decode_synthetic_xml[{tracks}]", lambda: MediaInfo(xml), max(number // 10, 1)
+    yield (
+        f"decode_synthetic_xml_stream[{tracks}]",
+        lambda: MediaInfo.from_xml_stream(io.BytesIO(xml.encode())),
+        max(number // 10, 1),
+    )
+    with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+
+        def parse_threaded() -> None:
+            # The time per iteration is that of parsing all the files once
+            list(executor.map(MediaInfo.parse, paths))
+
+        yield f"parse_threaded[{threads}]", parse_threaded, number
+
+
+def serialized_sizes(paths: list[str]) -> dict[str, dict[str, int]]:
+    """Sizes, in bytes, of the representations of the results compared by the benchmarks."""
+    sizes = {}
+    for path in paths:
+        media_info = MediaInfo.parse(path)
+        sizes[os.path.basename(path)] = {
+            "to_json": len(media_info.to_json().encode()),
+            "pickle": len(pickle.dumps(media_info)),
+            "to_bytes": len(media_info.to_bytes()),
+        }
+    return sizes
+
+
+def metadata(number: int, repeat: int) -> dict[str, Any]:
+    library = pymediainfo._library._get_cached_library()
+    return {
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "pymediainfo_version": pymediainfo.__version__,
+        "library_version": library.version_str,
+        "python_version": platform.python_version(),
+        "python_implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any]) -> None:
+    names = [name for name in results["results"] if name in baseline["results"]]
+    if not names:
+        print("\nNo benchmark in common with the baseline")
+        return
+    print(f"\nCompared to {baseline['metadata']['date']} (lower is better):")
+    for name in names:
+        ratio = results["results"][name]["min"] / baseline["results"][name]["min"]
+        print(f"{name:<50} {ratio:6.2f}×")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "media_file",
+        nargs="*",
+        help="media files to parse, defaults to some of the files in tests/data",
+    )
+    parser.add_argument("-n", "--number", type=int, default=20, help="number of iterations")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="number of repetitions")
+    parser.add_argument(
+        "-k", "--filter", help="only run benchmarks whose name contains this string"
+    )
+    parser.add_argument("-t", "--threads", type=int, default=4, help="number of threads")
+    parser.add_argument(
+        "--tracks", type=int, default=1000, help="number of tracks in the synthetic XML"
+    )
+    parser.add_argument("-o", "--output", help="save the results to this JSON file")
+    parser.add_argument("-c", "--compare", help="compare with the results in this JSON file")
+    args = parser.parse_args()
+    paths = args.media_file or [os.path.join(DATA_DIR, name) for name in DEFAULT_FILES]
+    results: dict[str, Any] = {"metadata": metadata(args.number, args.repeat), "results": {}}
+    for name, function, number in benchmarks(paths, args.number, args.threads, args.tracks):
+        if args.filter and args.filter not in name:
+            continue
+        result = results["results"][name] = measure(function, number, args.repeat)
+        print(f"{name:<50} {result['min'] * 1000:10.3f} ms ± {result['stdev'] * 1000:.3f}")
+    results["sizes"] = serialized_sizes(paths)
+    print("\nSerialized sizes (bytes):")
+    for name, sizes in results["sizes"].items():
+        print(f"{name:<30} " + "  ".join(f"{method} {size:>7}" for method, size in sizes.items()))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Binary serialization of tracks, see :func:`pymediainfo.MediaInfo.to_bytes`.
+"""
+
+from __future__ import annotations
+
+import marshal
+import struct
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pymediainfo._track import Track
+
+# Binary format used by MediaInfo.to_bytes: magic, version and size of the attributes
+# of the tracks, serialized by marshal
+_BINARY_MAGIC = b"PMI"
+_BINARY_VERSION = 2
+_BINARY_HEADER = struct.Struct("<3sBQ")
+# The marshal format is only changed by new versions of Python in a backward-compatible
+# manner, this version is supported by all the versions of Python that pymediainfo supports
+_MARSHAL_VERSION = 4
+
+
+def _encode_binary(tracks: list[Track]) -> bytes:
+    # Returns the serialized attributes of tracks
+    try:
+        data = marshal.dumps([track.to_data() for track in tracks], _MARSHAL_VERSION)
+    except ValueError:
+        raise TypeError("Attributes must be strings, numbers, bools, None or lists") from None
+    return _BINARY_HEADER.pack(_BINARY_MAGIC, _BINARY_VERSION, len(data)) + data
+
+
+def _decode_binary(data: bytes | bytearray | memoryview) -> list[dict[str, Any]]:
+    # Returns the attributes of the tracks serialized by _encode_binary
+    with memoryview(data) as view, view.cast("B") as byte_view:
+        try:
+            magic, version, size = _BINARY_HEADER.unpack_from(byte_view)
+        except struct.error:
+            raise ValueError("Invalid data") from None
+        if magic != _BINARY_MAGIC:
+            raise ValueError("Invalid data")
+        if version != _BINARY_VERSION:
+            raise ValueError(f"Unsupported version {version}")
+        header_size = _BINARY_HEADER.size
+        if size != len(byte_view) - header_size:
+            raise ValueError("Invalid data")
+        try:
+            tracks = marshal.loads(byte_view[header_size:])
+        except (EOFError, TypeError, ValueError):
+            raise ValueError("Invalid data") from None
+    if not isinstance(tracks, list) or not all(
+        isinstance(attributes, dict) and isinstance(attributes.get("track_type"), str)
+        for attributes in tracks
+    ):
+        raise ValueError("Invalid data")
+    return tracks
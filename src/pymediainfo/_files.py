@@ -0,0 +1,221 @@
+"""
+Reading the files and file-like objects analyzed by libmediainfo.
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextlib
+import ctypes
+import mmap
+import os
+import pathlib
+from typing import Any, Iterator
+
+
+class AdaptiveBufferSize:
+    """
+    A strategy to adapt the size of the chunks read from file-like objects, which can be
+    passed as the `buffer_size` parameter of :func:`MediaInfo.parse` and :class:`MediaInfoParser`.
+
+    Each file is read starting with chunks of `initial` bytes. The size of chunks doubles,
+    up to `maximum`, while reads take less than `target_read_time`, which reduces the
+    number of reads on high-latency sources and the number of iterations on fast ones.
+    It is halved, down to `minimum`, when reads are slower. After the library requests a seek,
+    the data that was read ahead is wasted so the size goes back to `initial`.
+
+    >>> strategy = pymediainfo.AdaptiveBufferSize(maximum=4 * 1024 * 1024)
+    >>> with pymediainfo.MediaInfoParser(buffer_size=strategy) as parser:
+    ...     mi = parser.parse(remote_file)
+    ...     parser.stats
+    {'files': 1, 'bytes_read': 2138112, 'seeks': 1, 'iterations': 7,
+     'partial': 0, 'escalations': 0}
+
+    :param int initial: size of the first chunk of each file, in bytes.
+    :param int minimum: minimum size of chunks, in bytes.
+    :param int maximum: maximum size of chunks, in bytes.
+    :param float target_read_time: duration of reads above which chunks are made smaller,
+        in seconds.
+    :raises ValueError: if sizes are not positive or if `initial` is not
+        between `minimum` and `maximum`.
+    """
+
+    def __init__(
+        self,
+        initial: int = 64 * 1024,
+        *,
+        minimum: int = 16 * 1024,
+        maximum: int = 16 * 1024 * 1024,
+        target_read_time: float = 0.05,
+    ) -> None:
+        if not 0 < minimum <= initial <= maximum:
+            raise ValueError("Sizes should verify 0 < minimum <= initial <= maximum")
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_read_time = target_read_time
+
+    def _key(self) -> tuple[int, int, int, float]:
+        return (self.initial, self.minimum, self.maximum, self.target_read_time)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, AdaptiveBufferSize):
+            return False
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        return "AdaptiveBufferSize({}, minimum={}, maximum={}, target_read_time={})".format(
+            *self._key()
+        )
+
+    def next_size(self, size: int, read_time: float, sought: bool) -> int:
+        """
+        Compute the size of the next chunk.
+
+        :param int size: size of the previous chunk, in bytes.
+        :param float read_time: time it took to read the previous chunk, in seconds.
+        :param bool sought: whether the library requested a seek after the previous chunk.
+        :rtype: int
+        """
+        if sought:
+            return max(self.minimum, min(self.initial, size))
+        if read_time > self.target_read_time:
+            return max(self.minimum, size // 2)
+        return min(self.maximum, size * 2)
+
+
+class _ReplayReader:
+    """
+    A file-like object that keeps the chunks read from another one so that they can be
+    read again without accessing it, used when a file is analyzed twice.
+
+    At most `max_size` bytes are kept, the data read past this limit is read again
+    from the file.
+    """
+
+    # The methods are those of io.RawIOBase
+    # pylint: disable=missing-function-docstring
+
+    def __init__(self, file: Any, max_size: int = 64 * 1024 * 1024) -> None:
+        self._file = file
+        # The mode is checked by MediaInfoParser._open_buffer
+        self.mode = getattr(file, "mode", "b")
+        self._chunks: dict[int, bytes] = {}
+        # The keys of _chunks, sorted to find the chunk containing a position
+        self._offsets: list[int] = []
+        # The number of bytes that can still be added to _chunks
+        self._free_size = max_size
+        self._position = 0
+        # Known once the end of the file has been sought, chunks ending there are complete
+        self._size: int | None = None
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._replay(size)
+        if data is None:
+            self._file.seek(self._position)
+            data = self._file.read(size)
+            assert data is not None
+            self._keep(data)
+        self._position += len(data)
+        return data
+
+    def readinto(self, buffer: Any) -> int:
+        with memoryview(buffer) as view, view.cast("B") as output:
+            data = self._replay(len(output))
+            if data is None:
+                readinto = getattr(self._file, "readinto", None)
+                if readinto is None:
+                    data = self.read(len(output))
+                else:
+                    self._file.seek(self._position)
+                    length = readinto(output) or 0
+                    self._keep(output[:length])
+                    self._position += length
+                    return length
+            length = len(data)
+            output[:length] = data
+        self._position += length
+        return length
+
+    def _replay(self, size: int) -> bytes | None:
+        # Returns the data to read from the known chunks, or None if the file must be read
+        position = self._position
+        if self._size is not None and position >= self._size:
+            return b""
+        data = self._get_chunk(position)
+        if data is None or ((size < 0 or len(data) < size) and position + len(data) != self._size):
+            return None
+        if 0 <= size < len(data):
+            return data[:size]
+        return data
+
+    def _keep(self, data: bytes | memoryview) -> None:
+        # Keeps the data read at the current position unless this exceeds max_size
+        position = self._position
+        previous = self._chunks.get(position)
+        free_size = self._free_size - len(data) + (len(previous) if previous is not None else 0)
+        if free_size < 0:
+            return
+        if previous is None:
+            bisect.insort(self._offsets, position)
+        self._chunks[position] = bytes(data)
+        self._free_size = free_size
+
+    def _get_chunk(self, position: int) -> bytes | None:
+        # Returns the data read from position onwards, if any
+        data = self._chunks.get(position)
+        if data is None:
+            index = bisect.bisect_right(self._offsets, position) - 1
+            if index >= 0:
+                chunk = self._chunks[self._offsets[index]]
+                offset = position - self._offsets[index]
+                if offset < len(chunk):
+                    return chunk[offset:]
+        return data
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_SET:
+            self._position = offset
+        else:
+            self._file.seek(offset, whence)
+            self._position = self._file.tell()
+            if whence == os.SEEK_END and offset == 0:
+                self._size = self._position
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+
+def _normalize_filename(filename: Any) -> Any:
+    if hasattr(os, "PathLike") and isinstance(filename, os.PathLike):
+        return os.fspath(filename)
+    if pathlib is not None and isinstance(filename, pathlib.PurePath):
+        return str(filename)
+    return filename
+
+
+def _is_file_like(filename: Any) -> bool:
+    return not isinstance(filename, (bytes, bytearray, memoryview, mmap.mmap)) and hasattr(
+        filename, "seek"
+    )
+
+
+@contextlib.contextmanager
+def _get_buffer_address(view: memoryview) -> Iterator[int | None]:
+    # Yields the address of the data of a contiguous memoryview of bytes, or None
+    # if it cannot be obtained without copying the data
+    if not view.readonly:
+        c_array = (ctypes.c_char * len(view)).from_buffer(view)
+        try:
+            yield ctypes.addressof(c_array)
+        finally:
+            # Release the buffer so that the memoryview can be released
+            del c_array
+    elif isinstance(view.obj, bytes) and len(view) == len(view.obj):
+        yield ctypes.cast(ctypes.c_char_p(view.obj), ctypes.c_void_p).value
+    else:
+        yield None
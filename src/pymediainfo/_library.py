@@ -0,0 +1,185 @@
+"""
+Loading of libmediainfo.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import os
+import re
+import sys
+import threading
+from typing import Any, Callable
+
+# The libraries loaded by _get_cached_library, for each value of library_file
+_library_cache: dict[str | None, _Library] = {}
+_library_cache_lock = threading.Lock()
+
+
+class _Library:
+    # pylint: disable=too-few-public-methods, too-many-instance-attributes
+    """
+    A loaded libmediainfo with its prototypes defined and its version detected.
+
+    Instances are cached by _get_cached_library so that this setup only happens once per process.
+    """
+
+    def __init__(
+        self,
+        lib: Any,
+        version_str: str,
+        version: tuple[int, ...],
+        parameter_counts: dict[str, int],
+    ) -> None:
+        self.lib = lib
+        self.version_str = version_str
+        self.version = version
+        # The number of standard parameters of each stream kind
+        self.parameter_counts = parameter_counts
+        # Most options are global to the library, this tracks the ones
+        # that were applied last by a MediaInfoParser
+        self.applied_options: tuple[Any, ...] | None = None
+        # Used by the JSON backend, see MediaInfoParser._get_json_field_names
+        self.json_field_names: dict[
+            tuple[Any, ...], tuple[dict[str, tuple[str, bool]], list[tuple[str, int]]]
+        ] = {}
+        # Used to retrieve selected fields, see MediaInfoParser._get_xml_field_names
+        self.xml_field_names: dict[tuple[Any, ...], list[str]] = {}
+        # Used to decode typed values, see MediaInfoParser._get_schema
+        self.schemas: dict[tuple[Any, ...], dict[str, Callable[[str], Any]]] = {}
+
+
+def _count_parameters(info_parameters_csv: str) -> dict[str, int]:
+    # Returns the number of standard parameters of each stream kind
+    counts: dict[str, int] = {}
+    track_type = ""
+    for line in info_parameters_csv.splitlines():
+        if ";" in line:
+            counts[track_type] += 1
+        elif line.strip():
+            track_type = line.strip()
+            counts[track_type] = 0
+    return counts
+
+
+def _define_library_prototypes(lib: Any) -> Any:
+    lib.MediaInfo_Inform.restype = ctypes.c_wchar_p
+    lib.MediaInfo_New.argtypes = []
+    lib.MediaInfo_New.restype = ctypes.c_void_p
+    lib.MediaInfo_Option.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_wchar_p,
+        ctypes.c_wchar_p,
+    ]
+    lib.MediaInfo_Option.restype = ctypes.c_wchar_p
+    lib.MediaInfo_Inform.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+    lib.MediaInfo_Inform.restype = ctypes.c_wchar_p
+    lib.MediaInfo_Open.argtypes = [ctypes.c_void_p, ctypes.c_wchar_p]
+    lib.MediaInfo_Open.restype = ctypes.c_size_t
+    lib.MediaInfo_Open_Buffer_Init.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_uint64,
+        ctypes.c_uint64,
+    ]
+    lib.MediaInfo_Open_Buffer_Init.restype = ctypes.c_size_t
+    # Buffers are passed as pointers so that they are not copied
+    lib.MediaInfo_Open_Buffer_Continue.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_void_p,
+        ctypes.c_size_t,
+    ]
+    lib.MediaInfo_Open_Buffer_Continue.restype = ctypes.c_size_t
+    lib.MediaInfo_Open_Buffer_Continue_GoTo_Get.argtypes = [ctypes.c_void_p]
+    lib.MediaInfo_Open_Buffer_Continue_GoTo_Get.restype = ctypes.c_uint64
+    lib.MediaInfo_Open_Buffer_Finalize.argtypes = [ctypes.c_void_p]
+    lib.MediaInfo_Open_Buffer_Finalize.restype = ctypes.c_size_t
+    lib.MediaInfo_Delete.argtypes = [ctypes.c_void_p]
+    lib.MediaInfo_Delete.restype = None
+    lib.MediaInfo_Close.argtypes = [ctypes.c_void_p]
+    lib.MediaInfo_Close.restype = None
+    lib.MediaInfo_Count_Get.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_size_t]
+    lib.MediaInfo_Count_Get.restype = ctypes.c_size_t
+    lib.MediaInfo_GetI.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_int,
+        ctypes.c_size_t,
+        ctypes.c_size_t,
+        ctypes.c_int,
+    ]
+    lib.MediaInfo_GetI.restype = ctypes.c_wchar_p
+
+
+def _get_library_paths(os_is_nt: bool) -> tuple[str, ...]:
+    library_paths: tuple[str, ...]
+    if os_is_nt:
+        library_paths = ("MediaInfo.dll",)
+    elif sys.platform == "darwin":
+        library_paths = ("libmediainfo.0.dylib", "libmediainfo.dylib")
+    else:
+        library_paths = ("libmediainfo.so.0",)
+    script_dir = os.path.dirname(__file__)
+    # Look for the library file in the script folder
+    for library in library_paths:
+        absolute_library_path = os.path.join(script_dir, library)
+        if os.path.isfile(absolute_library_path):
+            # If we find it, don't try any other filename
+            library_paths = (absolute_library_path,)
+            break
+    return library_paths
+
+
+def _load_library(library_file: str | None = None) -> _Library:
+    os_is_nt = os.name in ("nt", "dos", "os2", "ce")
+    lib_type = ctypes.WinDLL if os_is_nt else ctypes.CDLL  # type: ignore[attr-defined]
+    if library_file is None:
+        library_paths = _get_library_paths(os_is_nt)
+    else:
+        library_paths = (library_file,)
+    exceptions = []
+    for library_path in library_paths:
+        try:
+            lib = lib_type(library_path)
+            _define_library_prototypes(lib)
+            # Without a handle, there might be problems when using concurrent threads
+            # https://github.com/sbraz/pymediainfo/issues/76#issuecomment-574759621
+            handle = lib.MediaInfo_New()
+            version = lib.MediaInfo_Option(handle, "Info_Version", "")
+            # The library switches to raw parameter names while generating this list,
+            # which would affect the names retrieved by other threads if it was done later
+            parameter_counts = _count_parameters(
+                lib.MediaInfo_Option(handle, "Info_Parameters_CSV", "")
+            )
+            lib.MediaInfo_Delete(handle)
+            match = re.search(r"^MediaInfoLib - v(\S+)", version)
+            if match:
+                lib_version_str = match.group(1)
+                lib_version = tuple(int(_) for _ in lib_version_str.split("."))
+            else:
+                raise RuntimeError("Could not determine library version")
+            return _Library(lib, lib_version_str, lib_version, parameter_counts)
+        except OSError as exc:
+            exceptions.append(str(exc))
+    raise OSError(
+        "Failed to load library from {} - {}".format(
+            ", ".join(library_paths), ", ".join(exceptions)
+        )
+    )
+
+
+def _get_cached_library(library_file: str | None = None) -> _Library:
+    # Fast path, dict lookups are atomic
+    library = _library_cache.get(library_file)
+    if library is not None:
+        return library
+    with _library_cache_lock:
+        # Another thread may have loaded the library while we were waiting for the lock
+        library = _library_cache.get(library_file)
+        if library is None:
+            library = _load_library(library_file)
+            _library_cache[library_file] = library
+        return library
+
+
+def _clear_library_cache() -> None:
+    with _library_cache_lock:
+        _library_cache.clear()
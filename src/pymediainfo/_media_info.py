@@ -0,0 +1,819 @@
+"""
+The :class:`pymediainfo.MediaInfo` class.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import json
+import threading
+import xml.etree.ElementTree as ET
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Iterable, Iterator, overload
+
+from pymediainfo._binary import _decode_binary, _encode_binary
+from pymediainfo._files import AdaptiveBufferSize
+from pymediainfo._library import _clear_library_cache, _get_cached_library
+from pymediainfo._parallel import MediaInfoParserPool, _aparse, _aparse_many, _parse_many
+from pymediainfo._parser import MediaInfoParser
+from pymediainfo._probe import _PROBE_FIELDS, ProbeResult
+from pymediainfo._track import _STREAM_KINDS, Track, _get_json_fields
+
+if TYPE_CHECKING:
+    from pymediainfo.cache import ResultCache
+
+
+class MediaInfo:
+    # pylint: disable=too-many-public-methods
+    """
+    An object containing information about a media file.
+
+
+    :class:`MediaInfo` objects can be created by directly calling code from
+    libmediainfo (in this case, the library must be present on the system):
+
+    >>> pymediainfo.MediaInfo.parse("/path/to/file.mp4")
+
+    Alternatively, objects may be created from MediaInfo's XML output.
+    Such output can be obtained using the ``XML`` output format on versions older than v17.10
+    and the ``OLDXML`` format on newer versions.
+
+    Using such an XML file, we can create a :class:`MediaInfo` object:
+
+    >>> with open("output.xml") as f:
+    ...     mi = pymediainfo.MediaInfo(f.read())
+
+    Large XML files can also be read incrementally using :func:`from_xml_stream`.
+
+    :param str xml: XML output obtained from MediaInfo.
+    :param str encoding_errors: option to pass to :func:`str.encode`'s `errors`
+        parameter before parsing `xml`.
+    :param bool lazy: only decode track attributes when they are accessed. This is faster
+        when few attributes are read, all of them are decoded when calling
+        :func:`Track.to_data`, comparing or pickling tracks.
+    :raises xml.etree.ElementTree.ParseError: if passed invalid XML.
+    :var bool partial: whether the analysis was stopped early by one of
+        the limits of :func:`parse`, tracks may then be incomplete.
+    :var tracks: A list of :py:class:`Track` objects which the media file contains.
+        For instance:
+
+        >>> mi = pymediainfo.MediaInfo.parse("/path/to/file.mp4")
+        >>> for t in mi.tracks:
+        ...     print(t)
+        <Track track_id='None', track_type='General'>
+        <Track track_id='1', track_type='Text'>
+
+    Tracks of a given type are available through properties such as :attr:`video_tracks`
+    or with :func:`get_track`, tracks can also be retrieved with :func:`get_track_by_id`
+    and :func:`get_track_by_stream_order`. These lookups use indexes that are built
+    the first time they are needed, each call to these properties returns a new list.
+    """
+
+    partial = False
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, MediaInfo):
+            return False
+        return self.tracks == other.tracks
+
+    def __init__(self, xml: str, encoding_errors: str = "strict", lazy: bool = False) -> None:
+        xml_dom = ET.fromstring(xml.encode("utf-8", encoding_errors))
+        self.tracks = []
+        # This is the case for libmediainfo < 18.03
+        # https://github.com/sbraz/pymediainfo/issues/57
+        # https://github.com/MediaArea/MediaInfoLib/commit/575a9a32e6960ea34adb3bc982c64edfa06e95eb
+        if xml_dom.tag == "File":
+            xpath = "track"
+        else:
+            xpath = "File/track"
+        for xml_track in xml_dom.iterfind(xpath):
+            self.tracks.append(Track(xml_track, lazy))
+
+    @classmethod
+    def from_xml_stream(cls, source: Any, lazy: bool = False) -> MediaInfo:
+        """
+        Create a :class:`MediaInfo` object from MediaInfo's XML output without
+        loading the whole document in memory.
+
+        Each :class:`Track` is created as soon as its XML element has been read,
+        the element is then discarded. This is useful for large XML reports,
+        e.g. with cover data, since memory usage is bounded by the largest track
+        instead of the whole document.
+
+        >>> with open("output.xml", "rb") as f:
+        ...     mi = pymediainfo.MediaInfo.from_xml_stream(f)
+
+        :param source: path to an XML file or file-like object containing the XML output.
+        :type source: str or pathlib.Path or os.PathLike or file-like object.
+        :param bool lazy: only decode track attributes when they are accessed,
+            see :class:`MediaInfo`.
+        :raises xml.etree.ElementTree.ParseError: if passed invalid XML.
+        """
+        media_info = cls.__new__(cls)
+        media_info.tracks = []
+        ancestors: list[ET.Element] = []
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                ancestors.append(elem)
+                continue
+            ancestors.pop()
+            # See __init__ for the possible structures of the document
+            if elem.tag == "track" and ancestors and ancestors[-1].tag == "File":
+                media_info.tracks.append(Track(elem, lazy))
+                ancestors[-1].remove(elem)
+        return media_info
+
+    @classmethod
+    def _from_json(
+        cls,
+        json_output: str,
+        field_names: dict[str, dict[str, tuple[str, bool]]],
+        rewritten_values: dict[str, list[dict[str, str]]],
+        lazy: bool = False,
+    ) -> MediaInfo:
+        # Builds an object from MediaInfo's JSON output, field_names maps the JSON field
+        # names of each track type to their XML name and whether their value must be
+        # converted from seconds to milliseconds, rewritten_values contains the values
+        # that the JSON output formats differently for each stream, see _JSON_REWRITTEN_PARAMETERS
+        media_info = cls.__new__(cls)
+        media_info.tracks = []
+        media = json.loads(json_output).get("media") or {}
+        stream_numbers = dict.fromkeys(rewritten_values, 0)
+        for json_track in media.get("track", []):
+            track_type = json_track["@type"]
+            stream_values = rewritten_values.get(track_type, [])
+            stream_number = stream_numbers.get(track_type, 0)
+            stream_numbers[track_type] = stream_number + 1
+            values = stream_values[stream_number] if stream_number < len(stream_values) else {}
+            fields = _get_json_fields(json_track, field_names.get(track_type, {}), values)
+            # pylint: disable-next=protected-access
+            media_info.tracks.append(Track._from_fields(track_type, fields, lazy))
+        return media_info
+
+    @classmethod
+    def _from_data(cls, data: dict[str, Any]) -> MediaInfo:
+        # Builds an object from the output of to_data
+        media_info = cls.__new__(cls)
+        media_info.tracks = []
+        for track_data in data["tracks"]:
+            track = Track.__new__(Track)
+            track.__setstate__(track_data)
+            media_info.tracks.append(track)
+        return media_info
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Indexes are rebuilt when needed
+        return {name: value for name, value in self.__dict__.items() if name != "_indexes"}
+
+    def _get_index(self, attribute: str) -> dict[str, Any]:
+        # Indexes are built the first time they are needed, they are discarded if tracks
+        # are added or removed or if the list of tracks is replaced
+        tracks = self.tracks
+        indexes: tuple[list[Track], int, dict[str, dict[str, Any]]] | None
+        indexes = self.__dict__.get("_indexes")
+        if indexes is None or indexes[0] is not tracks or indexes[1] != len(tracks):
+            indexes = (tracks, len(tracks), {})
+            self.__dict__["_indexes"] = indexes
+        index = indexes[2].get(attribute)
+        if index is None:
+            index = indexes[2][attribute] = self._build_index(tracks, attribute)
+        return index
+
+    @staticmethod
+    def _build_index(tracks: list[Track], attribute: str) -> dict[str, Any]:
+        index: dict[str, Any] = {}
+        if attribute == "track_type":
+            # Maps each type to the list of its tracks
+            index.update((track_type, []) for track_type in _STREAM_KINDS)
+            for track in tracks:
+                index.setdefault(track.track_type, []).append(track)
+            return index
+        # Maps values to the first track that has them, values may or may not
+        # have been converted to int so they are stored as str
+        for track in tracks:
+            value = getattr(track, attribute)
+            if value is not None:
+                index.setdefault(str(value), track)
+        return index
+
+    def _tracks(self, track_type: str) -> list[Track]:
+        tracks: list[Track] = self._get_index("track_type").get(track_type, [])
+        return tracks
+
+    def get_track(self, track_type: str, index: int = 0) -> Track | None:
+        """
+        Get a track from its type and its position among the tracks of this type.
+
+        >>> mi.get_track("Audio", 1)
+        <Track track_id='3', track_type='Audio'>
+
+        :param str track_type: the type of the track, e.g. ``"Video"``.
+        :param int index: the position of the track, negative values count from the last track.
+        :return: the :class:`Track` or `None` if there is no such track.
+        :rtype: :class:`Track` or None
+        """
+        tracks = self._tracks(track_type)
+        try:
+            return tracks[index]
+        except IndexError:
+            return None
+
+    def get_track_by_id(self, track_id: int | str) -> Track | None:
+        """
+        Get a track from its ``track_id``.
+
+        >>> mi.get_track_by_id(2)
+        <Track track_id='2', track_type='Audio'>
+
+        :param track_id: the ID of the track, either as an `int` or a `str`.
+        :type track_id: int or str
+        :return: the first :class:`Track` with this ID or `None` if there is no such track.
+        :rtype: :class:`Track` or None
+        """
+        return self._get_index("track_id").get(str(track_id))
+
+    def get_track_by_stream_order(self, stream_order: int | str) -> Track | None:
+        """
+        Get a track from its position in the file, as given by its ``streamorder`` attribute.
+
+        >>> mi.get_track_by_stream_order(0)
+        <Track track_id='1', track_type='Video'>
+
+        :param stream_order: the position of the track, either as an `int` or a `str`
+            such as ``"0-1"`` for nested streams.
+        :type stream_order: int or str
+        :return: the :class:`Track` or `None` if there is no such track.
+        :rtype: :class:`Track` or None
+        """
+        return self._get_index("streamorder").get(str(stream_order))
+
+    @property
+    def general_tracks(self) -> list[Track]:
+        """
+        :return: All :class:`Track`\\s of type ``General``.
+        :rtype: list of :class:`Track`\\s
+        """
+        return list(self._tracks("General"))
+
+    @property
+    def video_tracks(self) -> list[Track]:
+        """
+        :return: All :class:`Track`\\s of type ``Video``.
+        :rtype: list of :class:`Track`\\s
+        """
+        return list(self._tracks("Video"))
+
+    @property
+    def audio_tracks(self) -> list[Track]:
+        """
+        :return: All :class:`Track`\\s of type ``Audio``.
+        :rtype: list of :class:`Track`\\s
+        """
+        return list(self._tracks("Audio"))
+
+    @property
+    def text_tracks(self) -> list[Track]:
+        """
+        :return: All :class:`Track`\\s of type ``Text``.
+        :rtype: list of :class:`Track`\\s
+        """
+        return list(self._tracks("Text"))
+
+    @property
+    def other_tracks(self) -> list[Track]:
+        """
+        :return: All :class:`Track`\\s of type ``Other``.
+        :rtype: list of :class:`Track`\\s
+        """
+        return list(self._tracks("Other"))
+
+    @property
+    def image_tracks(self) -> list[Track]:
+        """
+        :return: All :class:`Track`\\s of type ``Image``.
+        :rtype: list of :class:`Track`\\s
+        """
+        return list(self._tracks("Image"))
+
+    @property
+    def menu_tracks(self) -> list[Track]:
+        """
+        :return: All :class:`Track`\\s of type ``Menu``.
+        :rtype: list of :class:`Track`\\s
+        """
+        return list(self._tracks("Menu"))
+
+    @classmethod
+    def clear_library_cache(cls) -> None:
+        """
+        Forgets all the libraries loaded by previous calls to :func:`parse` or :func:`can_parse`.
+
+        The library is loaded, and its version detected, only once per process for each
+        value of `library_file`. After calling this method, the next call will look
+        for the library and detect its version again.
+        """
+        _clear_library_cache()
+
+    @classmethod
+    def can_parse(cls, library_file: str | None = None) -> bool:
+        """
+        Checks whether media files can be analyzed using libmediainfo.
+
+        :param str library_file: path to the libmediainfo library, this should only be used if
+            the library cannot be auto-detected. See also :ref:`library_autodetection` which
+            explains how the library file is detected when this parameter is unset.
+        :rtype: bool
+        """
+        try:
+            _get_cached_library(library_file)
+            return True
+        except Exception:  # pylint: disable=broad-except
+            return False
+
+    # The method may be called with output=<str>, in which case it returns a str
+    @overload
+    @classmethod
+    def parse(
+        # pylint: disable=too-many-arguments, too-many-locals
+        # pylint: disable=too-many-branches, too-many-statements
+        cls,
+        filename: Any,
+        *,
+        library_file: str | None = None,
+        cover_data: bool = False,
+        encoding_errors: str = "strict",
+        parse_speed: float = 0.5,
+        full: bool = True,
+        legacy_stream_display: bool = False,
+        mediainfo_options: dict[str, str] | None = None,
+        output: str,
+        buffer_size: int | AdaptiveBufferSize | None = 64 * 1024,
+        backend: str = "xml",
+        lazy: bool = False,
+        memory_map: bool = False,
+        typed: bool = False,
+        fields: Iterable[str] | dict[str, Iterable[str]] | None = None,
+        max_time: float | None = None,
+        max_bytes: int | None = None,
+        cancel_event: threading.Event | None = None,
+        escalate: (
+            Iterable[str] | dict[str, Iterable[str]] | Callable[[MediaInfo], bool] | None
+        ) = None,
+        escalate_parse_speed: float = 1.0,
+        cache: ResultCache | None = None,
+    ) -> str: ...
+
+    # Or it may be called with output=None, in which case it returns a MediaInfo object
+    @overload
+    @classmethod
+    def parse(
+        # pylint: disable=too-many-arguments, too-many-locals
+        # pylint: disable=too-many-branches, too-many-statements
+        cls,
+        filename: Any,
+        *,
+        library_file: str | None = None,
+        cover_data: bool = False,
+        encoding_errors: str = "strict",
+        parse_speed: float = 0.5,
+        full: bool = True,
+        legacy_stream_display: bool = False,
+        mediainfo_options: dict[str, str] | None = None,
+        output: None = None,
+        buffer_size: int | AdaptiveBufferSize | None = 64 * 1024,
+        backend: str = "xml",
+        lazy: bool = False,
+        memory_map: bool = False,
+        typed: bool = False,
+        fields: Iterable[str] | dict[str, Iterable[str]] | None = None,
+        max_time: float | None = None,
+        max_bytes: int | None = None,
+        cancel_event: threading.Event | None = None,
+        escalate: (
+            Iterable[str] | dict[str, Iterable[str]] | Callable[[MediaInfo], bool] | None
+        ) = None,
+        escalate_parse_speed: float = 1.0,
+        cache: ResultCache | None = None,
+    ) -> MediaInfo: ...
+
+    @classmethod
+    def parse(
+        # pylint: disable=too-many-arguments, too-many-locals
+        # pylint: disable=too-many-branches, too-many-statements
+        cls,
+        filename: Any,
+        *,
+        library_file: str | None = None,
+        cover_data: bool = False,
+        encoding_errors: str = "strict",
+        parse_speed: float = 0.5,
+        full: bool = True,
+        legacy_stream_display: bool = False,
+        mediainfo_options: dict[str, str] | None = None,
+        output: str | None = None,
+        buffer_size: int | AdaptiveBufferSize | None = 64 * 1024,
+        backend: str = "xml",
+        lazy: bool = False,
+        memory_map: bool = False,
+        typed: bool = False,
+        fields: Iterable[str] | dict[str, Iterable[str]] | None = None,
+        max_time: float | None = None,
+        max_bytes: int | None = None,
+        cancel_event: threading.Event | None = None,
+        escalate: (
+            Iterable[str] | dict[str, Iterable[str]] | Callable[[MediaInfo], bool] | None
+        ) = None,
+        escalate_parse_speed: float = 1.0,
+        cache: ResultCache | None = None,
+    ) -> MediaInfo | str:
+        """
+        Analyze a media file using libmediainfo.
+
+        .. note::
+            Because of the way the underlying library works, this method should not
+            be called simultaneously from multiple threads *with different parameters*.
+            Doing so will cause inconsistencies or failures by changing
+            library options that are shared across threads.
+            Use a :class:`MediaInfoParserPool` to safely analyze files from multiple threads.
+
+        :param filename: path to the media file or file-like object which will be analyzed.
+            A URL can also be used if libmediainfo was compiled
+            with CURL support. The contents of the file can also be passed directly
+            as a :class:`bytes`-like object such as :class:`bytearray`, :class:`memoryview`
+            or :class:`mmap.mmap`, it is then handed to the library without being copied.
+        :param str library_file: path to the libmediainfo library, this should only be used if
+            the library cannot be auto-detected. See also :ref:`library_autodetection` which
+            explains how the library file is detected when this parameter is unset.
+        :param bool cover_data: whether to retrieve cover data as base64.
+        :param str encoding_errors: option to pass to :func:`str.encode`'s `errors`
+            parameter before parsing MediaInfo's XML output.
+        :param float parse_speed: passed to the library as `ParseSpeed`,
+            this option takes values between 0 and 1.
+            A higher value will yield more precise results in some cases
+            but will also increase parsing time.
+        :param bool full: display additional tags, including computer-readable values
+            for sizes and durations, corresponds to the CLI's ``--Full``/``-f`` parameter.
+        :param bool legacy_stream_display: display additional information about streams.
+        :param dict mediainfo_options: additional options that will be passed to the
+            `MediaInfo_Option` function, for example: ``{"Language": "raw"}``.
+            Do not use this parameter when running the method simultaneously from multiple threads,
+            it will trigger a reset of all options which will cause inconsistencies or failures.
+        :param str output: custom output format for MediaInfo, corresponds to the CLI's
+            ``--Output`` parameter. Setting this causes the method to
+            return a `str` instead of a :class:`MediaInfo` object.
+
+            Useful values include:
+                * the empty `str` ``""`` (corresponds to the default
+                  text output, obtained when running ``mediainfo`` with no
+                  additional parameters)
+
+                * ``"XML"``
+
+                * ``"JSON"``
+
+                * ``%``-delimited templates (see ``mediainfo --Info-Parameters``)
+        :param int buffer_size: size of the buffer used to read the file, in bytes. This is only
+            used when `filename` is a file-like object or a :class:`bytes`-like object.
+            File-like objects that have a ``readinto`` method are read into a buffer
+            which is reused for all the chunks. An :class:`AdaptiveBufferSize` can be passed
+            to adjust the size of chunks while the file is read.
+        :param str backend: the libmediainfo output used to create :class:`Track` objects,
+            either ``"xml"`` or ``"json"``. The JSON output is faster to decode, especially
+            for files with many tags, but is only used when `full` is set, `output` is unset
+            and the library is at least v18.03, the XML output being used otherwise.
+            Both backends produce the same attributes.
+        :param bool lazy: only decode :class:`Track` attributes when they are accessed,
+            which is faster when only a few of them are read, see :class:`MediaInfo`.
+        :param bool memory_map: map local files in memory instead of reading them, the
+            library's requests to jump to another part of the file are then served from
+            the mapping. This applies to paths of regular files and to the binary file objects
+            returned by :func:`open`, URLs and other file-like objects are read normally.
+        :param bool typed: convert the values of the attributes that libmediainfo describes
+            as numbers or booleans, such as ``frame_rate`` or ``sampling_rate``, which are
+            otherwise strings. Sizes, bit rates and dimensions become :class:`int`,
+            frame rates, sampling rates and gains :class:`float`, durations and delays
+            :class:`int` or :class:`float` milliseconds and ``Yes``/``No`` flags :class:`bool`.
+            Values that do not have the expected format are left unchanged. The types of
+            attributes are obtained from libmediainfo once per process.
+        :param fields: names of the :class:`Track` attributes to retrieve, either for all tracks
+            or for each track type, e.g. ``{"General": ["duration"], "Video": ["width"]}``.
+            Tracks only contain these attributes, along with the corresponding ``other_``
+            attributes and ``track_type``, tracks whose type is missing from the dict only
+            contain ``track_type``. When `full` is set, the values are retrieved individually
+            from libmediainfo instead of decoding its whole output, which is faster,
+            especially when the file has many tags.
+        :type fields: list or dict
+        :param float max_time: number of seconds after which the analysis stops.
+        :param int max_bytes: number of bytes after which the analysis stops.
+        :param cancel_event: an event which stops the analysis when it is set,
+            e.g. from another thread.
+
+            When the analysis of a file is stopped by `max_time`, `max_bytes` or `cancel_event`,
+            the library returns what it found in the data it was given, which may lack some
+            tracks or attributes, and the :attr:`partial` attribute of the result is `True`.
+            Limits are checked between the chunks passed to the library, so paths are then
+            read by pymediainfo like file objects, except for URLs, whose analysis
+            cannot be stopped.
+        :type cancel_event: :class:`threading.Event`
+        :param escalate: the :class:`Track` attributes which, if they are missing from the
+            result, cause the file to be analyzed again with `escalate_parse_speed`, either
+            for the ``General``, ``Video`` and ``Audio`` tracks or for each track type as
+            with `fields`. It can also be a function that is passed the result and returns
+            whether to analyze the file again, e.g. when values look like estimates. This
+            allows using a low `parse_speed` and only paying for a precise analysis when needed:
+
+            >>> mi = pymediainfo.MediaInfo.parse(
+            ...     path, parse_speed=0, escalate={"Audio": ["frame_count"]}
+            ... )
+
+            The second analysis reuses the libmediainfo handle and, for file-like objects,
+            the data read during the first one, up to 64 MiB, only the parts of the file that
+            were not read are read again. Results of analyses stopped by limits are not
+            analyzed again.
+        :type escalate: list or dict or function
+        :param float escalate_parse_speed: the `parse_speed` of the second analysis.
+        :param cache: a cache from :mod:`pymediainfo.cache` in which results are looked up
+            before analyzing the file and stored afterwards.
+        :type cache: :class:`pymediainfo.cache.ResultCache`
+        :type filename: str or pathlib.Path or os.PathLike or file-like object
+            or bytes-like object.
+        :rtype: str if `output` is set.
+        :rtype: :class:`MediaInfo` otherwise.
+        :raises FileNotFoundError: if passed a non-existent file.
+        :raises ValueError: if passed a file-like object opened in text mode,
+            an invalid `backend`, `fields` or `escalate` along with `output`
+            or `escalate` attributes that are not in `fields`.
+        :raises OSError: if the library file could not be loaded.
+        :raises RuntimeError: if parsing fails, this should not
+            happen unless libmediainfo itself fails.
+
+        Examples:
+            >>> pymediainfo.MediaInfo.parse("tests/data/sample.mkv")
+                <pymediainfo.MediaInfo object at 0x7fa83a3db240>
+
+            >>> import json
+            >>> mi = pymediainfo.MediaInfo.parse("tests/data/sample.mkv",
+            ...     output="JSON")
+            >>> json.loads(mi)["media"]["track"][0]
+                {'@type': 'General', 'TextCount': '1', 'FileExtension': 'mkv',
+                    'FileSize': '5904',  … }
+
+
+        """
+        options: dict[str, Any] = {
+            "library_file": library_file,
+            "cover_data": cover_data,
+            "encoding_errors": encoding_errors,
+            "parse_speed": parse_speed,
+            "full": full,
+            "legacy_stream_display": legacy_stream_display,
+            "mediainfo_options": mediainfo_options,
+            "output": output,
+            "buffer_size": buffer_size,
+            "backend": backend,
+            "lazy": lazy,
+            "memory_map": memory_map,
+            "typed": typed,
+            "fields": fields,
+            "max_time": max_time,
+            "max_bytes": max_bytes,
+            "cancel_event": cancel_event,
+            "escalate": escalate,
+            "escalate_parse_speed": escalate_parse_speed,
+        }
+        if cache is not None:
+            return cache._parse(cls, filename, options)  # pylint: disable=protected-access
+        with MediaInfoParser(**options) as parser:
+            return parser._parse(filename, cls)  # pylint: disable=protected-access
+
+    @classmethod
+    def probe(
+        cls,
+        filename: Any,
+        *,
+        max_bytes: int | None = 1024 * 1024,
+        max_time: float | None = None,
+        library_file: str | None = None,
+    ) -> ProbeResult:
+        """
+        Quickly find the main characteristics of a media file, such as its container,
+        its tracks and their codecs, its dimensions and its duration.
+
+        Unlike :func:`parse`, the file is analyzed with a `parse_speed` of 0, only the
+        attributes in :class:`ProbeResult` are retrieved from libmediainfo, and the analysis
+        stops once `max_bytes` bytes have been read. This is useful for triage, but values
+        are estimated from the beginning of the file, and possibly its end, so they are less
+        precise and may be missing, especially if the read budget is exhausted.
+
+        >>> result = pymediainfo.MediaInfo.probe("/path/to/file.mp4")
+        >>> result
+        <ProbeResult container='MPEG-4', duration=980, track_counts={'Video': 1, 'Audio': 1}>
+        >>> result.codecs, result.width, result.height
+        ({'Video': ['AVC'], 'Audio': ['AAC']}, 1920, 1080)
+
+        :param filename: path to the media file, file-like object or :class:`bytes`-like object
+            which will be analyzed, see :func:`parse`.
+        :param int max_bytes: the maximum number of bytes to read, `None` means no limit.
+            Local files that are smaller are opened by libmediainfo itself.
+        :param float max_time: number of seconds after which the analysis stops.
+        :param str library_file: path to the libmediainfo library, see :func:`parse`.
+        :rtype: :class:`ProbeResult`
+        :raises FileNotFoundError: if passed a non-existent file.
+        :raises ValueError: if passed a file-like object opened in text mode.
+        :raises OSError: if the library file could not be loaded.
+        :raises RuntimeError: if parsing fails, this should not
+            happen unless libmediainfo itself fails.
+        """
+        # Since the library processes all the data it is fed, small chunks
+        # let it stop reading sooner
+        with MediaInfoParser(
+            library_file=library_file,
+            parse_speed=0,
+            buffer_size=8 * 1024,
+            typed=True,
+            fields=_PROBE_FIELDS,
+            max_time=max_time,
+            max_bytes=max_bytes,
+        ) as parser:
+            media_info = parser._parse(filename, cls)  # pylint: disable=protected-access
+        assert isinstance(media_info, MediaInfo)
+        return ProbeResult._from_media_info(media_info)  # pylint: disable=protected-access
+
+    @classmethod
+    def parse_many(
+        cls,
+        filenames: Iterable[Any],
+        *,
+        workers: int | None = None,
+        executor: str = "thread",
+        ordered: bool = True,
+        **kwargs: Any,
+    ) -> Iterator[tuple[Any, MediaInfo | str | Exception]]:
+        """
+        Analyze several media files in parallel.
+
+        Results are yielded as ``(filename, result)`` tuples where `result` is what
+        :func:`parse` would have returned or the exception it would have raised,
+        so that a single failure does not abort the whole batch.
+
+        Each worker loads the library and sets its options only once.
+        With ``executor="thread"``, workers share a :class:`MediaInfoParserPool`.
+        With ``executor="process"``, each worker process has its own :class:`MediaInfoParser`,
+        which allows using all the CPU cores, but `filenames` must then be paths
+        since file-like objects cannot be sent to other processes.
+
+        >>> for filename, result in pymediainfo.MediaInfo.parse_many(paths, workers=8):
+        ...     if isinstance(result, Exception):
+        ...         print(f"Failed to parse {filename}: {result}")
+
+        :param filenames: paths to the media files or file-like objects which will be analyzed.
+        :param int workers: number of threads or processes, defaults to the number of CPUs.
+        :param str executor: either ``"thread"`` or ``"process"``.
+        :param bool ordered: whether to yield results in the order of `filenames`,
+            otherwise they are yielded as soon as they are available.
+        :param kwargs: keyword arguments passed to :func:`parse`. When a `cache` is used with
+            ``executor="process"``, it is accessed by threads of the calling process, which wait
+            for worker processes to analyze the files that are not cached.
+        :rtype: iterator of tuples
+        :raises ValueError: if `executor`, `workers` or an option is invalid.
+        :raises TypeError: if passed unknown options.
+        :raises OSError: if the library file could not be loaded.
+        """
+        return _parse_many(
+            cls, filenames, workers=workers, executor=executor, ordered=ordered, **kwargs
+        )
+
+    @classmethod
+    async def aparse(
+        cls,
+        filename: Any,
+        *,
+        timeout: float | None = None,
+        pool: MediaInfoParserPool | None = None,
+        executor: concurrent.futures.Executor | None = None,
+        **kwargs: Any,
+    ) -> MediaInfo | str:
+        """
+        Analyze a media file without blocking the event loop.
+
+        The file is analyzed in a thread by a parser from a :class:`MediaInfoParserPool`.
+        Unless `pool` and `executor` are set, a pool and a thread pool executor of
+        ``min(32, os.cpu_count() + 4)`` workers are created on first use and shared
+        by all the calls using the same `library_file`.
+
+        Besides what :func:`parse` accepts, `filename` may be an asynchronous file-like object
+        whose ``read`` method is a coroutine, its ``read``, ``seek`` and ``tell`` methods are
+        then called on the event loop while the library runs in the worker thread.
+
+        >>> mi = await pymediainfo.MediaInfo.aparse("/path/to/file.mp4", timeout=10)
+
+        .. note::
+            If the call is cancelled or times out while a file-like object is being read,
+            reading stops as soon as possible. Paths, however, are analyzed by libmediainfo
+            in one go: the thread keeps running until it is done and its result is discarded.
+
+        :param filename: path to the media file or file-like object which will be analyzed.
+        :param float timeout: number of seconds after which :class:`asyncio.TimeoutError` is
+            raised, `None` means waiting indefinitely.
+        :param pool: the pool to get a parser from.
+        :type pool: :class:`MediaInfoParserPool`
+        :param executor: the executor used to run the parser.
+        :type executor: :class:`concurrent.futures.Executor`
+        :param kwargs: keyword arguments passed to :func:`parse`,
+            `library_file` is ignored if `pool` is set.
+        :rtype: str if `output` is set.
+        :rtype: :class:`MediaInfo` otherwise.
+
+        See :func:`parse` for exceptions.
+        """
+        return await _aparse(cls, filename, timeout=timeout, pool=pool, executor=executor, **kwargs)
+
+    @classmethod
+    async def aparse_many(
+        cls,
+        filenames: Iterable[Any],
+        *,
+        concurrency: int | None = None,
+        ordered: bool = True,
+        **kwargs: Any,
+    ) -> AsyncIterator[tuple[Any, MediaInfo | str | BaseException]]:
+        """
+        Analyze several media files concurrently without blocking the event loop.
+
+        This is the asynchronous counterpart of :func:`parse_many`:
+        ``(filename, result)`` tuples are yielded, `result` being the exception
+        raised by :func:`aparse` when analyzing `filename` failed.
+
+        >>> async for filename, result in pymediainfo.MediaInfo.aparse_many(paths, timeout=10):
+        ...     print(filename, result)
+
+        :param filenames: paths to the media files or file-like objects which will be analyzed.
+        :param int concurrency: maximum number of files analyzed at the same time,
+            defaults to the number of workers of the executor.
+        :param bool ordered: whether to yield results in the order of `filenames`,
+            otherwise they are yielded as soon as they are available.
+        :param kwargs: keyword arguments passed to :func:`aparse`, including `timeout`
+            which applies to each file.
+        :rtype: asynchronous iterator of tuples
+        """
+        async for item in _aparse_many(
+            cls, filenames, concurrency=concurrency, ordered=ordered, **kwargs
+        ):
+            yield item
+
+    def to_data(self) -> dict[str, Any]:
+        """
+        Returns a dict representation of the object's :py:class:`Tracks <Track>`.
+
+        :rtype: dict
+        """
+        return {"tracks": [_.to_data() for _ in self.tracks]}
+
+    def to_json(self) -> str:
+        """
+        Returns a JSON representation of the object's :py:class:`Tracks <Track>`.
+
+        :rtype: str
+        """
+        return json.dumps(self.to_data())
+
+    def to_bytes(self) -> bytes:
+        """
+        Returns a compact binary representation of the object's :py:class:`Tracks <Track>`,
+        which can be loaded with :func:`from_bytes`.
+
+        The attributes are serialized with :mod:`marshal`, which is faster than both
+        :func:`to_json` and :mod:`pickle`, in both directions, and whose output is usually
+        15 to 20% smaller than that of :func:`to_json`. ``scripts/benchmark.py`` compares them.
+        The format is versioned and :func:`from_bytes` rejects data written in a format
+        it does not support.
+
+        >>> data = mi.to_bytes()
+        >>> pymediainfo.MediaInfo.from_bytes(data) == mi
+        True
+
+        :raises TypeError: if an attribute is not a string, a number, a bool, `None`
+            or a list of these.
+        :rtype: bytes
+        """
+        return _encode_binary(self.tracks)
+
+    @classmethod
+    def from_bytes(cls, data: bytes | bytearray | memoryview) -> MediaInfo:
+        """
+        Create a :class:`MediaInfo` object from the output of :func:`to_bytes`.
+
+        Unlike :mod:`pickle`, loading data cannot execute code but, as with :mod:`marshal`,
+        data from untrusted sources should not be loaded.
+
+        :param data: the serialized object.
+        :raises ValueError: if `data` is invalid or was written by a newer,
+            incompatible version of pymediainfo.
+        :rtype: MediaInfo
+        """
+        media_info = cls.__new__(cls)
+        media_info.tracks = []
+        for attributes in _decode_binary(data):
+            track = Track.__new__(Track)
+            track.__dict__ = attributes
+            media_info.tracks.append(track)
+        return media_info
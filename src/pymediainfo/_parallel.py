@@ -0,0 +1,608 @@
+"""
+Pools of parsers and analysis of several files in parallel or asynchronously.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import concurrent.futures
+import contextlib
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Iterable, Iterator
+
+from pymediainfo._parser import _PYTHON_OPTIONS, MediaInfoParser
+from pymediainfo._profile import _profile_callbacks
+
+if TYPE_CHECKING:
+    from pymediainfo._media_info import MediaInfo
+    from pymediainfo.cache import ResultCache
+
+# The parser used by each process of MediaInfo.parse_many's process pool
+_worker_parser: MediaInfoParser | None = None  # pylint: disable=invalid-name
+# The executors and pools used by MediaInfo.aparse, one for each library file
+_async_resources: dict[
+    str | None, tuple[concurrent.futures.ThreadPoolExecutor, MediaInfoParserPool]
+] = {}
+_async_resources_lock = threading.Lock()
+
+
+class MediaInfoParserPool:
+    """
+    A bounded pool of :class:`MediaInfoParser`\\s shared by several threads.
+
+    Threads check out a parser created with the options they need, use it and then
+    return it to the pool so that other threads can reuse it and its libmediainfo handle.
+
+    >>> pool = pymediainfo.MediaInfoParserPool(max_parsers=8)
+    >>> with pool.checkout(parse_speed=0.1) as parser:
+    ...     mi = parser.parse("/path/to/file.mp4")
+    >>> mi = pool.parse("/path/to/file.mp4", full=False)
+
+    Since most libmediainfo options are shared by all the handles of a process,
+    the pool only lets threads use parsers with the same options simultaneously.
+    Threads that need different options wait until all the parsers in use have been returned.
+    As a consequence, :func:`MediaInfo.parse` should not be called simultaneously
+    with different parameters by code that doesn't use the pool.
+
+    When the pool is full, idle parsers that were created with different options
+    are closed to make room for new ones. Options that do not change the libmediainfo handle,
+    such as `lazy`, `typed`, `buffer_size` or the limits set by `max_time`, `max_bytes` and
+    `cancel_event`, are set on the parsers when they are checked out instead.
+
+    :param int max_parsers: the maximum number of parsers, and thus of libmediainfo
+        handles, that the pool holds at a time.
+    :param float timeout: default number of seconds to wait for a parser to become available,
+        `None` means waiting indefinitely.
+    :param str library_file: path to the libmediainfo library, see :func:`MediaInfo.parse`.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        max_parsers: int = 4,
+        *,
+        timeout: float | None = None,
+        library_file: str | None = None,
+    ) -> None:
+        if max_parsers < 1:
+            raise ValueError("max_parsers must be at least 1")
+        self._max_parsers = max_parsers
+        self._timeout = timeout
+        self._library_file = library_file
+        self._condition = threading.Condition()
+        # Idle parsers grouped by options, the least recently used groups come first
+        self._idle: collections.OrderedDict[tuple[Any, ...], list[MediaInfoParser]] = (
+            collections.OrderedDict()
+        )
+        self._parser_count = 0
+        self._active_options: tuple[Any, ...] | None = None
+        self._active_count = 0
+        self._waiting: collections.Counter[tuple[Any, ...]] = collections.Counter()
+        self._closed = False
+        self._stats = dict.fromkeys(
+            ("checkouts", "hits", "waits", "timeouts", "created", "discarded"), 0
+        )
+
+    def __enter__(self) -> MediaInfoParserPool:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    @staticmethod
+    def _options_key(options: dict[str, Any]) -> tuple[Any, ...]:
+        # Parsers are reused regardless of the options that don't affect their handle
+        return tuple(
+            sorted(
+                (name, _freeze(value))
+                for name, value in options.items()
+                if name not in _PYTHON_OPTIONS
+            )
+        )
+
+    def _can_check_out(self, key: tuple[Any, ...]) -> bool:
+        if self._active_options is None:
+            return True
+        if self._active_options != key:
+            return False
+        # Let the parsers in use drain if threads are waiting for other options
+        return sum(self._waiting.values()) == self._waiting[key]
+
+    def _take_parser(self, key: tuple[Any, ...]) -> MediaInfoParser | None:
+        """
+        Returns an idle parser, `None` if a new one may be created
+        or raises :class:`LookupError` if the pool is full.
+        """
+        idle = self._idle.get(key)
+        if idle:
+            self._idle.move_to_end(key)
+            self._stats["hits"] += 1
+            return idle.pop()
+        if self._parser_count < self._max_parsers:
+            return None
+        # Make room by closing an idle parser created with other options, this is only
+        # safe when no other parser is in use because closing one may reset all the options
+        if self._active_count == 0:
+            for other_key, other_idle in self._idle.items():
+                if other_idle:
+                    other_idle.pop().close()
+                    if not other_idle:
+                        del self._idle[other_key]
+                    self._parser_count -= 1
+                    self._stats["discarded"] += 1
+                    return None
+        raise LookupError
+
+    def _acquire(self, key: tuple[Any, ...], timeout: float | None) -> MediaInfoParser | None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._stats["checkouts"] += 1
+            waited = False
+            while True:
+                if self._closed:
+                    raise ValueError("Cannot check out a parser from a closed pool")
+                if self._can_check_out(key):
+                    try:
+                        parser = self._take_parser(key)
+                        break
+                    except LookupError:
+                        pass
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise TimeoutError("Timed out waiting for a parser")
+                self._waiting[key] += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._waiting[key] -= 1
+            self._active_options = key
+            self._active_count += 1
+            if parser is None:
+                # Reserve the slot, the parser is created without holding the lock
+                self._parser_count += 1
+            return parser
+
+    def _release(self, key: tuple[Any, ...], parser: MediaInfoParser | None) -> None:
+        with self._condition:
+            self._active_count -= 1
+            if self._active_count == 0:
+                self._active_options = None
+            if parser is None:
+                self._parser_count -= 1
+            elif self._closed:
+                parser.close()
+                self._parser_count -= 1
+            else:
+                self._idle.setdefault(key, []).append(parser)
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def checkout(
+        self, *, timeout: float | None = None, **options: Any
+    ) -> Iterator[MediaInfoParser]:
+        """
+        Check out a parser created with the given options, waiting for one to become available
+        if needed. The parser is returned to the pool when leaving the context.
+
+        :param float timeout: number of seconds to wait for a parser,
+            defaults to the pool's `timeout`.
+        :param options: keyword arguments passed to :class:`MediaInfoParser`,
+            except `library_file`, which is set for the whole pool.
+        :raises TimeoutError: if no parser became available in time.
+        :raises ValueError: if the pool is closed.
+        """
+        key = self._options_key(options)
+        parser = self._acquire(key, self._timeout if timeout is None else timeout)
+        try:
+            if parser is None:
+                parser = MediaInfoParser(library_file=self._library_file, **options)
+                with self._condition:
+                    self._stats["created"] += 1
+            else:
+                parser._configure(  # pylint: disable=protected-access
+                    **{name: value for name, value in options.items() if name in _PYTHON_OPTIONS}
+                )
+            yield parser
+        finally:
+            self._release(key, parser)
+
+    def parse(
+        self, filename: Any, *, timeout: float | None = None, **options: Any
+    ) -> MediaInfo | str:
+        """
+        Analyze a media file using a parser from the pool.
+
+        :param filename: path to the media file or file-like object which will be analyzed.
+        :param float timeout: number of seconds to wait for a parser,
+            defaults to the pool's `timeout`.
+        :param options: keyword arguments passed to :class:`MediaInfoParser`.
+        :rtype: str if `output` is set.
+        :rtype: :class:`MediaInfo` otherwise.
+        :raises TimeoutError: if no parser became available in time.
+
+        See :func:`MediaInfoParser.parse` for other exceptions.
+        """
+        with self.checkout(timeout=timeout, **options) as parser:
+            return parser.parse(filename)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        Counters describing the pool's activity:
+
+        * ``checkouts``: number of parsers requested
+        * ``hits``: number of times an idle parser could be reused
+        * ``waits``: number of times a thread had to wait for a parser
+        * ``timeouts``: number of times a thread gave up waiting
+        * ``created``: number of parsers, and thus of libmediainfo handles, created
+        * ``discarded``: number of idle parsers closed to make room for other options
+        * ``size``: number of parsers currently held by the pool
+        * ``in_use``: number of parsers currently checked out
+
+        :rtype: dict
+        """
+        with self._condition:
+            return dict(self._stats, size=self._parser_count, in_use=self._active_count)
+
+    def close(self) -> None:
+        """
+        Close all idle parsers, those in use are closed when they are returned.
+        Parsers cannot be checked out afterwards.
+        """
+        with self._condition:
+            self._closed = True
+            for idle in self._idle.values():
+                for parser in idle:
+                    parser.close()
+                    self._parser_count -= 1
+            self._idle.clear()
+            self._condition.notify_all()
+
+
+def _init_worker_parser(options: dict[str, Any]) -> None:
+    global _worker_parser  # pylint: disable=global-statement
+    _worker_parser = MediaInfoParser(**options)
+
+
+def _parse_in_worker(cls: type[MediaInfo], filename: Any) -> MediaInfo | str:
+    assert _worker_parser is not None
+    return _worker_parser._parse(filename, cls)  # pylint: disable=protected-access
+
+
+def _iter_executor_results(
+    executor: concurrent.futures.Executor,
+    function: Callable[[Any], Any],
+    items: Iterable[Any],
+    *,
+    window: int,
+    ordered: bool,
+) -> Iterator[tuple[Any, Any]]:
+    """
+    Runs `function` on each item using `executor` and yields ``(item, result)`` tuples,
+    `result` being the exception raised by `function` if it failed.
+
+    At most `window` items are submitted at a time so that
+    large iterables are not consumed all at once.
+    """
+    items = iter(items)
+    pending: dict[concurrent.futures.Future[Any], Any] = {}
+    queue: collections.deque[concurrent.futures.Future[Any]] = collections.deque()
+
+    def submit() -> bool:
+        for item in items:
+            future = executor.submit(function, item)
+            pending[future] = item
+            if ordered:
+                queue.append(future)
+            return True
+        return False
+
+    def get_result(future: concurrent.futures.Future[Any]) -> tuple[Any, Any]:
+        item = pending.pop(future)
+        try:
+            return item, future.result()
+        except Exception as exc:  # pylint: disable=broad-except
+            return item, exc
+
+    while len(pending) < window and submit():
+        pass
+    while pending:
+        if ordered:
+            done = [queue.popleft()]
+            concurrent.futures.wait(done)
+        else:
+            done_set, _ = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            done = list(done_set)
+        for future in done:
+            yield get_result(future)
+            submit()
+
+
+def _get_async_resources(
+    library_file: str | None,
+) -> tuple[concurrent.futures.ThreadPoolExecutor, MediaInfoParserPool]:
+    with _async_resources_lock:
+        resources = _async_resources.get(library_file)
+        if resources is None:
+            workers = min(32, (os.cpu_count() or 1) + 4)
+            resources = (
+                concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix="pymediainfo"),
+                MediaInfoParserPool(max_parsers=workers, library_file=library_file),
+            )
+            _async_resources[library_file] = resources
+        return resources
+
+
+class _AsyncFileBridge:
+    """
+    A synchronous file-like object, used from a worker thread,
+    whose methods await those of an asynchronous file-like object on the event loop.
+    """
+
+    def __init__(
+        self, file: Any, loop: asyncio.AbstractEventLoop, cancelled: threading.Event
+    ) -> None:
+        self._file = file
+        self._loop = loop
+        self._cancelled = cancelled
+        self.mode = getattr(file, "mode", "b")
+
+    @staticmethod
+    async def _call(method: Callable[..., Any], *args: Any) -> Any:
+        result = method(*args)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    def _run(self, name: str, *args: Any) -> Any:
+        if self._cancelled.is_set():
+            raise asyncio.CancelledError()
+        method = getattr(self._file, name)
+        future = asyncio.run_coroutine_threadsafe(self._call(method, *args), self._loop)
+        while True:
+            try:
+                return future.result(timeout=0.1)
+            except concurrent.futures.TimeoutError:
+                # The event loop may stop running once the caller is cancelled
+                if self._cancelled.is_set():
+                    future.cancel()
+                    raise asyncio.CancelledError() from None
+
+    def read(self, size: int = -1) -> bytes:
+        """Read at most `size` bytes."""
+        data: bytes = self._run("read", size)
+        return data
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        """Change the stream position."""
+        position: int = self._run("seek", offset, whence)
+        return position
+
+    def tell(self) -> int:
+        """Return the current stream position."""
+        position: int = self._run("tell")
+        return position
+
+
+def _freeze(value: Any) -> Any:
+    # Returns a hashable equivalent of an option value
+    if isinstance(value, dict):
+        return tuple((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    return value
+
+
+def _normalize_options(options: dict[str, Any]) -> dict[str, Any]:
+    # Iterators of attribute names can only be consumed once, while options may be used
+    # to create several parsers and to compute cache keys, their order does not matter
+    normalized = dict(options)
+    for name in ("fields", "escalate"):
+        value = options.get(name)
+        if isinstance(value, dict):
+            normalized[name] = {
+                track_type: sorted(set(names)) for track_type, names in value.items()
+            }
+        elif value is not None and not callable(value):
+            normalized[name] = sorted(set(value))
+    return normalized
+
+
+def _parse_many(
+    cls: type[MediaInfo],
+    filenames: Iterable[Any],
+    *,
+    workers: int | None,
+    executor: str,
+    ordered: bool,
+    **kwargs: Any,
+) -> Iterator[tuple[Any, MediaInfo | str | Exception]]:
+    # Implements MediaInfo.parse_many, the arguments are checked when it is called
+    # rather than when the first result is requested
+    if executor not in ("thread", "process"):
+        raise ValueError(f"Invalid executor {executor!r}, use 'thread' or 'process'")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    elif workers < 1:
+        raise ValueError("workers must be at least 1")
+    library_file = kwargs.pop("library_file", None)
+    cache: ResultCache | None = kwargs.pop("cache", None)
+    options = _normalize_options(kwargs)
+    # Fail early if the options are invalid or the library cannot be loaded,
+    # this also prevents worker processes from failing to start
+    MediaInfoParser(library_file=library_file, **options).close()
+    return _iter_parse_many(
+        cls,
+        filenames,
+        workers=workers,
+        executor=executor,
+        ordered=ordered,
+        library_file=library_file,
+        cache=cache,
+        options=options,
+    )
+
+
+def _iter_parse_many(
+    # pylint: disable=too-many-arguments, too-many-locals
+    cls: type[MediaInfo],
+    filenames: Iterable[Any],
+    *,
+    workers: int,
+    executor: str,
+    ordered: bool,
+    library_file: str | None,
+    cache: ResultCache | None,
+    options: dict[str, Any],
+) -> Iterator[tuple[Any, MediaInfo | str | Exception]]:
+    pool_executor: concurrent.futures.Executor
+    function: Callable[[Any], MediaInfo | str]
+    with contextlib.ExitStack() as stack:
+        if executor == "process":
+            process_executor = concurrent.futures.ProcessPoolExecutor(
+                workers,
+                initializer=_init_worker_parser,
+                initargs=({"library_file": library_file, **options},),
+            )
+            stack.callback(process_executor.shutdown, wait=True, cancel_futures=True)
+
+            def analyze(filename: Any) -> MediaInfo | str:
+                return process_executor.submit(_parse_in_worker, cls, filename).result()
+
+        else:
+            pool = MediaInfoParserPool(max_parsers=workers, library_file=library_file)
+            stack.callback(pool.close)
+
+            def analyze(filename: Any) -> MediaInfo | str:
+                with pool.checkout(**options) as parser:
+                    return parser._parse(filename, cls)  # pylint: disable=protected-access
+
+        if executor == "process" and cache is None:
+            pool_executor = process_executor
+            function = functools.partial(_parse_in_worker, cls)
+        else:
+            pool_executor = concurrent.futures.ThreadPoolExecutor(workers)
+            stack.callback(pool_executor.shutdown, wait=True, cancel_futures=True)
+            profile_callbacks = _profile_callbacks.get()
+
+            def function(filename: Any) -> MediaInfo | str:
+                # Worker threads don't inherit the context of the caller
+                _profile_callbacks.set(profile_callbacks)
+                if cache is None:
+                    return analyze(filename)
+                # pylint: disable-next=protected-access
+                return cache._parse(
+                    cls, filename, {"library_file": library_file, **options}, analyze
+                )
+
+        yield from _iter_executor_results(
+            pool_executor, function, filenames, window=2 * workers, ordered=ordered
+        )
+
+
+async def _aparse(
+    # pylint: disable=too-many-locals
+    cls: type[MediaInfo],
+    filename: Any,
+    *,
+    timeout: float | None,
+    pool: MediaInfoParserPool | None,
+    executor: concurrent.futures.Executor | None,
+    **kwargs: Any,
+) -> MediaInfo | str:
+    # Implements MediaInfo.aparse
+    library_file = kwargs.pop("library_file", None)
+    cache: ResultCache | None = kwargs.pop("cache", None)
+    options = _normalize_options(kwargs)
+    if pool is None or executor is None:
+        default_executor, default_pool = _get_async_resources(library_file)
+        pool = pool or default_pool
+        executor = executor or default_executor
+    loop = asyncio.get_running_loop()
+    cancelled = threading.Event()
+    if inspect.iscoroutinefunction(getattr(filename, "read", None)):
+        filename = _AsyncFileBridge(filename, loop, cancelled)
+
+    def analyze(filename: Any) -> MediaInfo | str:
+        assert pool is not None
+        with pool.checkout(**options) as parser:
+            return parser._parse(filename, cls)  # pylint: disable=protected-access
+
+    def function() -> MediaInfo | str:
+        if cache is None:
+            return analyze(filename)
+        assert pool is not None
+        # pylint: disable=protected-access
+        cache_options = {"library_file": pool._library_file, **options}
+        return cache._parse(cls, filename, cache_options, analyze)
+
+    try:
+        # Run in a copy of the current context so that profile() applies
+        context = contextvars.copy_context()
+        return await asyncio.wait_for(
+            loop.run_in_executor(executor, context.run, function), timeout
+        )
+    finally:
+        # Stop reading if we were cancelled, this has no effect if we are done
+        cancelled.set()
+
+
+async def _aparse_many(
+    cls: type[MediaInfo],
+    filenames: Iterable[Any],
+    *,
+    concurrency: int | None,
+    ordered: bool,
+    **kwargs: Any,
+) -> AsyncIterator[tuple[Any, MediaInfo | str | BaseException]]:
+    # Implements MediaInfo.aparse_many
+    if concurrency is None:
+        concurrency = min(32, (os.cpu_count() or 1) + 4)
+    # The options are passed to each call to aparse
+    options = _normalize_options(kwargs)
+    items = iter(filenames)
+    pending: dict[asyncio.Future[MediaInfo | str], Any] = {}
+    queue: collections.deque[asyncio.Future[MediaInfo | str]] = collections.deque()
+
+    def submit() -> bool:
+        for item in items:
+            task = asyncio.ensure_future(cls.aparse(item, **options))
+            pending[task] = item
+            if ordered:
+                queue.append(task)
+            return True
+        return False
+
+    try:
+        while len(pending) < concurrency and submit():
+            pass
+        while pending:
+            if ordered:
+                done = [queue.popleft()]
+                await asyncio.wait(done)
+            else:
+                done_set, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                done = list(done_set)
+            for task in done:
+                item = pending.pop(task)
+                exception = task.exception()
+                yield item, task.result() if exception is None else exception
+                submit()
+    finally:
+        for task in pending:
+            task.cancel()
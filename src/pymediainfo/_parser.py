@@ -0,0 +1,885 @@
+"""
+Analysis of media files with libmediainfo, see :class:`pymediainfo.MediaInfoParser`.
+"""
+
+# pylint: disable=cyclic-import
+
+from __future__ import annotations
+
+import ctypes
+import io
+import mmap
+import os
+import re
+import threading
+import time
+import warnings
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+
+from pymediainfo._files import (
+    AdaptiveBufferSize,
+    _get_buffer_address,
+    _is_file_like,
+    _normalize_filename,
+    _ReplayReader,
+)
+from pymediainfo._library import _get_cached_library
+from pymediainfo._profile import ParseProfile, _profile_callbacks
+from pymediainfo._track import (
+    _JSON_REWRITTEN_PARAMETERS,
+    _MEASURE_TYPES,
+    _STREAM_KINDS,
+    _VALUE_CONVERTERS,
+    Track,
+    _get_attribute_name,
+    _get_field_attributes,
+)
+
+if TYPE_CHECKING:
+    from pymediainfo._media_info import MediaInfo
+
+# Options that only change how files are fed to the library and how results are built,
+# they can be changed without creating a new handle, see MediaInfoParser._configure
+_PYTHON_OPTIONS = (
+    "encoding_errors",
+    "lazy",
+    "memory_map",
+    "typed",
+    "buffer_size",
+    "max_time",
+    "max_bytes",
+    "cancel_event",
+)
+
+
+class MediaInfoParser:
+    """
+    A session used to analyze several media files in a row with the same options.
+
+    For each file, :func:`MediaInfo.parse` allocates a libmediainfo handle, sets all its options
+    and then frees the handle. A :class:`MediaInfoParser` only does this once, when it is created,
+    which reduces the overhead of analyzing many files.
+
+    Its parameters are the same as the keyword arguments of :func:`MediaInfo.parse`.
+    Parsers hold resources from the library and must be closed after use,
+    which is best done by using them as context managers:
+
+    >>> with pymediainfo.MediaInfoParser(parse_speed=0.1) as parser:
+    ...     for path in paths:
+    ...         mi = parser.parse(path)
+
+    .. note::
+        Most libmediainfo options are shared by all the handles of a process.
+        They are applied again if another parser or a call to :func:`MediaInfo.parse`
+        changed them since the previous file was analyzed, custom `mediainfo_options`
+        being reset first, but, as with :func:`MediaInfo.parse`,
+        parsers with different options should not be used simultaneously from multiple threads.
+
+    A single parser may be shared between threads, files are then analyzed one at a time.
+
+    :raises OSError: if the library file could not be loaded.
+    """
+
+    # pylint: disable=protected-access, too-many-instance-attributes
+
+    def __init__(
+        # pylint: disable=too-many-arguments, too-many-locals
+        # pylint: disable=too-many-branches, too-many-statements
+        self,
+        *,
+        library_file: str | None = None,
+        cover_data: bool = False,
+        encoding_errors: str = "strict",
+        parse_speed: float = 0.5,
+        full: bool = True,
+        legacy_stream_display: bool = False,
+        mediainfo_options: dict[str, str] | None = None,
+        output: str | None = None,
+        buffer_size: int | AdaptiveBufferSize | None = 64 * 1024,
+        backend: str = "xml",
+        lazy: bool = False,
+        memory_map: bool = False,
+        typed: bool = False,
+        fields: Iterable[str] | dict[str, Iterable[str]] | None = None,
+        max_time: float | None = None,
+        max_bytes: int | None = None,
+        cancel_event: threading.Event | None = None,
+        escalate: (
+            Iterable[str] | dict[str, Iterable[str]] | Callable[[MediaInfo], bool] | None
+        ) = None,
+        escalate_parse_speed: float = 1.0,
+    ) -> None:
+        if backend not in ("xml", "json"):
+            raise ValueError(f"Invalid backend {backend!r}, use 'xml' or 'json'")
+        if fields is not None and output is not None:
+            raise ValueError("fields cannot be used with a custom output")
+        if escalate is not None and output is not None:
+            raise ValueError("escalate cannot be used with a custom output")
+        # The setup is reported in the profile of the first file analyzed by the parser
+        setup_profile = ParseProfile(None) if _profile_callbacks.get() else None
+        self._library = _get_cached_library(library_file)
+        if setup_profile is not None:
+            setup_profile._mark("library")
+        self._configure(
+            encoding_errors=encoding_errors,
+            lazy=lazy,
+            memory_map=memory_map,
+            typed=typed,
+            buffer_size=buffer_size,
+            max_time=max_time,
+            max_bytes=max_bytes,
+            cancel_event=cancel_event,
+        )
+        # The attributes to retrieve for each track type
+        self._fields: dict[str, frozenset[str]] | None = None
+        if isinstance(fields, dict):
+            self._fields = {
+                track_type: _get_field_attributes(names) for track_type, names in fields.items()
+            }
+        elif fields is not None:
+            attributes = _get_field_attributes(fields)
+            self._fields = dict.fromkeys(_STREAM_KINDS, attributes)
+        # Parameters to retrieve for each stream kind, along with their names in the XML output
+        self._field_parameters: dict[int, list[tuple[int, str]]] = {}
+        # The attributes whose absence causes a second analysis, or a function deciding it
+        self._escalate: dict[str, frozenset[str]] | Callable[[MediaInfo], bool] | None
+        if escalate is None or callable(escalate):
+            self._escalate = escalate
+        elif isinstance(escalate, dict):
+            self._escalate = {
+                track_type: frozenset(names) for track_type, names in escalate.items()
+            }
+        else:
+            # Other tracks, such as menus, usually lack the attributes of the main ones
+            self._escalate = dict.fromkeys(("General", "Video", "Audio"), frozenset(escalate))
+        if isinstance(self._escalate, dict) and self._fields is not None:
+            for track_type, names in self._escalate.items():
+                if not names <= self._fields.get(track_type, frozenset()):
+                    raise ValueError("escalate attributes must be included in fields")
+        self._escalate_parse_speed = escalate_parse_speed
+        self._read_buffer: ctypes.Array[ctypes.c_char] | None = None
+        # Whether the analysis of the current file was stopped by a limit
+        self._partial = False
+        self._stats = {
+            "files": 0,
+            "bytes_read": 0,
+            "seeks": 0,
+            "iterations": 0,
+            "partial": 0,
+            "escalations": 0,
+        }
+        self._options = (
+            cover_data,
+            parse_speed,
+            full,
+            legacy_stream_display,
+            output,
+            None if mediainfo_options is None else tuple(mediainfo_options.items()),
+        )
+        # The JSON output only contains the same values as the XML output when all the tags
+        # are displayed, it is also not available on older versions
+        self._json = (
+            backend == "json" and output is None and full and self._library.version >= (18, 3)
+        )
+        self._lock = threading.Lock()
+        if mediainfo_options is not None and self._library.version < (19, 9):
+            warnings.warn(
+                "This version of MediaInfo (v{}) does not support resetting all "
+                "options to their default values, passing it custom options is not recommended "
+                "and may result in unpredictable behavior, see "
+                "https://github.com/MediaArea/MediaInfoLib/issues/1128".format(
+                    self._library.version_str
+                ),
+                RuntimeWarning,
+            )
+        self._handle = self._library.lib.MediaInfo_New()
+        self._apply_options(self._options)
+        self._setup_phases: dict[str, float] | None = None
+        if setup_profile is not None:
+            setup_profile._mark("options")
+            self._setup_phases = setup_profile.phases
+        # The profile of the file being analyzed, if any
+        self._profile: ParseProfile | None = None
+
+    def __enter__(self) -> MediaInfoParser:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def _configure(
+        # pylint: disable=too-many-arguments
+        self,
+        *,
+        encoding_errors: str = "strict",
+        lazy: bool = False,
+        memory_map: bool = False,
+        typed: bool = False,
+        buffer_size: int | AdaptiveBufferSize | None = 64 * 1024,
+        max_time: float | None = None,
+        max_bytes: int | None = None,
+        cancel_event: threading.Event | None = None,
+    ) -> None:
+        # Sets the options listed in _PYTHON_OPTIONS, MediaInfoParserPool uses it
+        # to reuse parsers that only differ by these options
+        self._encoding_errors = encoding_errors
+        self._lazy = lazy
+        self._memory_map = memory_map
+        self._typed = typed
+        self._buffer_size = buffer_size
+        self._limits = (max_time, max_bytes, cancel_event)
+        self._limited = any(limit is not None for limit in self._limits)
+
+    def _apply_options(self, options: tuple[Any, ...]) -> None:
+        lib, handle, lib_version = self._library.lib, self._handle, self._library.version
+        cover_data, parse_speed, full, legacy_stream_display, output, mediainfo_options = options
+        # Custom options are not overwritten by the ones set below, those of another parser
+        # must be undone so that they don't apply to the files analyzed by this one
+        # https://github.com/MediaArea/MediaInfoLib/issues/1128
+        applied_options = self._library.applied_options
+        if (
+            applied_options is not None
+            and applied_options[5] not in (None, mediainfo_options)
+            and lib_version >= (19, 9)
+        ):
+            lib.MediaInfo_Option(handle, "Reset", "")
+        # Cover_Data is not extracted by default since version 18.03
+        # See https://github.com/MediaArea/MediaInfoLib/commit/d8fd88a1
+        if lib_version >= (18, 3):
+            lib.MediaInfo_Option(handle, "Cover_Data", "base64" if cover_data else "")
+        lib.MediaInfo_Option(handle, "CharSet", "UTF-8")
+        if self._json:
+            inform = "JSON"
+        elif output is not None:
+            inform = output
+        # The XML option was renamed starting with version 17.10
+        elif lib_version >= (17, 10):
+            inform = "OLDXML"
+        else:
+            inform = "XML"
+        lib.MediaInfo_Option(handle, "Inform", inform)
+        lib.MediaInfo_Option(handle, "Complete", "1" if full else "")
+        lib.MediaInfo_Option(handle, "ParseSpeed", str(parse_speed))
+        lib.MediaInfo_Option(handle, "LegacyStreamDisplay", "1" if legacy_stream_display else "")
+        if mediainfo_options is not None:
+            for option_name, option_value in mediainfo_options:
+                lib.MediaInfo_Option(handle, option_name, option_value)
+        self._library.applied_options = (*options, self._json)
+
+    def _feed_buffer(
+        # pylint: disable=too-many-locals
+        self,
+        size: int,
+        read_chunk: Callable[[int], tuple[Any, int]],
+        seek: Callable[[int], int],
+    ) -> None:
+        # read_chunk returns a pointer to (or a bytes object containing) the next chunk
+        # and the chunk length, seek moves to the given offset and returns the new position
+        lib, handle, stats = self._library.lib, self._handle, self._stats
+        strategy = self._buffer_size if isinstance(self._buffer_size, AdaptiveBufferSize) else None
+        parse_profile = self._profile
+        # Reads are only timed when needed
+        timed = strategy is not None or parse_profile is not None
+        chunk_size = self._get_chunk_size(size)
+        read_time = total_read_time = 0.0
+        max_time, max_bytes, _ = self._limits
+        deadline = None if max_time is None else time.monotonic() + max_time
+        fed_bytes = 0
+        lib.MediaInfo_Open_Buffer_Init(handle, size, 0)
+        while True:
+            if self._limited:
+                if self._limit_reached(deadline, fed_bytes):
+                    self._partial = True
+                    stats["partial"] += 1
+                    break
+                if max_bytes is not None:
+                    chunk_size = min(chunk_size, max_bytes - fed_bytes)
+            if not timed:
+                pointer, length = read_chunk(chunk_size)
+            else:
+                start = time.perf_counter()
+                pointer, length = read_chunk(chunk_size)
+                read_time = time.perf_counter() - start
+                total_read_time += read_time
+            if not length:
+                break
+            stats["iterations"] += 1
+            stats["bytes_read"] += length
+            fed_bytes += length
+            # https://github.com/MediaArea/MediaInfoLib/blob/v20.09/Source/MediaInfo/File__Analyze.h#L1429
+            # 4th bit = finished
+            if lib.MediaInfo_Open_Buffer_Continue(handle, pointer, length) & 0x08:
+                break
+            # Ask MediaInfo if we need to seek
+            offset = lib.MediaInfo_Open_Buffer_Continue_GoTo_Get(handle)
+            # https://github.com/MediaArea/MediaInfoLib/blob/v20.09/Source/MediaInfoDLL/MediaInfoJNI.cpp#L127
+            sought = offset != ctypes.c_uint64(-1).value
+            if sought:
+                stats["seeks"] += 1
+                # Inform MediaInfo we have sought
+                lib.MediaInfo_Open_Buffer_Init(handle, size, seek(offset))
+            if strategy is not None:
+                chunk_size = strategy.next_size(chunk_size, read_time, sought)
+        lib.MediaInfo_Open_Buffer_Finalize(handle)
+        if parse_profile is not None:
+            parse_profile.phases["read"] = parse_profile.phases.get("read", 0.0) + total_read_time
+
+    def _within_limits(self, filename: str) -> bool:
+        # Whether the limits cannot be reached by the analysis of a local file
+        max_time, max_bytes, cancel_event = self._limits
+        return (
+            max_time is None
+            and cancel_event is None
+            and max_bytes is not None
+            and os.path.getsize(filename) <= max_bytes
+        )
+
+    def _limit_reached(self, deadline: float | None, fed_bytes: int) -> bool:
+        _, max_bytes, cancel_event = self._limits
+        return (
+            (max_bytes is not None and fed_bytes >= max_bytes)
+            or (deadline is not None and time.monotonic() >= deadline)
+            or (cancel_event is not None and cancel_event.is_set())
+        )
+
+    def _get_chunk_size(self, size: int) -> int:
+        # Size of the first chunk read from a file of the given size
+        if isinstance(self._buffer_size, AdaptiveBufferSize):
+            return self._buffer_size.initial
+        return self._buffer_size or size
+
+    def _get_read_buffer(self, size: int) -> tuple[int, memoryview]:
+        # The buffer used to read file-like objects is allocated once and reused
+        read_buffer = self._read_buffer
+        if read_buffer is None or len(read_buffer) < size:
+            read_buffer = self._read_buffer = ctypes.create_string_buffer(size)
+        return ctypes.addressof(read_buffer), memoryview(read_buffer).cast("B")[:size]
+
+    def _open_buffer(self, file: Any, file_size: int) -> None:
+        # Some file-like objects do not have a mode
+        if "b" not in getattr(file, "mode", "b"):
+            raise ValueError("File should be opened in binary mode")
+        if self._memory_map and self._open_mapped(file):
+            return
+        readinto = getattr(file, "readinto", None)
+        if readinto is None:
+
+            def read_chunk(chunk_size: int) -> tuple[Any, int]:
+                data = file.read(chunk_size)
+                return data, len(data) if data else 0
+
+        else:
+            address, view = self._get_read_buffer(self._get_chunk_size(file_size))
+
+            def read_chunk(chunk_size: int) -> tuple[Any, int]:
+                nonlocal address, view
+                if chunk_size > len(view):
+                    address, view = self._get_read_buffer(chunk_size)
+                # None is returned by non-blocking files with no data available
+                if chunk_size != len(view):
+                    return address, readinto(view[:chunk_size]) or 0
+                return address, readinto(view) or 0
+
+        def seek(offset: int) -> int:
+            file.seek(offset)
+            return int(file.tell())
+
+        self._feed_buffer(file_size, read_chunk, seek)
+
+    def _open_memory(self, data: Any) -> None:
+        with memoryview(data) as data_view, data_view.cast("B") as view:
+            size = len(view)
+            position = 0
+            with _get_buffer_address(view) as buffer_address:
+                read_view = None
+                if buffer_address is None:
+                    # Read-only buffers are copied to a reusable buffer
+                    buffer_address, read_view = self._get_read_buffer(
+                        min(self._get_chunk_size(size), size)
+                    )
+                address = buffer_address
+
+                def read_chunk(chunk_size: int) -> tuple[Any, int]:
+                    nonlocal position, address, read_view
+                    start = position
+                    length = max(min(chunk_size, size - start), 0)
+                    position += length
+                    if read_view is None:
+                        return address + start, length
+                    if length > len(read_view):
+                        address, read_view = self._get_read_buffer(length)
+                    read_view[:length] = view[start:position]
+                    return address, length
+
+                def seek(offset: int) -> int:
+                    nonlocal position
+                    position = offset
+                    return offset
+
+                self._feed_buffer(size, read_chunk, seek)
+
+    def _open_mapped(self, file: Any) -> bool:
+        # Returns False if the file cannot be mapped, e.g. if it is empty or if it is a pipe,
+        # only files that read their descriptor directly are mapped, other objects such as
+        # decompressors may expose the descriptor of a file whose contents are different
+        raw = file.raw if isinstance(file, (io.BufferedReader, io.BufferedRandom)) else file
+        if not isinstance(raw, io.FileIO):
+            return False
+        try:
+            # Copy-on-write mappings are writable so their address can be passed to the library
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (OSError, ValueError):
+            return False
+        with mapping:
+            self._open_memory(mapping)
+        return True
+
+    def _open_filename(self, filename: Any) -> None:
+        filename = _normalize_filename(filename)
+        # Files are mapped and limits are enforced while feeding the library, which can only be
+        # done for regular files, other paths such as URLs and directories are passed to the library
+        if (
+            "://" not in filename
+            and os.path.isfile(filename)
+            and (self._memory_map or (self._limited and not self._within_limits(filename)))
+        ):
+            lib, handle = self._library.lib, self._handle
+            # The library then reports the same name and modification date as with MediaInfo_Open
+            lib.MediaInfo_Option(handle, "File_FileName", filename)
+            try:
+                with open(filename, "rb") as file:
+                    self._open_buffer(file, os.fstat(file.fileno()).st_size)
+            finally:
+                lib.MediaInfo_Option(handle, "File_FileName", "")
+            return
+        # If an error occured
+        if self._library.lib.MediaInfo_Open(self._handle, filename) == 0:
+            # If filename doesn't look like a URL and doesn't exist
+            if "://" not in filename and not os.path.exists(filename):
+                raise FileNotFoundError(filename)
+            # We ran into another kind of error
+            raise RuntimeError(
+                "An error occured while opening {}" " with libmediainfo".format(filename)
+            )
+
+    def inform(self, filename: Any) -> str:
+        """
+        Analyze a media file and return libmediainfo's raw output.
+
+        This is the XML output used to create :class:`MediaInfo` objects
+        unless the parser was created with a custom `output`.
+
+        :param filename: path to the media file or file-like object which will be analyzed.
+        :type filename: str or pathlib.Path or os.PathLike or file-like object
+            or bytes-like object.
+        :rtype: str
+        :raises FileNotFoundError: if passed a non-existent file.
+        :raises ValueError: if passed a file-like object opened in text mode
+            or if the parser is closed.
+        :raises RuntimeError: if parsing fails, this should not
+            happen unless libmediainfo itself fails.
+        """
+        lib, handle = self._library.lib, self._handle
+        parse_profile = ParseProfile(filename) if _profile_callbacks.get() else None
+        info: str = self._analyze(filename, lambda: lib.MediaInfo_Inform(handle, 0), parse_profile)
+        if parse_profile is not None:
+            parse_profile.output_size = len(info)
+            parse_profile._report()
+        return info
+
+    def _analyze(
+        self,
+        filename: Any,
+        get_result: Callable[[], Any],
+        parse_profile: ParseProfile | None = None,
+        parse_speed: float | None = None,
+    ) -> Any:
+        # Opens filename, calls get_result and closes the file,
+        # parse_speed overrides the parse speed of the parser
+        # pylint: disable=too-many-branches
+        with self._lock:
+            if parse_profile is not None:
+                parse_profile._mark("wait")
+                if self._setup_phases is not None:
+                    parse_profile.phases = {**self._setup_phases, **parse_profile.phases}
+                    self._setup_phases = None
+            if self._handle is None:
+                raise ValueError("I/O operation on closed parser")
+            options = self._options
+            if parse_speed is not None:
+                options = (options[0], parse_speed, *options[2:])
+            if self._library.applied_options != (*options, self._json):
+                self._apply_options(options)
+                if parse_profile is not None:
+                    parse_profile._mark("options")
+            self._stats["files"] += 1
+            self._profile = parse_profile
+            self._partial = False
+            bytes_read, seeks = self._stats["bytes_read"], self._stats["seeks"]
+            if isinstance(filename, (bytes, bytearray, memoryview, mmap.mmap)):
+                file_size = -1
+            else:
+                try:
+                    filename.seek(0, 2)
+                    file_size = filename.tell()
+                    filename.seek(0)
+                except AttributeError:  # filename is not a file-like object
+                    file_size = None
+            try:
+                if file_size == -1:  # The data itself was passed, it is fed without copies
+                    self._open_memory(filename)
+                elif file_size is not None:  # We have a file-like object, use the buffer protocol
+                    self._open_buffer(filename, file_size)
+                else:  # We have a filename, simply pass it
+                    self._open_filename(filename)
+                if parse_profile is None:
+                    return get_result()
+                parse_profile._mark("open", parse_profile.phases.get("read", 0.0))
+                parse_profile.bytes_fed += self._stats["bytes_read"] - bytes_read
+                parse_profile.seeks += self._stats["seeks"] - seeks
+                result = get_result()
+                parse_profile._mark("inform")
+                return result
+            finally:
+                self._profile = None
+                self._library.lib.MediaInfo_Close(self._handle)
+                if parse_profile is not None:
+                    parse_profile._mark("close")
+
+    def _get_json_field_name(
+        self, stream_kind: int, stream_number: int, parameter: int
+    ) -> tuple[str, tuple[str, bool]]:
+        lib, handle = self._library.lib, self._handle
+        # See the info_t enum in MediaInfoDLL.h
+        name = lib.MediaInfo_GetI(handle, stream_kind, stream_number, parameter, 0)
+        measure = lib.MediaInfo_GetI(handle, stream_kind, stream_number, parameter, 2)
+        name_text = lib.MediaInfo_GetI(handle, stream_kind, stream_number, parameter, 4)
+        return _escape_json_name(name), (_escape_xml_name(name_text or name), measure == " ms")
+
+    def _get_json_field_names(
+        self, stream_kind: int
+    ) -> tuple[dict[str, tuple[str, bool]], list[tuple[str, int]]]:
+        # Field names of standard parameters only depend on the stream kind
+        # and on the language, which may be changed using mediainfo_options,
+        # along with the names and numbers of those in _JSON_REWRITTEN_PARAMETERS
+        key = (stream_kind, self._options[5])
+        field_names = self._library.json_field_names.get(key)
+        if field_names is None:
+            names = {}
+            rewritten_parameters = []
+            for parameter in range(self._library.parameter_counts[_STREAM_KINDS[stream_kind]]):
+                name, xml_name = self._get_json_field_name(stream_kind, 0, parameter)
+                names[name] = xml_name
+                if name in _JSON_REWRITTEN_PARAMETERS:
+                    rewritten_parameters.append((name, parameter))
+            field_names = self._library.json_field_names[key] = (names, rewritten_parameters)
+        return field_names
+
+    def _inform_json(
+        self,
+    ) -> tuple[str, dict[str, dict[str, tuple[str, bool]]], dict[str, list[dict[str, str]]]]:
+        # Returns the JSON output, the field names of each track type, see _get_json_field_names,
+        # and the values of the parameters in _JSON_REWRITTEN_PARAMETERS for each stream
+        lib, handle = self._library.lib, self._handle
+        parameter_counts = self._library.parameter_counts
+        info: str = lib.MediaInfo_Inform(handle, 0)
+        field_names = {}
+        rewritten_values = {}
+        for stream_kind, track_type in enumerate(_STREAM_KINDS):
+            # A stream number of -1 returns the number of streams
+            stream_count = lib.MediaInfo_Count_Get(handle, stream_kind, -1)
+            if stream_count == 0:
+                continue
+            names, rewritten_parameters = self._get_json_field_names(stream_kind)
+            rewritten_values[track_type] = [
+                {
+                    name: value
+                    for name, value in (
+                        (name, lib.MediaInfo_GetI(handle, stream_kind, stream_number, parameter, 1))
+                        for name, parameter in rewritten_parameters
+                    )
+                    if value
+                }
+                for stream_number in range(stream_count)
+            ]
+            # Streams may have additional parameters, such as tags, after the standard ones
+            extra_names = dict(
+                self._get_json_field_name(stream_kind, stream_number, parameter)
+                for stream_number in range(stream_count)
+                for parameter in range(
+                    parameter_counts[track_type],
+                    lib.MediaInfo_Count_Get(handle, stream_kind, stream_number),
+                )
+            )
+            field_names[track_type] = {**names, **extra_names} if extra_names else names
+        return info, field_names, rewritten_values
+
+    def _get_xml_field_name(self, stream_kind: int, stream_number: int, parameter: int) -> str:
+        lib, handle = self._library.lib, self._handle
+        # See the info_t enum in MediaInfoDLL.h
+        name = lib.MediaInfo_GetI(handle, stream_kind, stream_number, parameter, 0)
+        name_text = lib.MediaInfo_GetI(handle, stream_kind, stream_number, parameter, 4)
+        return _escape_xml_name(name_text or name)
+
+    def _get_xml_field_names(self, stream_kind: int) -> list[str]:
+        # Names of the standard parameters of a stream kind in the XML output,
+        # a stream of this kind must be present in the file
+        key = (stream_kind, self._options[5])
+        names = self._library.xml_field_names.get(key)
+        if names is None:
+            names = [
+                self._get_xml_field_name(stream_kind, 0, parameter)
+                for parameter in range(self._library.parameter_counts[_STREAM_KINDS[stream_kind]])
+            ]
+            self._library.xml_field_names[key] = names
+        return names
+
+    def _get_fields(self) -> list[tuple[str, list[tuple[str, str]]]]:
+        # Returns the selected fields of each stream as (XML name, value) tuples, several
+        # parameters may have the same name, as in the XML output
+        assert self._fields is not None
+        lib, handle = self._library.lib, self._handle
+        streams = []
+        for stream_kind, track_type in enumerate(_STREAM_KINDS):
+            # A stream number of -1 returns the number of streams
+            stream_count = lib.MediaInfo_Count_Get(handle, stream_kind, -1)
+            if stream_count == 0:
+                continue
+            attributes = self._fields.get(track_type, frozenset())
+            parameters = self._field_parameters.get(stream_kind)
+            if parameters is None:
+                parameters = [
+                    (parameter, name)
+                    for parameter, name in enumerate(self._get_xml_field_names(stream_kind))
+                    if _get_attribute_name(name) in attributes
+                ]
+                self._field_parameters[stream_kind] = parameters
+            parameter_count = self._library.parameter_counts[track_type]
+            for stream_number in range(stream_count):
+                fields = []
+                for parameter, name in parameters:
+                    value = lib.MediaInfo_GetI(handle, stream_kind, stream_number, parameter, 1)
+                    if value:
+                        fields.append((name, value))
+                # Streams may have additional parameters, such as tags, after the standard ones
+                for parameter in range(
+                    parameter_count, lib.MediaInfo_Count_Get(handle, stream_kind, stream_number)
+                ):
+                    name = self._get_xml_field_name(stream_kind, stream_number, parameter)
+                    if _get_attribute_name(name) in attributes:
+                        value = lib.MediaInfo_GetI(handle, stream_kind, stream_number, parameter, 1)
+                        if value:
+                            fields.append((name, value))
+                streams.append((track_type, fields))
+        return streams
+
+    def _get_schema(self, stream_kind: int) -> dict[str, Callable[[str], Any]]:
+        # Returns the conversion function of each attribute of a stream kind whose
+        # values are numbers or booleans, a stream of this kind must be present in the file
+        key = (stream_kind, self._options[5])
+        schema = self._library.schemas.get(key)
+        if schema is None:
+            lib, handle = self._library.lib, self._handle
+            schema = {}
+            for parameter in range(self._library.parameter_counts[_STREAM_KINDS[stream_kind]]):
+                # See the info_t enum in MediaInfoDLL.h
+                measure = lib.MediaInfo_GetI(handle, stream_kind, 0, parameter, 2)
+                value_type = _MEASURE_TYPES.get(measure)
+                if value_type is None:
+                    continue
+                name = self._get_xml_field_names(stream_kind)[parameter]
+                # Values of other parameters with the same name, such as Duration/String,
+                # are human-readable formats which are stored in other_ attributes
+                schema.setdefault(_get_attribute_name(name), _VALUE_CONVERTERS[value_type])
+            self._library.schemas[key] = schema
+        return schema
+
+    def _get_schemas(self) -> dict[str, dict[str, Callable[[str], Any]]]:
+        # Returns the schemas of the track types present in the file
+        lib, handle = self._library.lib, self._handle
+        return {
+            track_type: self._get_schema(stream_kind)
+            for stream_kind, track_type in enumerate(_STREAM_KINDS)
+            if lib.MediaInfo_Count_Get(handle, stream_kind, -1)
+        }
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        Counters describing the files analyzed by the parser:
+
+        * ``files``: number of files analyzed
+        * ``bytes_read``: number of bytes passed to the library, for file-like
+          and :class:`bytes`-like objects
+        * ``seeks``: number of seeks requested by the library
+        * ``iterations``: number of chunks passed to the library
+        * ``partial``: number of files whose analysis was stopped early by a limit
+        * ``escalations``: number of files that were analyzed again because of `escalate`
+
+        Files that are opened by the library itself, from their path, are only counted
+        in ``files``.
+
+        :rtype: dict
+        """
+        return dict(self._stats)
+
+    def parse(self, filename: Any) -> MediaInfo | str:
+        """
+        Analyze a media file.
+
+        :param filename: path to the media file or file-like object which will be analyzed.
+        :type filename: str or pathlib.Path or os.PathLike or file-like object
+            or bytes-like object.
+        :rtype: str if the parser was created with a custom `output`.
+        :rtype: :class:`MediaInfo` otherwise.
+        :raises FileNotFoundError: if passed a non-existent file.
+        :raises ValueError: if passed a file-like object opened in text mode
+            or if the parser is closed.
+        :raises RuntimeError: if parsing fails, this should not
+            happen unless libmediainfo itself fails.
+        """
+        # pylint: disable-next=import-outside-toplevel
+        from pymediainfo._media_info import MediaInfo  # MediaInfo uses this module
+
+        return self._parse(filename, MediaInfo)
+
+    def _parse(self, filename: Any, media_info_class: type[MediaInfo]) -> MediaInfo | str:
+        # Custom output formats are returned as is
+        if self._options[4] is not None:
+            return self.inform(filename)
+        if self._escalate is None:
+            return self._parse_once(filename, media_info_class, filename)
+        source = filename
+        # Memory-mapped files can be read again at no cost
+        if not self._memory_map and _is_file_like(filename):
+            source = _ReplayReader(filename)
+        # Both analyses are described by the same profile
+        parse_profile = ParseProfile(filename) if _profile_callbacks.get() else None
+        media_info = self._parse_once(filename, media_info_class, source, parse_profile)
+        if self._needs_escalation(media_info):
+            with self._lock:
+                self._stats["escalations"] += 1
+            media_info = self._parse_once(
+                filename, media_info_class, source, parse_profile, self._escalate_parse_speed
+            )
+        if parse_profile is not None:
+            parse_profile._report()
+        return media_info
+
+    def _needs_escalation(self, media_info: MediaInfo) -> bool:
+        escalate = self._escalate
+        if escalate is None or media_info.partial:
+            return False
+        if callable(escalate):
+            return bool(escalate(media_info))
+        return any(
+            getattr(track, name) is None
+            for track in media_info.tracks
+            for name in escalate.get(track.track_type, ())
+        )
+
+    def _parse_once(
+        self,
+        filename: Any,
+        media_info_class: type[MediaInfo],
+        source: Any,
+        parse_profile: ParseProfile | None = None,
+        parse_speed: float | None = None,
+    ) -> MediaInfo:
+        # Analyzes source, which is either filename or a _ReplayReader wrapping it,
+        # the profile is reported here unless it is passed
+        # pylint: disable=too-many-arguments, too-many-branches, too-many-locals
+        lib, handle = self._library.lib, self._handle
+        # Fields are retrieved individually when all of them are available, see Track
+        select_fields = self._fields is not None and self._options[2]
+        report = parse_profile is None and bool(_profile_callbacks.get())
+        if report:
+            parse_profile = ParseProfile(filename)
+
+        def inform() -> tuple[Any, Any, Any, bool]:
+            # The schemas must be retrieved while the file is open
+            schemas = self._get_schemas() if self._typed else None
+            if select_fields:
+                return self._get_fields(), None, schemas, self._partial
+            if self._json:
+                info, field_names, rewritten_values = self._inform_json()
+                return info, (field_names, rewritten_values), schemas, self._partial
+            return lib.MediaInfo_Inform(handle, 0), None, schemas, self._partial
+
+        info, json_fields, schemas, partial = self._analyze(
+            source, inform, parse_profile, parse_speed
+        )
+        if parse_profile is not None:
+            if select_fields:
+                parse_profile.output_size = sum(
+                    len(value) for _, fields in info for _, value in fields
+                )
+            else:
+                parse_profile.output_size = len(info)
+        if select_fields:
+            media_info = media_info_class.__new__(media_info_class)
+            media_info.tracks = [
+                Track._from_fields(track_type, fields, self._lazy) for track_type, fields in info
+            ]
+        elif json_fields is None:
+            media_info = media_info_class(info, self._encoding_errors, self._lazy)
+        else:
+            field_names, rewritten_values = json_fields
+            media_info = media_info_class._from_json(
+                info, field_names, rewritten_values, self._lazy
+            )
+        if self._fields is not None and not select_fields:
+            for track in media_info.tracks:
+                attributes = self._fields.get(track.track_type, frozenset())
+                track.__dict__ = {
+                    name: value
+                    for name, value in track.to_data().items()
+                    if name in attributes
+                    or name == "track_type"
+                    or name.startswith("other_")
+                    and name[6:] in attributes
+                }
+        if schemas is not None:
+            for track in media_info.tracks:
+                schema = schemas.get(track.track_type)
+                if schema is not None:
+                    track._apply_schema(schema)
+        if partial:
+            media_info.partial = True
+        if parse_profile is not None:
+            parse_profile._mark("decode")
+            if report:
+                parse_profile._report()
+        return media_info
+
+    def close(self) -> None:
+        """
+        Free the resources held by the parser, it cannot be used afterwards.
+        Calling this method several times has no effect.
+        """
+        with self._lock:
+            if self._handle is None:
+                return
+            lib = self._library.lib
+            # Reset all options to their defaults so that they aren't retained
+            # by the next parser or call to MediaInfo.parse
+            # https://github.com/MediaArea/MediaInfoLib/issues/1128
+            # Do not call it when it is not required because it breaks threads
+            # https://github.com/sbraz/pymediainfo/issues/76#issuecomment-575245093
+            if self._options[5] is not None and self._library.version >= (19, 9):
+                lib.MediaInfo_Option(self._handle, "Reset", "")
+                self._library.applied_options = None
+            lib.MediaInfo_Delete(self._handle)
+            self._handle = None
+
+
+def _escape_xml_name(name: str) -> str:
+    # Field names in the XML output, see Xml_Name_Escape_0_7_78 in MediaInfoLib
+    name = re.sub(r"[^0-9A-Za-z_]", "", re.sub(r"[ /()*,:@]", "_", name))
+    return f"_{name}" if name[:1].isdigit() else name
+
+
+def _escape_json_name(name: str) -> str:
+    # Field names in the JSON output
+    name = re.sub(r"[^0-9A-Za-z_]", "", re.sub(r"[ /*,:.]", "_", name))
+    return f"_{name}" if name[:1].isdigit() else name
@@ -0,0 +1,97 @@
+"""
+Results of :func:`pymediainfo.MediaInfo.probe`.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pymediainfo._media_info import MediaInfo
+
+# The attributes retrieved by MediaInfo.probe for each track type
+_PROBE_FIELDS = {
+    "General": ("format", "duration"),
+    "Video": ("format", "duration", "width", "height"),
+    "Audio": ("format", "duration"),
+    "Text": ("format",),
+    "Other": ("format",),
+    "Image": ("format", "width", "height"),
+    "Menu": ("format",),
+}
+
+
+class ProbeResult:
+    """
+    The main characteristics of a media file, as returned by :func:`MediaInfo.probe`.
+
+    :var str container: the format of the file, such as ``"MPEG-4"`` or ``"Matroska"``.
+    :var duration: the duration of the file in milliseconds, or of its longest track
+        if the container does not have a duration.
+    :vartype duration: int or float
+    :var dict track_counts: the number of tracks of each type other than ``General``,
+        such as ``{"Video": 1, "Audio": 2}``.
+    :var dict codecs: the formats of the tracks of each type other than ``General``,
+        such as ``{"Video": ["AVC"], "Audio": ["AAC", "AC-3"]}``.
+    :var int width: the width of the first video track, or image if there is no video.
+    :var int height: the height of the first video track, or image if there is no video.
+    :var bool partial: whether the analysis was stopped before libmediainfo was done.
+
+    Attributes whose value could not be determined are `None`.
+    """
+
+    def __init__(
+        # pylint: disable=too-many-arguments
+        self,
+        *,
+        container: str | None = None,
+        duration: int | float | None = None,
+        track_counts: dict[str, int] | None = None,
+        codecs: dict[str, list[str]] | None = None,
+        width: int | None = None,
+        height: int | None = None,
+        partial: bool = False,
+    ) -> None:
+        self.container = container
+        self.duration = duration
+        self.track_counts = {} if track_counts is None else track_counts
+        self.codecs = {} if codecs is None else codecs
+        self.width = width
+        self.height = height
+        self.partial = partial
+
+    @classmethod
+    def _from_media_info(cls, media_info: MediaInfo) -> ProbeResult:
+        general = media_info.general_tracks[0] if media_info.general_tracks else None
+        result = cls(
+            container=getattr(general, "format", None),
+            duration=getattr(general, "duration", None),
+            partial=media_info.partial,
+        )
+        durations = []
+        for track in media_info.tracks:
+            if track.track_type == "General":
+                continue
+            result.track_counts[track.track_type] = result.track_counts.get(track.track_type, 0) + 1
+            if track.format is not None:
+                result.codecs.setdefault(track.track_type, []).append(track.format)
+            # Values that could not be converted are ignored
+            if isinstance(track.duration, (int, float)):
+                durations.append(track.duration)
+        if not isinstance(result.duration, (int, float)):
+            result.duration = max(durations, default=None)
+        for track in (*media_info.video_tracks, *media_info.image_tracks):
+            if isinstance(track.width, int) and isinstance(track.height, int):
+                result.width, result.height = track.width, track.height
+                break
+        return result
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ProbeResult):
+            return False
+        return self.__dict__ == other.__dict__
+
+    def __repr__(self) -> str:
+        return "<ProbeResult container={!r}, duration={!r}, track_counts={!r}>".format(
+            self.container, self.duration, self.track_counts
+        )
@@ -0,0 +1,125 @@
+"""
+Profiling of the analyses, see :func:`pymediainfo.profile`.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import time
+from typing import Any, Callable, Iterator
+
+# The callbacks that receive the ParseProfile of each file analyzed, see profile()
+_profile_callbacks: contextvars.ContextVar[tuple[Callable[[ParseProfile], Any], ...]] = (
+    contextvars.ContextVar("_profile_callbacks", default=())
+)
+
+
+class ParseProfile:
+    """
+    Describes how the time needed to analyze a file was spent, see :func:`profile`.
+
+    The durations in :attr:`phases` are in seconds, phases that did not happen are absent:
+
+    * ``library``: loading the library, which only happens once per process, and getting
+      it from the cache, when the file was analyzed by a new parser
+    * ``options``: creating a libmediainfo handle and setting its options, when the file
+      was analyzed by a new parser or when another parser changed the options
+    * ``wait``: waiting for another thread to finish using the parser
+    * ``open``: the analysis of the file by libmediainfo, excluding ``read``
+    * ``read``: reading file-like objects
+    * ``inform``: getting libmediainfo's output
+    * ``close``: closing the file
+    * ``decode``: creating the :class:`MediaInfo` object from libmediainfo's output,
+      this includes parsing the XML or JSON and creating the :class:`Track` objects
+
+    :var filename: the path, file-like object or data that was analyzed.
+    :var dict phases: the duration of each phase.
+    :var int bytes_fed: the number of bytes passed to the library, for file-like
+        and :class:`bytes`-like objects.
+    :var int seeks: the number of seeks requested by the library.
+    :var int output_size: the length of libmediainfo's output, or of the values
+        that were retrieved when using `fields`.
+    """
+
+    def __init__(self, filename: Any) -> None:
+        self.filename = filename
+        self.phases: dict[str, float] = {}
+        self.bytes_fed = 0
+        self.seeks = 0
+        self.output_size = 0
+        self._callbacks = _profile_callbacks.get()
+        self._last = time.perf_counter()
+
+    @property
+    def total(self) -> float:
+        """
+        The total duration of all phases, in seconds.
+
+        :rtype: float
+        """
+        return sum(self.phases.values())
+
+    def __repr__(self) -> str:
+        phases = ", ".join(
+            "{}={:.3f}ms".format(phase, duration * 1000) for phase, duration in self.phases.items()
+        )
+        return "<ParseProfile {}, bytes_fed={}, seeks={}, output_size={}>".format(
+            phases, self.bytes_fed, self.seeks, self.output_size
+        )
+
+    def _mark(self, phase: str, excluded: float = 0.0) -> None:
+        # Adds the time elapsed since the previous phase, minus excluded, to a phase
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last - excluded
+        self._last = now
+
+    def _report(self) -> None:
+        for callback in self._callbacks:
+            callback(self)
+
+
+@contextlib.contextmanager
+def profile(callback: Callable[[ParseProfile], Any] | None = None) -> Iterator[list[ParseProfile]]:
+    """
+    Collect a :class:`ParseProfile` describing how the time was spent for each file
+    analyzed in the current thread, or asynchronous task, until the context manager exits.
+    Outside of it, this has no measurable cost.
+
+    >>> with pymediainfo.profile() as profiles:
+    ...     mi = pymediainfo.MediaInfo.parse("/path/to/file.mp4")
+    >>> profiles
+    [<ParseProfile library=0.004ms, options=0.030ms, wait=0.001ms, open=5.712ms,
+    inform=1.390ms, close=0.021ms, decode=0.398ms, bytes_fed=0, seeks=0, output_size=27648>]
+
+    Passing a callback allows exporting the profiles, e.g. to a metrics system,
+    without keeping them:
+
+    >>> def record(profile):
+    ...     for phase, duration in profile.phases.items():
+    ...         histograms[phase].observe(duration)
+    >>> with pymediainfo.profile(record):
+    ...     serve_requests()
+
+    Profiles are also collected for files analyzed by :func:`MediaInfo.parse_many`
+    with ``executor="thread"`` and by :func:`MediaInfo.aparse`, but not for results
+    taken from a :class:`pymediainfo.cache.ResultCache`.
+
+    When a file is analyzed again because of `escalate`, see :class:`MediaInfoParser`,
+    a single profile describes both analyses: the durations, :attr:`ParseProfile.bytes_fed`
+    and :attr:`ParseProfile.seeks` are the sums for both and
+    :attr:`ParseProfile.output_size` is that of the second one.
+
+    :param callback: a function called with the :class:`ParseProfile` of each file,
+        from the thread that analyzed it, as soon as it has been analyzed.
+    :rtype: list
+    :returns: a list to which profiles are appended, unless `callback` is set.
+    """
+    profiles: list[ParseProfile] = []
+    token = _profile_callbacks.set(
+        (*_profile_callbacks.get(), profiles.append if callback is None else callback)
+    )
+    try:
+        yield profiles
+    finally:
+        _profile_callbacks.reset(token)
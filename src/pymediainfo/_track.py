@@ -0,0 +1,333 @@
+"""
+Tracks and the conversion of their attribute values.
+"""
+
+from __future__ import annotations
+
+import decimal
+import re
+import sys
+import xml.etree.ElementTree as ET
+from typing import Any, Callable, Iterable
+
+# Track types, in the order of libmediainfo's stream_t enum
+_STREAM_KINDS = ("General", "Video", "Audio", "Text", "Other", "Image", "Menu")
+# Types of the values of parameters, depending on the measure that libmediainfo
+# describes them with, see MediaInfoParser._get_schema
+_MEASURE_TYPES = {
+    " bit": "int",
+    " bps": "int",
+    " byte": "int",
+    " channel": "int",
+    " character": "int",
+    " frame": "int",
+    " pixel": "int",
+    " slice per frame": "int",
+    " warppoint": "int",
+    " dB": "float",
+    " fps": "float",
+    " Hz": "float",
+    " ms": "duration",
+    "Yes": "bool",
+}
+# Parameters whose values are rewritten in the JSON output, e.g. Format_Profile is split into
+# Format_Profile, Format_Level and Format_Tier, the JSON backend retrieves their values as they
+# are in the XML output, see MediaInfoParser._inform_json
+_JSON_REWRITTEN_PARAMETERS = frozenset(
+    ("Format_Version", "Format_Profile", "Format_Level", "Format_Tier")
+)
+_INT_REGEX = re.compile(r"-?[0-9]+")
+_DECIMAL_REGEX = re.compile(r"-?[0-9]+(?:\.[0-9]+)?")
+
+
+class Track:
+    """
+    An object associated with a media file track.
+
+    Each :class:`Track` attribute corresponds to attributes parsed from MediaInfo's output.
+    All attributes are lower case. Attributes that are present several times such as `Duration`
+    yield a second attribute starting with `other_` which is a list of all alternative
+    attribute values.
+
+    When a non-existing attribute is accessed, `None` is returned.
+
+    Example:
+
+    >>> t = mi.tracks[0]
+    >>> t
+    <Track track_id='None', track_type='General'>
+    >>> t.duration
+    3000
+    >>> t.other_duration
+    ['3 s 0 ms', '3 s 0 ms', '3 s 0 ms',
+        '00:00:03.000', '00:00:03.000']
+    >>> type(t.non_existing)
+    NoneType
+
+    All available attributes can be obtained by calling :func:`to_data`.
+    """
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Track):
+            return False
+        return self.to_data() == other.to_data()
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called when the attribute doesn't exist, existing
+        # attributes are looked up without going through Python code
+        if "_raw_fields" in self.__dict__:
+            return self._decode_attribute(name)
+        return None
+
+    def __getstate__(self) -> dict[str, Any]:
+        return self.to_data()
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__ = {sys.intern(name): value for name, value in state.items()}
+
+    def __init__(self, xml_dom_fragment: ET.Element, lazy: bool = False) -> None:
+        self._init_attributes(
+            xml_dom_fragment.attrib["type"],
+            [(elem.tag, elem.text) for elem in xml_dom_fragment],
+            lazy,
+        )
+
+    @classmethod
+    def _from_fields(
+        cls, track_type: str, fields: list[tuple[str, str | None]], lazy: bool = False
+    ) -> Track:
+        track = cls.__new__(cls)
+        track._init_attributes(track_type, fields, lazy)
+        return track
+
+    def _init_attributes(
+        self, track_type: str, fields: list[tuple[str, str | None]], lazy: bool
+    ) -> None:
+        if lazy:
+            # Fields are only decoded when they are accessed, see _decode_attribute
+            self.__dict__.update(track_type=track_type, _raw_fields=fields)
+        else:
+            self._set_attributes(track_type, fields)
+
+    def _decode_attribute(self, name: str) -> Any:
+        # Decodes a single attribute of a lazy track, along with its "other_" counterpart,
+        # the result is the same as what _set_attributes would have produced
+        attributes = self.__dict__
+        index: dict[str, list[str | None]] | None = attributes.get("_raw_index")
+        if index is None:
+            index = {}
+            for field_name, node_value in attributes["_raw_fields"]:
+                node_name = field_name.lower().strip().strip("_")
+                if node_name == "id":
+                    node_name = "track_id"
+                values = index.get(node_name)
+                if values is None:
+                    index[node_name] = [node_value]
+                else:
+                    values.append(node_value)
+            attributes["_raw_index"] = index
+        node_name = name
+        values = index.get(node_name)
+        if values is None and name.startswith("other_"):
+            node_name = name[6:]
+            values = index.get(node_name)
+        if values is None:
+            return None
+        value = None
+        other_values: list[Any] = []
+        for node_value in values:
+            if value is None:
+                value = node_value
+            else:
+                other_values.append(node_value)
+        if other_values:
+            value = self._convert_repeated_attribute(value, other_values)
+            attributes[sys.intern(f"other_{node_name}")] = other_values
+        if "_schema" in attributes:
+            value = self._convert_value(attributes["_schema"], node_name, value)
+        attributes[sys.intern(node_name)] = value
+        return attributes.get(name)
+
+    @staticmethod
+    def _convert_value(schema: dict[str, Callable[[str], Any]], name: str, value: Any) -> Any:
+        convert = schema.get(name)
+        if convert is None or type(value) is not str:  # pylint: disable=unidiomatic-typecheck
+            return value
+        return convert(value)
+
+    def _apply_schema(self, schema: dict[str, Callable[[str], Any]]) -> None:
+        # Converts the string values of attributes using the functions of a schema built
+        # by MediaInfoParser._get_schema, lazy tracks convert them when they are decoded
+        attributes = self.__dict__
+        if "_raw_fields" in attributes:
+            attributes["_schema"] = schema
+            return
+        # Values are replaced while iterating, which is allowed since keys don't change
+        for name, value in attributes.items():
+            if type(value) is str:  # pylint: disable=unidiomatic-typecheck
+                convert = schema.get(name)
+                if convert is not None:
+                    attributes[name] = convert(value)
+
+    @staticmethod
+    def _convert_repeated_attribute(value: Any, other_values: list[Any]) -> Any:
+        # Usually, if an attribute is repeated, one of its value
+        # is an int and others are human-readable formats
+        try:
+            # Attempt to convert the main value to int
+            return int(value)
+        except ValueError:
+            # If it fails, try to find a secondary value
+            # that is an int and swap it with the main value
+            for other_value in other_values:
+                try:
+                    converted = int(other_value)
+                except ValueError:
+                    continue
+                # Append the previous main value to other values
+                other_values.append(value)
+                return converted
+        return value
+
+    def _set_attributes(self, track_type: str, fields: Iterable[tuple[str, str | None]]) -> None:
+        # Fields are (name, value) tuples, names being those of MediaInfo's XML output
+        # The instance dict is used directly since it is much faster than getattr and setattr
+        attributes = self.__dict__
+        attributes["track_type"] = track_type
+        # Keys preserve insertion order and avoid converting the same attribute several times
+        repeated_attributes: dict[str, str] = {}
+        for field_name, node_value in fields:
+            # Names are interned so that all tracks share them instead of holding their own copy
+            node_name = sys.intern(field_name.lower().strip().strip("_"))
+            if node_name == "id":
+                node_name = "track_id"
+            if attributes.get(node_name) is None:
+                attributes[node_name] = node_value
+            else:
+                other_node_name = sys.intern(f"other_{node_name}")
+                repeated_attributes[node_name] = other_node_name
+                other_values = attributes.get(other_node_name)
+                if other_values is None:
+                    attributes[other_node_name] = [node_value]
+                else:
+                    other_values.append(node_value)
+
+        for primary_key, other_key in repeated_attributes.items():
+            attributes[primary_key] = self._convert_repeated_attribute(
+                attributes[primary_key], attributes[other_key]
+            )
+
+    def __repr__(self) -> str:
+        return "<Track track_id='{}', track_type='{}'>".format(self.track_id, self.track_type)
+
+    def to_data(self) -> dict[str, Any]:
+        """
+        Returns a dict representation of the track attributes.
+
+        Example:
+
+        >>> sorted(track.to_data().keys())[:3]
+        ['codec', 'codec_extensions_usually_used', 'codec_url']
+        >>> t.to_data()["file_size"]
+        5988
+
+
+        :rtype: dict
+        """
+        attributes = self.__dict__
+        if "_raw_fields" in attributes:
+            # Lazy tracks are fully decoded, values that were set or modified since then
+            # are kept, the new dict is only swapped in once complete for thread safety
+            track = Track.__new__(Track)
+            # pylint: disable-next=protected-access
+            track._set_attributes(attributes["track_type"], attributes["_raw_fields"])
+            if "_schema" in attributes:
+                # pylint: disable-next=protected-access
+                track._apply_schema(attributes["_schema"])
+            decoded = track.__dict__
+            decoded.update(
+                (name, value)
+                for name, value in attributes.items()
+                if name not in ("_raw_fields", "_raw_index", "_schema")
+            )
+            self.__dict__ = attributes = decoded
+        return attributes
+
+
+def _get_attribute_name(name: str) -> str:
+    # Returns the name of the Track attribute corresponding to a field, see Track._set_attributes
+    name = name.lower().strip().strip("_")
+    return "track_id" if name == "id" else name
+
+
+def _get_field_attributes(names: Iterable[str]) -> frozenset[str]:
+    # Attributes requested with fields, other_ attributes are obtained from the same fields
+    # as the main ones but some fields, such as Other_Format_List, also start with other_
+    attributes = set()
+    for name in names:
+        attributes.add(name)
+        if name.startswith("other_"):
+            attributes.add(name[6:])
+    return frozenset(attributes)
+
+
+def _to_int(value: str) -> Any:
+    return int(value) if _INT_REGEX.fullmatch(value) else value
+
+
+def _to_float(value: str) -> Any:
+    return float(value) if _DECIMAL_REGEX.fullmatch(value) else value
+
+
+def _to_duration(value: str) -> Any:
+    # Durations are in milliseconds, they are only floats if they have decimals
+    if _INT_REGEX.fullmatch(value):
+        return int(value)
+    return float(value) if _DECIMAL_REGEX.fullmatch(value) else value
+
+
+def _to_bool(value: str) -> Any:
+    return {"Yes": True, "No": False}.get(value, value)
+
+
+# Conversion functions used by typed parsing, values that don't have the expected
+# format are left unchanged
+_VALUE_CONVERTERS: dict[str, Callable[[str], Any]] = {
+    "int": _to_int,
+    "float": _to_float,
+    "duration": _to_duration,
+    "bool": _to_bool,
+}
+
+
+def _seconds_to_ms(value: str) -> str:
+    # The JSON output uses seconds where the XML output uses milliseconds, with three more
+    # decimals, which are kept so that values such as "0.000000" are the same in both outputs
+    try:
+        return format(decimal.Decimal(value).scaleb(3), "f")
+    except decimal.InvalidOperation:
+        return value
+
+
+def _get_json_fields(
+    json_track: dict[str, Any], names: dict[str, tuple[str, bool]], values: dict[str, str]
+) -> list[tuple[str, str | None]]:
+    # Returns the fields of a track of the JSON output with their XML names, see
+    # MediaInfo._from_json, values replaces those of _JSON_REWRITTEN_PARAMETERS
+    values = dict(values)
+    fields: list[tuple[str, str | None]] = []
+    for name, value in json_track.items():
+        if name == "extra":
+            fields.extend(
+                (names.get(extra_name, (extra_name, False))[0], str(extra_value))
+                for extra_name, extra_value in value.items()
+            )
+        elif name in _JSON_REWRITTEN_PARAMETERS:
+            if name in values:
+                fields.append((names.get(name, (name, False))[0], values.pop(name)))
+        elif not name.startswith("@"):
+            xml_name, in_seconds = names.get(name, (name, False))
+            fields.append((xml_name, _seconds_to_ms(value) if in_seconds else value))
+    # Values that are missing from the JSON output
+    fields.extend((names.get(name, (name, False))[0], value) for name, value in values.items())
+    return fields
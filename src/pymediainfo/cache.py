@@ -0,0 +1,497 @@
+"""
+Caches for the results of :func:`pymediainfo.MediaInfo.parse`.
+
+A cache can be passed to :func:`pymediainfo.MediaInfo.parse` using its `cache`
+parameter, files are then only analyzed if the cache does not contain a result
+obtained with the same options for the same file:
+
+>>> from pymediainfo.cache import DiskCache
+>>> with DiskCache("mediainfo.sqlite") as cache:
+...     mi = pymediainfo.MediaInfo.parse("/path/to/file.mp4", cache=cache)
+
+Files are identified by their path, size, modification time and inode, or by their path and
+a hash of their contents. Other inputs such as file-like objects and URLs are always analyzed.
+"""
+
+from __future__ import annotations
+
+import abc
+import collections
+import functools
+import hashlib
+import inspect
+import json
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable
+
+from pymediainfo import MediaInfo, MediaInfoParser, Track
+from pymediainfo._files import _normalize_filename
+from pymediainfo._library import _get_cached_library
+from pymediainfo._parallel import _normalize_options
+
+# Options that do not change the result of an analysis, the version of the library
+# is part of the key instead of its path, results of analyses stopped by limits are not stored
+_LIMIT_OPTIONS = ("max_time", "max_bytes", "cancel_event")
+_IGNORED_OPTIONS = frozenset(("library_file", "buffer_size", "lazy", "memory_map", *_LIMIT_OPTIONS))
+# The default values of the options, so that omitted options and default values
+# produce the same key
+_DEFAULT_OPTIONS = {
+    name: parameter.default
+    for name, parameter in inspect.signature(MediaInfoParser).parameters.items()
+}
+# Changed when the format of cached values changes
+_FORMAT_VERSION = 1
+# Number of hits after which DiskCache writes their access times
+_ACCESS_BATCH_SIZE = 100
+
+
+class ResultCache(abc.ABC):
+    """
+    Base class of caches, it handles the computation of keys
+    and the serialization of results.
+
+    :param bool hash_contents: identify files by their path and a hash of their contents
+        instead of their path, size, modification time and inode. Changes that keep the size
+        and modification time of a file are then detected and :class:`bytes`-like objects are
+        also cached, but each file must be read entirely to be hashed. Results are not shared
+        between copies of a file since they contain its name, the dates they contain are
+        those of the file when it was analyzed.
+    """
+
+    def __init__(self, *, hash_contents: bool = False) -> None:
+        self._hash_contents = hash_contents
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "bypasses": 0}
+
+    @abc.abstractmethod
+    def _get(self, media_info_class: type[MediaInfo], key: str) -> MediaInfo | str | None:
+        """Returns the result stored under `key`, or `None`."""
+
+    @abc.abstractmethod
+    def _put(self, key: str, result: MediaInfo | str) -> None:
+        """Stores `result` under `key`."""
+
+    def _count(self, counter: str) -> None:
+        with self._stats_lock:
+            self._stats[counter] += 1
+
+    @staticmethod
+    def _hash_file(filename: str) -> str:
+        digest = hashlib.blake2b()
+        with open(filename, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _get_identity(self, filename: Any) -> list[Any] | None:
+        # Returns None if the result cannot be cached
+        filename = _normalize_filename(filename)
+        if isinstance(filename, str):
+            try:
+                stat = os.stat(filename)
+            except OSError:  # URLs and missing files, errors are raised when analyzing them
+                return None
+            # Results contain the path of the file
+            if self._hash_contents:
+                return ["hash", os.path.abspath(filename), stat.st_size, self._hash_file(filename)]
+            return [
+                "file",
+                os.path.abspath(filename),
+                stat.st_size,
+                stat.st_mtime_ns,
+                stat.st_ino,
+                stat.st_dev,
+            ]
+        if self._hash_contents and isinstance(filename, (bytes, bytearray, memoryview, mmap.mmap)):
+            with memoryview(filename) as view:
+                return ["hash", None, view.nbytes, hashlib.blake2b(view).hexdigest()]
+        return None
+
+    @staticmethod
+    def _get_key(identity: list[Any], options: dict[str, Any]) -> str:
+        library = _get_cached_library(options["library_file"])
+        key_options = {
+            name: value for name, value in options.items() if name not in _IGNORED_OPTIONS
+        }
+        key = json.dumps(
+            [_FORMAT_VERSION, identity, library.version_str, key_options], sort_keys=True
+        )
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @staticmethod
+    def _dump(result: MediaInfo | str) -> bytes:
+        if isinstance(result, str):
+            return json.dumps({"output": result}).encode()
+        return json.dumps(result.to_data()).encode()
+
+    @staticmethod
+    def _load(media_info_class: type[MediaInfo], value: bytes) -> MediaInfo | str:
+        data = json.loads(value)
+        if "output" in data:
+            output: str = data["output"]
+            return output
+        return media_info_class._from_data(data)  # pylint: disable=protected-access
+
+    def _parse(
+        self,
+        media_info_class: type[MediaInfo],
+        filename: Any,
+        options: dict[str, Any],
+        analyze: Callable[[Any], MediaInfo | str] | None = None,
+    ) -> MediaInfo | str:
+        # Files are analyzed with analyze if it is set, e.g. to use a parser from a pool,
+        # it must use the same options
+        unknown_options = options.keys() - _DEFAULT_OPTIONS.keys()
+        if unknown_options:
+            raise TypeError(f"Unknown options: {', '.join(sorted(unknown_options))}")
+        options = _normalize_options({**_DEFAULT_OPTIONS, **options})
+        if analyze is None:
+            analyze = functools.partial(media_info_class.parse, **options)
+        # Functions deciding whether to analyze files again cannot be part of keys
+        identity = None if callable(options["escalate"]) else self._get_identity(filename)
+        if identity is None:
+            self._count("bypasses")
+            return analyze(filename)
+        key = self._get_key(identity, options)
+        cached_result = self._get(media_info_class, key)
+        if cached_result is not None:
+            self._count("hits")
+            return cached_result
+        self._count("misses")
+        result = analyze(filename)
+        # Do not store results if the file was modified while it was analyzed
+        if _is_complete(result, options) and (
+            identity[0] == "hash" or identity == self._get_identity(filename)
+        ):
+            self._put(key, result)
+        return result
+
+    def parse(self, filename: Any, **options: Any) -> MediaInfo | str:
+        """
+        Get the result of :func:`pymediainfo.MediaInfo.parse` from the cache, or analyze the
+        file and store the result if it is not cached.
+
+        :param filename: the file to analyze.
+        :param options: keyword arguments passed to :func:`pymediainfo.MediaInfo.parse`.
+        :raises TypeError: if passed unknown options.
+        """
+        return self._parse(MediaInfo, filename, options)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        Counters describing the cache's activity:
+
+        * ``hits``: number of results found in the cache
+        * ``misses``: number of results that had to be computed
+        * ``bypasses``: number of files which could not be cached, such as file-like objects
+
+        :rtype: dict
+        """
+        with self._stats_lock:
+            return dict(self._stats)
+
+
+class DiskCache(ResultCache):
+    """
+    A cache stored in an SQLite database, which can be shared by several processes.
+
+    When the size of stored results exceeds `max_size`, the least recently used
+    results are evicted. Access times are written in batches, when results are stored
+    or every 100 hits, so hits that were not written yet do not count when another
+    process evicts results.
+
+    :param path: path to the database, it is created if it does not exist.
+    :type path: str or os.PathLike
+    :param int max_size: maximum size of stored results, in bytes.
+    :param bool hash_contents: see :class:`ResultCache`.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        max_size: int = 256 * 1024**2,
+        hash_contents: bool = False,
+    ) -> None:
+        super().__init__(hash_contents=hash_contents)
+        self._max_size = max_size
+        self._evictions = 0
+        # Access times of hits that were not written yet
+        self._accessed: dict[str, float] = {}
+        self._lock = threading.Lock()
+        # Transactions are handled explicitly
+        self._connection = sqlite3.connect(
+            os.fspath(path), check_same_thread=False, isolation_level=None
+        )
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, "
+                "value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)"
+            )
+            # The total size of results, which is updated along with them
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS metadata "
+                "(name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            self._connection.execute(
+                "INSERT OR IGNORE INTO metadata VALUES "
+                "('size', (SELECT COALESCE(SUM(size), 0) FROM results))"
+            )
+
+    def __enter__(self) -> DiskCache:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def _get(self, media_info_class: type[MediaInfo], key: str) -> MediaInfo | str | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._accessed[key] = time.time()
+            if len(self._accessed) >= _ACCESS_BATCH_SIZE:
+                self._transaction(self._write_accessed)
+        return self._load(media_info_class, row[0])
+
+    def _transaction(self, function: Callable[[], None]) -> None:
+        connection = self._connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            function()
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _write_accessed(self) -> None:
+        self._connection.executemany(
+            "UPDATE results SET accessed = ? WHERE key = ?",
+            [(accessed, key) for key, accessed in self._accessed.items()],
+        )
+        self._accessed.clear()
+
+    def _update_size(self, difference: int) -> int:
+        # Returns the new total size
+        self._connection.execute(
+            "UPDATE metadata SET value = value + ? WHERE name = 'size'", (difference,)
+        )
+        ((total_size,),) = self._connection.execute(
+            "SELECT value FROM metadata WHERE name = 'size'"
+        )
+        return int(total_size)
+
+    def _put(self, key: str, result: MediaInfo | str) -> None:
+        value = self._dump(result)
+        connection = self._connection
+
+        def put() -> None:
+            # Eviction depends on the access times of hits
+            self._write_accessed()
+            row = connection.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            total_size = self._update_size(len(value) - (0 if row is None else row[0]))
+            if total_size > self._max_size:
+                evicted = []
+                evicted_size = 0
+                for evicted_key, size in connection.execute(
+                    "SELECT key, size FROM results ORDER BY accessed"
+                ):
+                    evicted.append((evicted_key,))
+                    evicted_size += size
+                    if total_size - evicted_size <= self._max_size:
+                        break
+                connection.executemany("DELETE FROM results WHERE key = ?", evicted)
+                self._update_size(-evicted_size)
+                self._evictions += len(evicted)
+
+        with self._lock:
+            self._transaction(put)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        Counters describing the cache's activity, in addition to those of
+        :attr:`ResultCache.stats`:
+
+        * ``evictions``: number of results removed to respect `max_size`
+        * ``entries``: number of results in the database
+        * ``size``: size of the results in the database, in bytes
+
+        :rtype: dict
+        """
+        with self._lock:
+            ((entries,),) = self._connection.execute("SELECT COUNT(*) FROM results")
+            ((size,),) = self._connection.execute("SELECT value FROM metadata WHERE name = 'size'")
+            return dict(super().stats, evictions=self._evictions, entries=entries, size=size)
+
+    def clear(self) -> None:
+        """
+        Remove all the results from the database.
+        """
+
+        def clear() -> None:
+            self._connection.execute("DELETE FROM results")
+            self._connection.execute("UPDATE metadata SET value = 0 WHERE name = 'size'")
+            self._accessed.clear()
+
+        with self._lock:
+            self._transaction(clear)
+
+    def close(self) -> None:
+        """
+        Close the database, the cache cannot be used afterwards.
+        """
+        with self._lock:
+            if self._accessed:
+                self._transaction(self._write_accessed)
+            self._connection.close()
+
+
+class MemoryCache(ResultCache):
+    # pylint: disable=too-many-instance-attributes
+    """
+    A thread-safe cache stored in memory, which is useful for long-running processes
+    that analyze the same files repeatedly.
+
+    When one of the limits is reached, the least recently used results are evicted.
+    Each call returns a new :class:`pymediainfo.MediaInfo` object, so modifying it
+    does not affect the cached result.
+
+    >>> cache = MemoryCache(max_entries=10_000, ttl=600)
+    >>> mi = pymediainfo.MediaInfo.parse("/path/to/file.mp4", cache=cache)
+
+    :param int max_entries: maximum number of results.
+    :param int max_bytes: maximum size of results, as measured by the size of their JSON
+        representation, `None` means no limit.
+    :param float ttl: number of seconds after which results expire, `None` means never.
+    :param bool hash_contents: see :class:`ResultCache`.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 1024,
+        max_bytes: int | None = None,
+        ttl: float | None = None,
+        hash_contents: bool = False,
+    ) -> None:
+        super().__init__(hash_contents=hash_contents)
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        # Values are (expiry time, size, str or list of track attributes)
+        self._entries: collections.OrderedDict[str, tuple[float | None, int, Any]] = (
+            collections.OrderedDict()
+        )
+        self._size = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @staticmethod
+    def _copy_tracks(tracks_data: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        # Lists of other values are the only mutable attributes
+        return [
+            {
+                name: value.copy() if isinstance(value, list) else value
+                for name, value in data.items()
+            }
+            for data in tracks_data
+        ]
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._size -= size
+
+    def _get(self, media_info_class: type[MediaInfo], key: str) -> MediaInfo | str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expiry, _, value = entry
+            if expiry is not None and time.monotonic() >= expiry:
+                self._remove(key)
+                self._expirations += 1
+                return None
+            self._entries.move_to_end(key)
+        if isinstance(value, str):
+            return value
+        # Copying attributes is much faster than deserializing them
+        media_info = media_info_class.__new__(media_info_class)
+        media_info.tracks = []
+        for data in self._copy_tracks(value):
+            track = Track.__new__(Track)
+            track.__dict__ = data
+            media_info.tracks.append(track)
+        return media_info
+
+    def _put(self, key: str, result: MediaInfo | str) -> None:
+        size = len(self._dump(result))
+        if isinstance(result, str):
+            value: Any = result
+        else:
+            value = self._copy_tracks([track.to_data() for track in result.tracks])
+        expiry = None if self._ttl is None else time.monotonic() + self._ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expiry, size, value)
+            self._size += size
+            while len(self._entries) > self._max_entries or (
+                self._max_bytes is not None and self._size > self._max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        Counters describing the cache's activity, in addition to those of
+        :attr:`ResultCache.stats`:
+
+        * ``evictions``: number of results removed to respect `max_entries` and `max_bytes`
+        * ``expirations``: number of results removed because they were older than `ttl`
+        * ``entries``: number of results in the cache
+        * ``size``: size of the results in the cache, in bytes
+
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(
+                super().stats,
+                evictions=self._evictions,
+                expirations=self._expirations,
+                entries=len(self._entries),
+                size=self._size,
+            )
+
+    def clear(self) -> None:
+        """
+        Remove all the results from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+def _is_complete(result: MediaInfo | str, options: dict[str, Any]) -> bool:
+    # Custom outputs are not flagged when the analysis is stopped early
+    if isinstance(result, str):
+        return all(options[name] is None for name in _LIMIT_OPTIONS)
+    return not result.partial
@@ -0,0 +1,248 @@
+"""
+Column-oriented export of many :class:`pymediainfo.MediaInfo` results, for analytics.
+
+Tracks of each type are gathered in a table whose columns are their attributes,
+columns are typed and have a validity bitmap so they can be loaded into
+`Apache Arrow <https://arrow.apache.org/>`_ or pandas without building a dict per row:
+
+>>> from pymediainfo.columns import ColumnCollector
+>>> collector = ColumnCollector()
+>>> for path in paths:
+...     collector.add(pymediainfo.MediaInfo.parse(path))
+>>> columns = collector.columns("Video")
+>>> columns["width"]
+<Column name='width', type='int64', length=2, null_count=0>
+>>> columns["width"].to_pylist()
+[1920, 720]
+>>> df = pandas.DataFrame(collector.to_pydict("Video"))
+>>> table = collector.to_arrow("Video")
+"""
+
+from __future__ import annotations
+
+import array
+from typing import Any, Iterable
+
+from pymediainfo import MediaInfo
+
+_INT64_MIN = -(2**63)
+_INT64_MAX = 2**63 - 1
+
+
+class Column:
+    """
+    The values of an attribute for all the tracks of a given type.
+
+    The type of a column is inferred from its values:
+
+    * ``int64``: ints, :attr:`values` is an :class:`array.array` of type ``q``
+    * ``float64``: floats, possibly mixed with ints, :attr:`values` is an
+      :class:`array.array` of type ``d``
+    * ``bool``: bools, such as the ``default`` attribute of tracks parsed with
+      ``typed=True``, :attr:`values` is a :class:`list`
+    * ``string``: strings, :attr:`values` is a :class:`list`
+    * ``list``: lists of other values, such as ``other_`` attributes, :attr:`values`
+      is a :class:`list`
+    * ``object``: values of different types, for instance if an attribute was only
+      converted to :class:`int` for some tracks, :attr:`values` is a :class:`list`
+
+    Null values are `None` in lists and 0 in arrays.
+
+    :var str name: the name of the attribute.
+    :var str type: the type of the column.
+    :var values: the values of the column.
+    :var bytearray validity: a bitmap with a bit set for each value that is not null,
+        least significant bit first, as used by Arrow.
+    :var int null_count: the number of null values.
+    """
+
+    def __init__(self, name: str, values: list[Any]) -> None:
+        self.name = name
+        self.null_count = values.count(None)
+        value_types = set(map(type, values))
+        value_types.discard(type(None))
+        self.type = "object"
+        self.values: list[Any] | array.array[Any] = values
+        if value_types == {int} and _fits_int64(values):
+            self.type = "int64"
+            self.values = array.array("q", _fill_nulls(values, 0, self.null_count))
+        elif value_types in ({float}, {int, float}):
+            self.type = "float64"
+            self.values = array.array("d", _fill_nulls(values, 0.0, self.null_count))
+        elif value_types == {bool}:
+            self.type = "bool"
+        elif value_types == {str}:
+            self.type = "string"
+        elif value_types == {list}:
+            self.type = "list"
+        byte_count = (len(values) + 7) // 8
+        if self.null_count:
+            bits = "".join(["0" if value is None else "1" for value in reversed(values)])
+            self.validity = bytearray(int(bits, 2).to_bytes(byte_count, "little"))
+        else:
+            self.validity = bytearray(((1 << len(values)) - 1).to_bytes(byte_count, "little"))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __repr__(self) -> str:
+        return "<Column name={!r}, type={!r}, length={}, null_count={}>".format(
+            self.name, self.type, len(self), self.null_count
+        )
+
+    def to_pylist(self) -> list[Any]:
+        """
+        Returns the values of the column, null values being `None`.
+
+        :rtype: list
+        """
+        if isinstance(self.values, list):
+            return self.values.copy()
+        values = self.values.tolist()
+        if not self.null_count:
+            return values
+        validity = self.validity
+        return [
+            value if validity[index >> 3] & 1 << (index & 7) else None
+            for index, value in enumerate(values)
+        ]
+
+
+class ColumnCollector:
+    """
+    Accumulates :class:`pymediainfo.MediaInfo` objects and exports their tracks
+    as one table per track type.
+
+    Each table has a ``file_index`` column containing the position of the
+    :class:`pymediainfo.MediaInfo` object the track belongs to, in the order in which
+    they were added, which allows joining tables of different track types. The other
+    columns are the attributes of the tracks, in the order in which they were first
+    encountered, attributes missing from a track are null.
+    """
+
+    def __init__(self) -> None:
+        self._count = 0
+        # For each track type, the number of rows and the values of each attribute,
+        # lists are only padded with None when an attribute is appended after missing rows
+        self._tables: dict[str, tuple[list[int], dict[str, list[Any]]]] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def track_types(self) -> list[str]:
+        """
+        The types of the tracks that were added, in the order in which they were encountered.
+
+        :rtype: list
+        """
+        return list(self._tables)
+
+    def add(self, media_info: MediaInfo) -> None:
+        """
+        Add the tracks of a :class:`pymediainfo.MediaInfo` object.
+
+        :param media_info: the object to add.
+        """
+        file_index = self._count
+        for track in media_info.tracks:
+            attributes = track.to_data()
+            table = self._tables.get(attributes["track_type"])
+            if table is None:
+                table = self._tables[attributes["track_type"]] = ([0], {"file_index": []})
+            rows, columns = table
+            row = rows[0]
+            rows[0] = row + 1
+            columns["file_index"].append(file_index)
+            for name, value in attributes.items():
+                values = columns.get(name)
+                if values is None:
+                    values = columns[name] = [None] * row
+                elif len(values) < row:
+                    values.extend([None] * (row - len(values)))
+                values.append(value)
+        self._count = file_index + 1
+
+    def extend(self, media_infos: Iterable[MediaInfo]) -> None:
+        """
+        Add the tracks of several :class:`pymediainfo.MediaInfo` objects.
+
+        :param media_infos: the objects to add.
+        """
+        for media_info in media_infos:
+            self.add(media_info)
+
+    def columns(self, track_type: str) -> dict[str, Column]:
+        """
+        Returns the columns of the table of a track type.
+
+        :param str track_type: the type of the tracks, such as ``"Video"``.
+        :rtype: dict
+        :returns: a dict of :class:`Column` objects, keyed by attribute name, which is empty
+            if no track of this type was added.
+        """
+        table = self._tables.get(track_type)
+        if table is None:
+            return {}
+        rows, columns = table
+        for values in columns.values():
+            if len(values) < rows[0]:
+                values.extend([None] * (rows[0] - len(values)))
+        # Columns are built from copies so that further additions do not affect them
+        return {name: Column(name, values.copy()) for name, values in columns.items()}
+
+    def to_pydict(self, track_type: str) -> dict[str, list[Any]]:
+        """
+        Returns the table of a track type as a dict of lists, which can be passed to
+        :class:`pandas.DataFrame`.
+
+        :param str track_type: the type of the tracks, such as ``"Video"``.
+        :rtype: dict
+        """
+        return {name: column.to_pylist() for name, column in self.columns(track_type).items()}
+
+    def to_arrow(self, track_type: str) -> Any:
+        """
+        Returns the table of a track type as a :class:`pyarrow.Table`, numeric
+        columns are loaded without converting each value. Columns of type ``object``
+        are converted to strings, unless Arrow can infer a type for them.
+
+        :param str track_type: the type of the tracks, such as ``"Video"``.
+        :raises ImportError: if pyarrow is not installed.
+        :rtype: pyarrow.Table
+        """
+        # pylint: disable-next=import-outside-toplevel, import-error
+        import pyarrow
+
+        arrays = {}
+        for name, column in self.columns(track_type).items():
+            if isinstance(column.values, array.array):
+                arrow_type = pyarrow.int64() if column.type == "int64" else pyarrow.float64()
+                arrays[name] = pyarrow.Array.from_buffers(
+                    arrow_type,
+                    len(column),
+                    [pyarrow.py_buffer(column.validity), pyarrow.py_buffer(column.values)],
+                    null_count=column.null_count,
+                )
+            elif column.type == "object":
+                try:
+                    arrays[name] = pyarrow.array(column.values)
+                except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, OverflowError):
+                    arrays[name] = pyarrow.array(
+                        [None if value is None else str(value) for value in column.values],
+                        pyarrow.string(),
+                    )
+            else:
+                arrays[name] = pyarrow.array(column.values)
+        return pyarrow.table(arrays)
+
+
+def _fits_int64(values: list[Any]) -> bool:
+    non_null: list[int] = [value for value in values if value is not None]
+    return _INT64_MIN <= min(non_null) and max(non_null) <= _INT64_MAX
+
+
+def _fill_nulls(values: list[Any], fill_value: Any, null_count: int) -> list[Any]:
+    if not null_count:
+        return values
+    return [fill_value if value is None else value for value in values]
@@ -0,0 +1,221 @@
+"""
+Readers used to analyze remote files with :func:`pymediainfo.MediaInfo.parse`.
+"""
+
+from __future__ import annotations
+
+import collections
+import http.client
+import io
+import re
+import urllib.error
+import urllib.request
+from typing import Any
+
+_CONTENT_RANGE_REGEX = re.compile(r"bytes (?:\d+-\d+|\*)/(\d+)")
+
+
+class HTTPRangeReader(io.RawIOBase):
+    # pylint: disable=too-many-instance-attributes
+    """
+    A seekable, read-only file-like object that reads a file from an HTTP server
+    using range requests.
+
+    It can be passed to :func:`pymediainfo.MediaInfo.parse` to analyze a remote file
+    without downloading it entirely, even if libmediainfo was compiled without CURL support.
+    The file is split into blocks which are kept in an LRU cache, so that the parts read
+    several times by the library, such as the beginning and the end of the file, are
+    only downloaded once. Consecutive missing blocks are downloaded in a single request,
+    which also includes the `prefetch_blocks` blocks that follow them.
+
+    >>> from pymediainfo.remote import HTTPRangeReader
+    >>> with HTTPRangeReader("https://example.com/file.mp4") as reader:
+    ...     mi = pymediainfo.MediaInfo.parse(reader)
+    ...     reader.stats
+    {'requests': 2, 'bytes_downloaded': 1572864, 'hits': 3, 'misses': 6}
+
+    The first blocks of the file are downloaded when the reader is created in order
+    to find the size of the file.
+
+    :param str url: the URL of the file.
+    :param int block_size: size of the blocks that are downloaded and cached, in bytes.
+    :param int cache_blocks: maximum number of blocks kept in the cache.
+    :param int prefetch_blocks: number of blocks downloaded after the ones that were requested.
+    :param dict headers: additional headers sent with each request.
+    :param float timeout: timeout of each request, in seconds.
+    :raises ValueError: if sizes are not positive or if `cache_blocks` is too small to hold
+        the blocks of a request.
+    :raises OSError: if the file cannot be downloaded, if the server does not
+        support range requests or if it returns less data than requested.
+    """
+
+    mode = "rb"
+
+    def __init__(
+        # pylint: disable=too-many-arguments
+        self,
+        url: str,
+        *,
+        block_size: int = 256 * 1024,
+        cache_blocks: int = 64,
+        prefetch_blocks: int = 3,
+        headers: dict[str, str] | None = None,
+        timeout: float | None = None,
+    ) -> None:
+        super().__init__()
+        if block_size <= 0 or prefetch_blocks < 0 or cache_blocks <= prefetch_blocks:
+            raise ValueError(
+                "block_size should be positive and cache_blocks greater than prefetch_blocks"
+            )
+        self.url = url
+        self._block_size = block_size
+        self._cache_blocks = cache_blocks
+        self._prefetch_blocks = prefetch_blocks
+        self._headers = headers or {}
+        self._timeout = timeout
+        self._cache: collections.OrderedDict[int, bytes] = collections.OrderedDict()
+        self._position = 0
+        self._stats = {"requests": 0, "bytes_downloaded": 0, "hits": 0, "misses": 0}
+        self._size = 0
+        self._size = self._fetch(0, prefetch_blocks)
+
+    @property
+    def size(self) -> int:
+        """
+        Size of the remote file, in bytes.
+
+        :rtype: int
+        """
+        return self._size
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        Counters describing the reader's activity:
+
+        * ``requests``: number of HTTP requests sent
+        * ``bytes_downloaded``: number of bytes received
+        * ``hits``: number of blocks read from the cache
+        * ``misses``: number of blocks that had to be downloaded
+
+        :rtype: dict
+        """
+        return dict(self._stats)
+
+    def _fetch(self, first_block: int, last_block: int) -> int:
+        # Downloads blocks from first_block to last_block, adds them to the cache
+        # and returns the size of the file
+        start = first_block * self._block_size
+        end = (last_block + 1) * self._block_size - 1
+        if self._size:
+            end = min(end, self._size - 1)
+        request = urllib.request.Request(
+            self.url, headers={**self._headers, "Range": f"bytes={start}-{end}"}
+        )
+        self._stats["requests"] += 1
+        try:
+            with urllib.request.urlopen(request, timeout=self._timeout) as response:
+                if response.status != 206:
+                    raise OSError(f"{self.url} does not support range requests")
+                match = _CONTENT_RANGE_REGEX.fullmatch(response.headers.get("Content-Range", ""))
+                if match is None:
+                    raise OSError(f"Invalid Content-Range header for {self.url}")
+                data = response.read()
+        except urllib.error.HTTPError as error:
+            # Returned when reading an empty file
+            if error.code == 416:
+                return 0
+            raise
+        except http.client.IncompleteRead:
+            raise OSError(f"Truncated response from {self.url}") from None
+        size = int(match.group(1))
+        # The blocks that were requested must all be cached once this returns
+        if len(data) < min(end, size - 1) - start + 1:
+            raise OSError(f"Truncated response from {self.url}")
+        self._stats["bytes_downloaded"] += len(data)
+        block_size = self._block_size
+        for block, offset in enumerate(range(0, len(data), block_size), first_block):
+            block_end = offset + block_size
+            self._add_block(block, data[offset:block_end])
+        return size
+
+    def _add_block(self, block: int, data: bytes) -> None:
+        self._cache[block] = data
+        self._cache.move_to_end(block)
+        while len(self._cache) > self._cache_blocks:
+            self._cache.popitem(last=False)
+
+    def _get_blocks(self, first_block: int, last_block: int) -> list[bytes]:
+        cache, stats = self._cache, self._stats
+        last_file_block = (self._size - 1) // self._block_size
+        blocks: list[bytes] = []
+        block = first_block
+        while block <= last_block:
+            data = cache.get(block)
+            if data is not None:
+                stats["hits"] += 1
+                cache.move_to_end(block)
+                blocks.append(data)
+                block += 1
+                continue
+            # Download this block and the following missing ones along with the
+            # prefetched blocks, without exceeding the size of the cache
+            run_end = block
+            while run_end < last_block and run_end + 1 not in cache:
+                run_end += 1
+            run_end = min(run_end, block + self._cache_blocks - self._prefetch_blocks - 1)
+            stats["misses"] += run_end - block + 1
+            self._fetch(block, min(run_end + self._prefetch_blocks, last_file_block))
+            blocks.extend(cache[missing] for missing in range(block, run_end + 1))
+            block = run_end + 1
+        return blocks
+
+    def close(self) -> None:
+        self._cache.clear()
+        super().close()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        if self.closed:
+            raise ValueError("I/O operation on closed file")
+        with memoryview(buffer) as view, view.cast("B") as output:
+            length = max(min(len(output), self._size - self._position), 0)
+            if not length:
+                return 0
+            start = self._position
+            end = start + length
+            first_block = start // self._block_size
+            written = 0
+            for data in self._get_blocks(first_block, (end - 1) // self._block_size):
+                block_start = first_block * self._block_size
+                chunk_start = max(start - block_start, 0)
+                chunk_end = end - block_start
+                chunk = data[chunk_start:chunk_end]
+                next_written = written + len(chunk)
+                output[written:next_written] = chunk
+                written = next_written
+                first_block += 1
+            self._position = end
+            return written
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if self.closed:
+            raise ValueError("I/O operation on closed file")
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        elif whence != io.SEEK_SET:
+            raise ValueError(f"Invalid whence ({whence})")
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self._position = offset
+        return offset
+
+    def tell(self) -> int:
+        return self._position
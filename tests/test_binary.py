@@ -0,0 +1,85 @@
+# pylint: disable=missing-module-docstring, missing-class-docstring, missing-function-docstring,
+
+import marshal
+import math
+import os
+import unittest
+from typing import Any
+
+from utils import data_dir
+
+from pymediainfo import MediaInfo
+
+
+class MediaInfoBytesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.mi = MediaInfo.parse(os.path.join(data_dir, "sample.mp4"))
+
+    def test_round_trip(self) -> None:
+        data = self.mi.to_bytes()
+        self.assertLess(len(data), len(self.mi.to_json().encode()))
+        media_info = MediaInfo.from_bytes(data)
+        self.assertEqual(media_info, self.mi)
+        self.assertEqual(MediaInfo.from_bytes(bytearray(data)), self.mi)
+        self.assertEqual(MediaInfo.from_bytes(memoryview(data)), self.mi)
+        self.assertEqual(MediaInfo.from_bytes(MediaInfo("<File></File>").to_bytes()).tracks, [])
+        # Lists are not shared between tracks
+        media_info.tracks[1].other_width.append("modified")
+        self.assertEqual(MediaInfo.from_bytes(data), self.mi)
+
+    def test_lazy(self) -> None:
+        lazy_mi = MediaInfo.parse(os.path.join(data_dir, "sample.mp4"), lazy=True)
+        self.assertEqual(lazy_mi.to_bytes(), self.mi.to_bytes())
+
+    def test_names_are_shared(self) -> None:
+        data = self.mi.to_bytes()
+        first, second = (list(MediaInfo.from_bytes(data).tracks[0].to_data()) for _ in range(2))
+        for first_name, second_name in zip(first, second):
+            self.assertIs(first_name, second_name)
+
+    def test_value_types(self) -> None:
+        track = self.mi.tracks[0]
+        values: dict[str, Any] = {
+            "none": None,
+            "true": True,
+            "false": False,
+            "one": 1,
+            "float": 1.0,
+            "negative": -(2**63),
+            "big_int": 2**64,
+            "empty": "",
+            "unicode": "accentué \udcff\0",
+            "list": [1, True, 1.0, None, "", 2**64, []],
+        }
+        for name, value in values.items():
+            setattr(track, name, value)
+        loaded_track = MediaInfo.from_bytes(self.mi.to_bytes()).tracks[0]
+        for name, value in values.items():
+            self.assertEqual(getattr(loaded_track, name), value)
+            self.assertEqual(repr(getattr(loaded_track, name)), repr(value))
+        # Equal values of different types or representations are not merged
+        for name, value in {"zero": 0.0, "negative_zero": -0.0, "int_zero": 0, "no": False}.items():
+            setattr(track, name, value)
+        loaded_track = MediaInfo.from_bytes(self.mi.to_bytes()).tracks[0]
+        self.assertEqual(repr(loaded_track.zero), "0.0")
+        self.assertEqual(repr(loaded_track.negative_zero), "-0.0")
+        self.assertEqual(repr(loaded_track.int_zero), "0")
+        self.assertIs(loaded_track.no, False)
+        setattr(track, "nan", math.nan)
+        self.assertTrue(math.isnan(MediaInfo.from_bytes(self.mi.to_bytes()).tracks[0].nan))
+        setattr(track, "object", object())
+        self.assertRaises(TypeError, self.mi.to_bytes)
+
+    def test_invalid_data(self) -> None:
+        data = self.mi.to_bytes()
+        for invalid_data in (b"", b"invalid" * 10, data[:-1], data + b"\0", data[:4] + data[5:]):
+            self.assertRaisesRegex(ValueError, "Invalid data", MediaInfo.from_bytes, invalid_data)
+        self.assertRaisesRegex(
+            ValueError, "Unsupported version", MediaInfo.from_bytes, data[:3] + b"\xff" + data[4:]
+        )
+        # Data serialized by marshal must contain the attributes of tracks
+        values: list[Any] = [{"tracks": []}, [{}], [None]]
+        for value in values:
+            payload = marshal.dumps(value)
+            invalid_data = data[:4] + len(payload).to_bytes(8, "little") + payload
+            self.assertRaisesRegex(ValueError, "Invalid data", MediaInfo.from_bytes, invalid_data)
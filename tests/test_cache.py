@@ -0,0 +1,174 @@
+# pylint: disable=missing-module-docstring, missing-class-docstring, missing-function-docstring,
+
+import concurrent.futures
+import os
+import tempfile
+import unittest
+
+from utils import data_dir
+
+from pymediainfo import MediaInfo
+from pymediainfo.cache import DiskCache, MemoryCache
+
+
+class DiskCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.database = os.path.join(self.directory.name, "cache.sqlite")
+        self.path = os.path.join(self.directory.name, "sample.mp4")
+        with open(os.path.join(data_dir, "sample.mp4"), "rb") as source:
+            with open(self.path, "wb") as destination:
+                destination.write(source.read())
+        self.cache = DiskCache(self.database)
+
+    def tearDown(self) -> None:
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_hits(self) -> None:
+        media_info = MediaInfo.parse(self.path, cache=self.cache)
+        self.assertEqual(MediaInfo.parse(self.path, cache=self.cache), media_info)
+        self.assertEqual(self.cache.parse(self.path, parse_speed=0.5), media_info)
+        self.assertEqual(self.cache.stats["hits"], 2)
+        self.assertEqual(self.cache.stats["misses"], 1)
+        self.assertEqual(self.cache.stats["entries"], 1)
+        # Results are persistent
+        with DiskCache(self.database) as cache:
+            self.assertEqual(cache.parse(self.path), media_info)
+            self.assertEqual(cache.stats["hits"], 1)
+
+    def test_key(self) -> None:
+        self.cache.parse(self.path)
+        self.cache.parse(self.path, parse_speed=0.1)
+        output = self.cache.parse(self.path, output="")
+        self.assertEqual(self.cache.parse(self.path, output=""), output)
+        self.assertEqual(self.cache.stats["misses"], 3)
+        with open(self.path, "ab") as f:
+            f.write(b"\0")
+        self.cache.parse(self.path)
+        self.assertEqual(self.cache.stats["misses"], 4)
+
+    def test_key_fields(self) -> None:
+        # Iterators of names are only consumed once
+        media_info = MediaInfo.parse(
+            self.path, cache=self.cache, fields=(name for name in ["width", "duration"])
+        )
+        self.assertIsNotNone(media_info.video_tracks[0].width)
+        cached = MediaInfo.parse(self.path, cache=self.cache, fields=["duration", "width"])
+        self.assertEqual(cached, media_info)
+        self.assertEqual(self.cache.stats["hits"], 1)
+        self.cache.parse(self.path, fields={"Video": iter(["width"])})
+        result = self.cache.parse(self.path, fields={"Video": ["width"]})
+        assert isinstance(result, MediaInfo)
+        self.assertEqual(result.video_tracks[0].width, 1920)
+        self.assertEqual(self.cache.stats["hits"], 2)
+
+    def test_bypass(self) -> None:
+        with open(self.path, "rb") as f:
+            self.cache.parse(f)
+            self.cache.parse(f.read())
+        self.assertRaises(FileNotFoundError, self.cache.parse, self.path + ".missing")
+        self.assertEqual(self.cache.stats["bypasses"], 3)
+        self.assertRaises(TypeError, self.cache.parse, self.path, unknown=True)
+
+    def test_hash_contents(self) -> None:
+        with open(self.path, "rb") as f:
+            data = f.read()
+        copy = os.path.join(self.directory.name, "copy.mp4")
+        with open(copy, "wb") as f:
+            f.write(data)
+        with DiskCache(self.database, hash_contents=True) as cache:
+            for _ in range(2):
+                self.assertEqual(cache.parse(self.path), MediaInfo.parse(self.path))
+                self.assertEqual(cache.parse(data), MediaInfo.parse(data))
+                # Results contain the name of the file, they are not shared with its copies
+                media_info = cache.parse(copy)
+                assert isinstance(media_info, MediaInfo)
+                self.assertEqual(media_info.general_tracks[0].complete_name, copy)
+            self.assertEqual(cache.stats["hits"], 3)
+
+    def test_eviction(self) -> None:
+        self.cache.parse(self.path, output="")
+        size = self.cache.stats["size"]
+        with DiskCache(self.database, max_size=int(2.5 * size)) as cache:
+            for parse_speed in (0.1, 0.2, 0.3, 0.4):
+                cache.parse(self.path, output="", parse_speed=parse_speed)
+            self.assertEqual(cache.stats["evictions"], 3)
+            self.assertEqual(cache.stats["entries"], 2)
+            cache.clear()
+            self.assertEqual(cache.stats["entries"], 0)
+            self.assertEqual(cache.stats["size"], 0)
+
+    def test_eviction_order(self) -> None:
+        self.cache.parse(self.path, output="")
+        size = self.cache.stats["size"]
+        self.cache.clear()
+        with DiskCache(self.database, max_size=int(2.5 * size)) as cache:
+            cache.parse(self.path, output="", parse_speed=0.1)
+            cache.parse(self.path, output="", parse_speed=0.2)
+            # The access time of this hit is written before evicting results
+            cache.parse(self.path, output="", parse_speed=0.1)
+            cache.parse(self.path, output="", parse_speed=0.3)
+            cache.parse(self.path, output="", parse_speed=0.1)
+            self.assertEqual(cache.stats["hits"], 2)
+            self.assertEqual(cache.stats["evictions"], 1)
+            self.assertEqual(cache.stats["size"], 2 * size)
+        with DiskCache(self.database) as cache:
+            self.assertEqual(cache.stats["size"], 2 * size)
+
+
+class MemoryCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.path = os.path.join(data_dir, "sample.mp4")
+
+    def test_hits(self) -> None:
+        cache = MemoryCache()
+        media_info = MediaInfo.parse(self.path, cache=cache)
+        cached = MediaInfo.parse(self.path, cache=cache)
+        self.assertEqual(cached, media_info)
+        self.assertEqual(cache.stats["hits"], 1)
+        self.assertEqual(cache.stats["misses"], 1)
+        self.assertEqual(cache.stats["entries"], 1)
+        # Modifying results does not affect the cache
+        cached.video_tracks[0].other_width.append("modified")
+        setattr(cached.video_tracks[0], "width", 0)
+        cached.tracks.pop()
+        self.assertEqual(MediaInfo.parse(self.path, cache=cache), media_info)
+        output = cache.parse(self.path, output="")
+        self.assertEqual(cache.parse(self.path, output=""), output)
+        self.assertEqual(cache.stats["hits"], 3)
+
+    def test_ttl(self) -> None:
+        cache = MemoryCache(ttl=0)
+        cache.parse(self.path)
+        cache.parse(self.path)
+        self.assertEqual(cache.stats["misses"], 2)
+        self.assertEqual(cache.stats["expirations"], 1)
+
+    def test_eviction(self) -> None:
+        cache = MemoryCache(max_entries=2)
+        for parse_speed in (0.1, 0.2, 0.3):
+            cache.parse(self.path, output="", parse_speed=parse_speed)
+        self.assertEqual(cache.stats["evictions"], 1)
+        cache.parse(self.path, output="", parse_speed=0.1)
+        self.assertEqual(cache.stats["misses"], 4)
+        size = cache.stats["size"] // 2
+        cache = MemoryCache(max_bytes=int(2.5 * size))
+        for parse_speed in (0.1, 0.2, 0.3, 0.4):
+            cache.parse(self.path, output="", parse_speed=parse_speed)
+        self.assertEqual(cache.stats["evictions"], 2)
+        self.assertEqual(cache.stats["entries"], 2)
+        cache.clear()
+        self.assertEqual(cache.stats["entries"], 0)
+        self.assertEqual(cache.stats["size"], 0)
+
+    def test_threads(self) -> None:
+        cache = MemoryCache(max_entries=2)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(
+                executor.map(lambda i: cache.parse(self.path, parse_speed=(i % 3) / 10), range(24))
+            )
+        for i, result in enumerate(results):
+            self.assertEqual(result, results[i % 3])
+        self.assertEqual(cache.stats["hits"] + cache.stats["misses"], 24)
+        self.assertEqual(cache.stats["entries"], 2)
@@ -0,0 +1,99 @@
+# pylint: disable=missing-module-docstring, missing-class-docstring, missing-function-docstring,
+
+import os
+import unittest
+
+import pytest
+from utils import data_dir
+
+from pymediainfo import MediaInfo
+from pymediainfo.columns import ColumnCollector
+
+
+class ColumnCollectorTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.media_infos = [
+            MediaInfo.parse(os.path.join(data_dir, filename))
+            for filename in ("sample.mp4", "sample.mkv", "vbr_requires_parsespeed_1.mp4")
+        ]
+        self.collector = ColumnCollector()
+        self.collector.extend(self.media_infos)
+
+    def test_tables(self) -> None:
+        self.assertEqual(len(self.collector), 3)
+        self.assertEqual(self.collector.track_types, ["General", "Video", "Audio", "Text", "Menu"])
+        self.assertEqual(self.collector.columns("Image"), {})
+        columns = self.collector.columns("Audio")
+        self.assertEqual(columns["file_index"].to_pylist(), [0, 2, 2])
+        tracks = [track for mi in self.media_infos for track in mi.audio_tracks]
+        for name, column in columns.items():
+            if name != "file_index":
+                self.assertEqual(column.to_pylist(), [getattr(t, name) for t in tracks])
+
+    def test_types(self) -> None:
+        columns = self.collector.columns("General")
+        self.assertEqual(columns["file_size"].type, "int64")
+        self.assertEqual(columns["file_size"].values.typecode, "q")  # type: ignore[union-attr]
+        self.assertEqual(columns["format"].type, "string")
+        self.assertEqual(columns["other_file_size"].type, "list")
+        # Values that don't fit in 64 bits
+        self.assertEqual(columns["unique_id"].type, "object")
+        setattr(self.media_infos[1].tracks[0], "file_size", 1.5)
+        setattr(self.media_infos[2].tracks[0], "format", 0)
+        collector = ColumnCollector()
+        collector.extend(self.media_infos)
+        columns = collector.columns("General")
+        self.assertEqual(columns["file_size"].type, "float64")
+        self.assertEqual(columns["format"].type, "object")
+
+    def test_typed(self) -> None:
+        collector = ColumnCollector()
+        for filename in ("sample.mp4", "sample.mkv", "vbr_requires_parsespeed_1.mp4"):
+            collector.add(MediaInfo.parse(os.path.join(data_dir, filename), typed=True))
+        column = collector.columns("Audio")["default"]
+        self.assertEqual(column.type, "bool")
+        self.assertEqual(column.to_pylist(), [None, True, False])
+
+    def test_nulls(self) -> None:
+        column = self.collector.columns("General")["writing_library"]
+        self.assertEqual(column.to_pylist(), [None, "libebml v1.3.10 + libmatroska v1.5.2", None])
+        self.assertEqual(column.null_count, 2)
+        self.assertEqual(column.validity, bytearray(b"\x02"))
+        column = self.collector.columns("General")["file_size"]
+        self.assertEqual(column.null_count, 0)
+        self.assertEqual(column.validity, bytearray(b"\x07"))
+        column = self.collector.columns("General")["overall_bit_rate"]
+        self.assertEqual(column.to_pylist(), [3302588, None, 70707])
+        self.assertEqual(column.values.tolist(), [3302588, 0, 70707])  # type: ignore[union-attr]
+        # Columns don't change when more objects are added
+        self.collector.add(self.media_infos[0])
+        self.assertEqual(len(column), 3)
+        self.assertEqual(len(self.collector.columns("General")["file_size"]), 4)
+
+    def test_to_pydict(self) -> None:
+        data = self.collector.to_pydict("Video")
+        self.assertEqual(data["width"], [1920])
+        self.assertEqual(data["file_index"], [0])
+
+    def test_to_arrow(self) -> None:
+        pytest.importorskip("pyarrow")
+        table = self.collector.to_arrow("General")
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(
+            table.column("file_size").to_pylist(),
+            [mi.tracks[0].file_size for mi in self.media_infos],
+        )
+        self.assertEqual(table.column("writing_library").null_count, 2)
+        # Converted to strings since they don't fit in 64 bits
+        self.assertEqual(
+            table.column("unique_id").to_pylist(),
+            [
+                None if mi.tracks[0].unique_id is None else str(mi.tracks[0].unique_id)
+                for mi in self.media_infos
+            ],
+        )
+        collector = ColumnCollector()
+        collector.add(MediaInfo.parse(os.path.join(data_dir, "sample.mkv"), typed=True))
+        table = collector.to_arrow("Text")
+        self.assertEqual(str(table.schema.field("forced").type), "bool")
+        self.assertEqual(table.column("forced").to_pylist(), [False])
@@ -0,0 +1,276 @@
+# pylint: disable=missing-module-docstring, missing-class-docstring, missing-function-docstring,
+# pylint: disable=protected-access
+
+import io
+import os
+import pathlib
+import tempfile
+import threading
+import unittest
+from typing import Any
+
+from utils import data_dir
+
+import pymediainfo
+from pymediainfo import MediaInfo, MediaInfoParser, MediaInfoParserPool
+from pymediainfo.cache import MemoryCache
+
+
+class MediaInfoLimitsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.path = os.path.join(data_dir, "sample.mp4")
+        self.expected = MediaInfo.parse(self.path)
+
+    def test_max_bytes(self) -> None:
+        with MediaInfoParser(max_bytes=50000, buffer_size=16 * 1024) as parser:
+            with open(self.path, "rb") as f:
+                media_info = parser.parse(f)
+            stats = parser.stats
+        assert isinstance(media_info, MediaInfo)
+        self.assertTrue(media_info.partial)
+        self.assertEqual(stats["bytes_read"], 50000)
+        self.assertEqual(stats["partial"], 1)
+        # The headers at the beginning of the file are enough to find the tracks
+        self.assertEqual(len(media_info.tracks), 3)
+        media_info = MediaInfo.parse(self.path, max_bytes=1000)
+        self.assertTrue(media_info.partial)
+        self.assertEqual(media_info.general_tracks[0].complete_name, self.path)
+
+    def test_complete(self) -> None:
+        # Paths are then read by pymediainfo
+        media_info = MediaInfo.parse(self.path, max_bytes=10**7, max_time=60)
+        self.assertFalse(media_info.partial)
+        self.assertEqual(media_info, self.expected)
+        self.assertFalse(self.expected.partial)
+
+    def test_max_time(self) -> None:
+        media_info = MediaInfo.parse(self.path, max_time=0)
+        self.assertTrue(media_info.partial)
+        self.assertEqual([track.track_type for track in media_info.tracks], ["General"])
+
+    def test_cancel_event(self) -> None:
+        cancel_event = threading.Event()
+
+        class CancellingReader(io.BytesIO):
+            def readinto(self, buffer: Any) -> int:
+                # The analysis is cancelled while the first chunk is being read
+                cancel_event.set()
+                return super().readinto(buffer)
+
+        with open(self.path, "rb") as f:
+            reader = CancellingReader(f.read())
+        with MediaInfoParser(cancel_event=cancel_event) as parser:
+            media_info = parser.parse(reader)
+            self.assertEqual(parser.stats["iterations"], 1)
+        assert isinstance(media_info, MediaInfo)
+        self.assertTrue(media_info.partial)
+        cancel_event.clear()
+        self.assertFalse(MediaInfo.parse(self.path, cancel_event=cancel_event).partial)
+
+    def test_pool(self) -> None:
+        with MediaInfoParserPool(max_parsers=2) as pool:
+            for _ in range(5):
+                self.assertEqual(
+                    pool.parse(self.path, cancel_event=threading.Event()), self.expected
+                )
+            media_info = pool.parse(self.path, max_bytes=1000, lazy=True)
+            assert isinstance(media_info, MediaInfo)
+            self.assertTrue(media_info.partial)
+            # Limits are not retained by the parsers of the pool
+            self.assertEqual(pool.parse(self.path), self.expected)
+            stats = pool.stats
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(stats["hits"], 6)
+
+    def test_directory(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertRaises(RuntimeError, MediaInfo.parse, directory, max_bytes=1000)
+
+    def test_cache(self) -> None:
+        cache = MemoryCache()
+        media_info = cache.parse(self.path, max_bytes=1000)
+        assert isinstance(media_info, MediaInfo)
+        self.assertTrue(media_info.partial)
+        self.assertEqual(cache.stats["entries"], 0)
+        media_info = cache.parse(self.path, max_bytes=10**7)
+        assert isinstance(media_info, MediaInfo)
+        self.assertFalse(media_info.partial)
+        self.assertEqual(cache.parse(self.path), self.expected)
+        self.assertEqual(cache.stats["hits"], 1)
+        self.assertEqual(
+            cache.parse(self.path, output="", max_time=0),
+            MediaInfo.parse(self.path, output="", max_time=0),
+        )
+        self.assertEqual(cache.stats["entries"], 1)
+
+
+class MediaInfoProbeTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.path = os.path.join(data_dir, "sample.mp4")
+
+    def test_probe(self) -> None:
+        result = MediaInfo.probe(self.path)
+        self.assertEqual(result.container, "MPEG-4")
+        self.assertEqual(result.duration, 980)
+        self.assertEqual(result.track_counts, {"Video": 1, "Audio": 1})
+        self.assertEqual(result.codecs, {"Video": ["AVC"], "Audio": ["AAC"]})
+        self.assertEqual((result.width, result.height), (1920, 1080))
+        self.assertFalse(result.partial)
+        with open(self.path, "rb") as f:
+            self.assertEqual(MediaInfo.probe(f), result)
+            f.seek(0)
+            self.assertEqual(MediaInfo.probe(f.read(), max_bytes=None), result)
+        self.assertEqual(MediaInfo.probe(pathlib.Path(self.path), max_bytes=10**6), result)
+        self.assertEqual(
+            repr(result),
+            "<ProbeResult container='MPEG-4', duration=980, "
+            "track_counts={'Video': 1, 'Audio': 1}>",
+        )
+
+    def test_other_files(self) -> None:
+        result = MediaInfo.probe(os.path.join(data_dir, "sample_with_cover.mp3"))
+        self.assertEqual(result.track_counts, {"Audio": 1, "Image": 1})
+        self.assertEqual((result.width, result.height), (1, 1))
+        result = MediaInfo.probe(os.path.join(data_dir, "sample.mkv"))
+        self.assertEqual(result.container, "Matroska")
+        self.assertEqual(result.codecs, {"Text": ["UTF-8"]})
+        self.assertIsNone(result.width)
+        result = MediaInfo.probe(b"")
+        self.assertIsNone(result.container)
+        self.assertEqual(result.track_counts, {})
+
+    def test_max_bytes(self) -> None:
+        result = MediaInfo.probe(self.path, max_bytes=1000)
+        self.assertTrue(result.partial)
+        self.assertEqual(result.container, "MPEG-4")
+        self.assertNotEqual(result, MediaInfo.probe(self.path))
+
+    def test_errors(self) -> None:
+        self.assertRaises(FileNotFoundError, MediaInfo.probe, os.path.join(data_dir, "none"))
+
+
+class MediaInfoEscalateTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.path = os.path.join(data_dir, "aac_he_v2.aac")
+
+    def test_fields(self) -> None:
+        with MediaInfoParser(parse_speed=0, escalate={"Audio": ["frame_count"]}) as parser:
+            # frame_count is only available with higher parse speeds
+            self.assertEqual(parser.parse(self.path), MediaInfo.parse(self.path, parse_speed=1))
+            self.assertEqual(parser.stats["escalations"], 1)
+            mp4_path = os.path.join(data_dir, "sample.mp4")
+            self.assertEqual(parser.parse(mp4_path), MediaInfo.parse(mp4_path, parse_speed=0))
+            self.assertEqual(parser.stats["escalations"], 1)
+            self.assertEqual(parser.stats["files"], 3)
+        media_info = MediaInfo.parse(
+            self.path, parse_speed=0, escalate=["frame_count"], fields=["frame_count"]
+        )
+        self.assertEqual(media_info.audio_tracks[0].frame_count, "26")
+
+    def test_track_types(self) -> None:
+        with MediaInfoParser(parse_speed=0, escalate=["duration"]) as parser:
+            # The Image track of the cover has no duration
+            parser.parse(os.path.join(data_dir, "sample_with_cover.mp3"))
+            self.assertEqual(parser.stats["escalations"], 0)
+            parser.parse(self.path)
+            self.assertEqual(parser.stats["escalations"], 1)
+
+    def test_function(self) -> None:
+        path = os.path.join(data_dir, "vbr_requires_parsespeed_1.mp4")
+        media_info = MediaInfo.parse(
+            path,
+            parse_speed=0,
+            escalate=lambda mi: any(track.nominal_bit_rate is None for track in mi.audio_tracks),
+        )
+        self.assertEqual(media_info.tracks[2].stream_size, "3353 / 45")
+        cache = MemoryCache()
+        cache.parse(path, escalate=lambda mi: True)
+        self.assertEqual(cache.stats["bypasses"], 1)
+
+    def test_file(self) -> None:
+        class CountingReader(io.BytesIO):
+            reads = 0
+
+            def readinto(self, buffer: Any) -> int:
+                self.reads += 1
+                return super().readinto(buffer)
+
+            def read(self, size: "int | None" = -1) -> bytes:
+                self.reads += 1
+                return super().read(size)
+
+        with open(self.path, "rb") as f:
+            data = f.read()
+        expected = MediaInfo.parse(io.BytesIO(data), parse_speed=1)
+        for buffer_size in (1024, 64 * 1024):
+            single_pass = CountingReader(data)
+            MediaInfo.parse(single_pass, parse_speed=1, buffer_size=buffer_size)
+            two_passes = CountingReader(data)
+            media_info = MediaInfo.parse(
+                two_passes, parse_speed=0, escalate=lambda mi: True, buffer_size=buffer_size
+            )
+            self.assertEqual(media_info, expected)
+            # The data read during the first pass is reused
+            self.assertLessEqual(two_passes.reads, single_pass.reads)
+
+    def test_replay_reader(self) -> None:
+        data = bytes(range(256)) * 4
+        file = io.BytesIO(data)
+        reader = pymediainfo._files._ReplayReader(file)
+        self.assertEqual(reader.read(100), data[:100])
+        reader.seek(300)
+        self.assertEqual(reader.read(100), data[300:400])
+        # Reads inside known chunks do not access the file
+        file.close()
+        reader.seek(50)
+        self.assertEqual(reader.read(20), data[50:70])
+        reader.seek(350)
+        self.assertEqual(reader.read(50), data[350:400])
+        buffer = bytearray(30)
+        reader.seek(60)
+        self.assertEqual(reader.readinto(buffer), 30)
+        self.assertEqual(buffer, data[60:90])
+
+    def test_replay_reader_max_size(self) -> None:
+        data = bytes(range(256)) * 4
+        file = io.BytesIO(data)
+        reader = pymediainfo._files._ReplayReader(file, max_size=150)
+        buffer = bytearray(100)
+        self.assertEqual(reader.readinto(buffer), 100)
+        self.assertEqual(buffer, data[:100])
+        # Not kept, this would exceed max_size
+        reader.seek(300)
+        self.assertEqual(reader.readinto(buffer), 100)
+        self.assertEqual(buffer, data[300:400])
+        self.assertEqual(reader.read(40), data[400:440])
+        file.seek(0)
+        file.write(bytes(len(data)))
+        reader.seek(0)
+        self.assertEqual(reader.read(100), data[:100])
+        reader.seek(400)
+        self.assertEqual(reader.read(40), data[400:440])
+        reader.seek(300)
+        self.assertEqual(reader.read(100), bytes(100))
+
+    def test_profile(self) -> None:
+        with pymediainfo.profile() as profiles:
+            MediaInfo.parse(self.path, parse_speed=0, escalate={"Audio": ["frame_count"]})
+        # Both analyses are described by a single profile
+        self.assertEqual(len(profiles), 1)
+        with open(self.path, "rb") as f:
+            with pymediainfo.profile() as profiles:
+                MediaInfo.parse(f, parse_speed=0, escalate=lambda mi: True)
+            self.assertEqual(len(profiles), 1)
+            self.assertGreater(profiles[0].bytes_fed, os.path.getsize(self.path))
+
+    def test_errors(self) -> None:
+        self.assertRaises(
+            ValueError, MediaInfo.parse, self.path, escalate=["frame_count"], output=""
+        )
+        self.assertRaises(
+            ValueError,
+            MediaInfo.parse,
+            self.path,
+            escalate={"Audio": ["frame_count"]},
+            fields={"Audio": ["duration"]},
+        )
@@ -0,0 +1,498 @@
+# pylint: disable=missing-module-docstring, missing-class-docstring, missing-function-docstring,
+# pylint: disable=protected-access
+
+import asyncio
+import concurrent.futures
+import gzip
+import io
+import mmap
+import os
+import pathlib
+import tempfile
+import threading
+import unittest
+from typing import Any
+
+import pytest
+from utils import data_dir, skip_if_not_thread_safe, test_media_files
+
+import pymediainfo
+from pymediainfo import AdaptiveBufferSize, MediaInfo, MediaInfoParser, MediaInfoParserPool
+from pymediainfo.cache import MemoryCache
+
+
+class MediaInfoParserTest(unittest.TestCase):
+    def test_parse_several_files(self) -> None:
+        with MediaInfoParser() as parser:
+            for test_file in test_media_files:
+                filename = os.path.join(data_dir, test_file)
+                self.assertEqual(parser.parse(filename), MediaInfo.parse(filename))
+            with open(os.path.join(data_dir, "sample.mp4"), "rb") as f:
+                media_info = parser.parse(f)
+            assert isinstance(media_info, MediaInfo)
+            self.assertEqual(len(media_info.tracks), 3)
+
+    def test_options_are_restored(self) -> None:
+        with MediaInfoParser(full=False) as parser:
+            filename = os.path.join(data_dir, "sample.mp4")
+            MediaInfo.parse(filename)
+            media_info = parser.parse(filename)
+            assert isinstance(media_info, MediaInfo)
+            self.assertEqual(media_info.tracks[0].footersize, None)
+
+    def test_custom_output(self) -> None:
+        with MediaInfoParser(output="General;%FileSize%") as parser:
+            self.assertEqual(parser.parse(os.path.join(data_dir, "sample.mp4")), "404567")
+
+    def test_non_existent_file(self) -> None:
+        with MediaInfoParser() as parser:
+            self.assertRaises(
+                FileNotFoundError, parser.parse, os.path.join(data_dir, "does not exist")
+            )
+            # The parser can still be used after a failure
+            self.assertIn("<track", parser.inform(os.path.join(data_dir, "sample.mp4")))
+
+    def test_closed_parser(self) -> None:
+        parser = MediaInfoParser()
+        parser.close()
+        parser.close()
+        self.assertRaises(ValueError, parser.parse, os.path.join(data_dir, "sample.mp4"))
+
+
+class MediaInfoParserPoolTest(unittest.TestCase):
+    def test_reuses_parsers(self) -> None:
+        filename = os.path.join(data_dir, "sample.mp4")
+        with MediaInfoParserPool(max_parsers=1) as pool:
+            self.assertEqual(pool.parse(filename), MediaInfo.parse(filename))
+            self.assertEqual(pool.parse(filename), MediaInfo.parse(filename))
+            not_full = pool.parse(filename, full=False)
+            assert isinstance(not_full, MediaInfo)
+            self.assertEqual(not_full.tracks[0].footersize, None)
+            stats = pool.stats
+        self.assertEqual(stats["checkouts"], 3)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["created"], 2)
+        self.assertEqual(stats["discarded"], 1)
+        self.assertEqual(stats["size"], 1)
+
+    def test_timeout(self) -> None:
+        with MediaInfoParserPool(max_parsers=1, timeout=0.01) as pool:
+            with pool.checkout():
+                self.assertRaises(TimeoutError, pool.parse, os.path.join(data_dir, "sample.mp4"))
+            self.assertEqual(pool.stats["timeouts"], 1)
+
+    def test_closed_pool(self) -> None:
+        pool = MediaInfoParserPool()
+        pool.close()
+        self.assertRaises(ValueError, pool.parse, os.path.join(data_dir, "sample.mp4"))
+
+
+def test_pool_thread_safety() -> None:
+    skip_if_not_thread_safe()
+    filename = os.path.join(data_dir, "sample.mkv")
+    expected_results = {
+        full: MediaInfo.parse(filename, full=full).to_data() for full in (False, True)
+    }
+    results = []
+    lock = threading.Lock()
+
+    with MediaInfoParserPool(max_parsers=4) as pool:
+
+        def target(full: bool) -> None:
+            result = pool.parse(filename, full=full)
+            assert isinstance(result, MediaInfo)
+            with lock:
+                results.append((full, result.to_data()))
+
+        threads = []
+        for index in range(40):
+            thread = threading.Thread(target=target, args=(index % 2 == 0,))
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        assert pool.stats["created"] <= 4
+    assert len(results) == 40
+    for full, data in results:
+        assert data == expected_results[full]
+
+
+def test_thread_safe_field_names() -> None:
+    # Names of fields are retrieved while other threads analyze files
+    path = os.path.join(data_dir, "sample_with_cover.mp3")
+    expected = MediaInfo.parse(path, fields=["duration"])
+    for _ in range(10):
+        MediaInfo.clear_library_cache()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(
+                executor.map(lambda _: MediaInfo.parse(path, fields=["duration"]), range(8))
+            )
+        assert results == [expected] * 8
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+@pytest.mark.parametrize("ordered", [True, False])
+def test_parse_many(executor: str, ordered: bool) -> None:
+    filenames = [os.path.join(data_dir, test_file) for test_file in test_media_files]
+    filenames.append(os.path.join(data_dir, "this file does not exist"))
+    results = dict(
+        MediaInfo.parse_many(filenames, workers=2, executor=executor, ordered=ordered, full=False)
+    )
+    if ordered:
+        assert list(results) == filenames
+    assert sorted(results) == sorted(filenames)
+    for filename in filenames[:-1]:
+        assert results[filename] == MediaInfo.parse(filename, full=False)
+    assert isinstance(results[filenames[-1]], FileNotFoundError)
+
+
+def test_parse_many_invalid_arguments() -> None:
+    # Arguments are checked when parse_many is called
+    with pytest.raises(ValueError):
+        MediaInfo.parse_many([], executor="invalid")
+    with pytest.raises(ValueError):
+        MediaInfo.parse_many([], workers=0)
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_parse_many_invalid_options(executor: str) -> None:
+    filenames = [os.path.join(data_dir, "sample.mp4")]
+    # Options are checked before starting workers
+    with pytest.raises(TypeError):
+        MediaInfo.parse_many(filenames, executor=executor, invalid=True)
+    with pytest.raises(ValueError):
+        MediaInfo.parse_many(filenames, executor=executor, fields=["width"], output="")
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_parse_many_cache(executor: str) -> None:
+    filenames = [os.path.join(data_dir, test_file) for test_file in test_media_files]
+    cache = MemoryCache()
+    for _ in range(2):
+        results = dict(
+            MediaInfo.parse_many(
+                filenames,
+                workers=2,
+                executor=executor,
+                cache=cache,
+                fields=(name for name in ["duration"]),
+            )
+        )
+        for filename in filenames:
+            assert results[filename] == MediaInfo.parse(filename, fields=["duration"])
+    assert cache.stats["misses"] == len(filenames)
+    assert cache.stats["hits"] == len(filenames)
+
+
+class AsyncBytesIO:
+    def __init__(self, data: bytes) -> None:
+        self._file = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        await asyncio.sleep(0)
+        return self._file.read(size)
+
+    async def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+
+class MediaInfoAsyncTest(unittest.TestCase):
+    def test_aparse(self) -> None:
+        filename = os.path.join(data_dir, "sample.mp4")
+        media_info = asyncio.run(MediaInfo.aparse(filename, full=False))
+        self.assertEqual(media_info, MediaInfo.parse(filename, full=False))
+
+    def test_aparse_cache(self) -> None:
+        filename = os.path.join(data_dir, "sample.mp4")
+        cache = MemoryCache()
+        media_info = asyncio.run(MediaInfo.aparse(filename, cache=cache))
+        self.assertEqual(asyncio.run(MediaInfo.aparse(filename, cache=cache)), media_info)
+        self.assertEqual(cache.stats["hits"], 1)
+
+        async def parse_all() -> list[tuple[Any, Any]]:
+            return [result async for result in MediaInfo.aparse_many([filename] * 2, cache=cache)]
+
+        self.assertEqual(asyncio.run(parse_all()), [(filename, media_info)] * 2)
+        self.assertEqual(cache.stats["hits"], 3)
+
+    def test_aparse_async_file(self) -> None:
+        filename = os.path.join(data_dir, "sample.mkv")
+        with open(filename, "rb") as f:
+            expected = MediaInfo.parse(f)
+            f.seek(0)
+            media_info = asyncio.run(MediaInfo.aparse(AsyncBytesIO(f.read())))
+        self.assertEqual(media_info, expected)
+
+    def test_aparse_timeout(self) -> None:
+        with open(os.path.join(data_dir, "sample.mkv"), "rb") as f:
+            source = AsyncBytesIO(f.read())
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(MediaInfo.aparse(source, timeout=0))
+
+    def test_aparse_many(self) -> None:
+        filenames = [os.path.join(data_dir, test_file) for test_file in test_media_files]
+        filenames.append(os.path.join(data_dir, "this file does not exist"))
+
+        async def parse_all() -> list[tuple[Any, Any]]:
+            return [result async for result in MediaInfo.aparse_many(filenames, concurrency=2)]
+
+        results = asyncio.run(parse_all())
+        self.assertEqual([filename for filename, _ in results], filenames)
+        self.assertEqual(results[0][1], MediaInfo.parse(filenames[0]))
+        self.assertIsInstance(results[-1][1], FileNotFoundError)
+
+    def test_aparse_many_iterator_options(self) -> None:
+        filenames = [os.path.join(data_dir, test_file) for test_file in test_media_files]
+
+        async def parse_all() -> list[tuple[Any, Any]]:
+            # The iterator is only consumed once, by the first call
+            fields = (name for name in ["format", "duration"])
+            return [
+                result
+                async for result in MediaInfo.aparse_many(filenames, concurrency=2, fields=fields)
+            ]
+
+        for filename, result in asyncio.run(parse_all()):
+            self.assertEqual(result, MediaInfo.parse(filename, fields=["format", "duration"]))
+
+
+@pytest.mark.parametrize("test_file", test_media_files)
+def test_filelike_returns_the_same(test_file: str) -> None:
+    filename = os.path.join(data_dir, test_file)
+    mi_from_filename = MediaInfo.parse(filename)
+    with open(filename, "rb") as f:
+        mi_from_file = MediaInfo.parse(f)
+    assert len(mi_from_file.tracks) == len(mi_from_filename.tracks)
+    for track_from_file, track_from_filename in zip(mi_from_file.tracks, mi_from_filename.tracks):
+        # The General track will differ, typically not giving the file name
+        if track_from_file.track_type != "General":
+            # Test dicts first because they will produce a diff
+            assert track_from_file.to_data() == track_from_filename.to_data()
+            assert track_from_file == track_from_filename
+
+
+class NonReadintoFile:
+    # A file-like object without readinto
+    def __init__(self, data: bytes) -> None:
+        self._file = io.BytesIO(data)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+
+@pytest.mark.parametrize("test_file", test_media_files)
+@pytest.mark.parametrize(
+    "buffer_type",
+    ["bytes", "bytearray", "memoryview", "readonly_slice", "mmap", "readonly_mmap", "no_readinto"],
+)
+def test_buffer_returns_the_same(test_file: str, buffer_type: str) -> None:
+    with open(os.path.join(data_dir, test_file), "rb") as f:
+        data = f.read()
+        expected = MediaInfo.parse(f)
+        source: Any
+        if buffer_type == "bytes":
+            source = data
+        elif buffer_type == "bytearray":
+            source = bytearray(data)
+        elif buffer_type == "memoryview":
+            source = memoryview(bytearray(data))
+        elif buffer_type == "readonly_slice":
+            # Read-only buffers whose address is unknown are copied
+            source = memoryview(b"\0" + data)[1:]
+        elif buffer_type == "no_readinto":
+            source = NonReadintoFile(data)
+        else:
+            access = mmap.ACCESS_COPY if buffer_type == "mmap" else mmap.ACCESS_READ
+            source = mmap.mmap(f.fileno(), 0, access=access)
+        media_info = MediaInfo.parse(source, buffer_size=4096)
+        if isinstance(source, mmap.mmap):
+            # The mapping must not be exported anymore
+            source.close()
+    assert media_info == expected
+
+
+class AdaptiveBufferSizeTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.strategy = AdaptiveBufferSize(4096, minimum=1024, maximum=16384, target_read_time=1)
+
+    def test_next_size(self) -> None:
+        self.assertEqual(self.strategy.next_size(4096, 0.1, False), 8192)
+        self.assertEqual(self.strategy.next_size(16384, 0.1, False), 16384)
+        self.assertEqual(self.strategy.next_size(4096, 2, False), 2048)
+        self.assertEqual(self.strategy.next_size(1024, 2, False), 1024)
+        self.assertEqual(self.strategy.next_size(16384, 0.1, True), 4096)
+        self.assertEqual(self.strategy.next_size(2048, 0.1, True), 2048)
+
+    def test_invalid_sizes(self) -> None:
+        self.assertRaises(ValueError, AdaptiveBufferSize, 1024, minimum=2048)
+        self.assertRaises(ValueError, AdaptiveBufferSize, 0, minimum=0)
+
+    def test_eq(self) -> None:
+        self.assertEqual(
+            self.strategy,
+            AdaptiveBufferSize(4096, minimum=1024, maximum=16384, target_read_time=1),
+        )
+        self.assertNotEqual(self.strategy, AdaptiveBufferSize())
+
+    def test_parse(self) -> None:
+        with open(os.path.join(data_dir, "sample.mp4"), "rb") as f:
+            data = f.read()
+        expected = MediaInfo.parse(io.BytesIO(data))
+        with MediaInfoParser(buffer_size=4096) as parser:
+            self.assertEqual(parser.parse(io.BytesIO(data)), expected)
+            fixed_stats = parser.stats
+        with MediaInfoParser(buffer_size=self.strategy) as parser:
+            self.assertEqual(parser.parse(io.BytesIO(data)), expected)
+            self.assertEqual(parser.parse(data), expected)
+            adaptive_stats = parser.stats
+        self.assertEqual(fixed_stats["files"], 1)
+        self.assertGreater(fixed_stats["seeks"], 0)
+        self.assertEqual(adaptive_stats["files"], 2)
+        self.assertEqual(adaptive_stats["seeks"], 2 * fixed_stats["seeks"])
+        self.assertLess(adaptive_stats["iterations"], 2 * fixed_stats["iterations"])
+
+    def test_path_stats(self) -> None:
+        with MediaInfoParser() as parser:
+            parser.parse(os.path.join(data_dir, "sample.mp4"))
+            stats = dict.fromkeys(
+                ("bytes_read", "seeks", "iterations", "partial", "escalations"), 0
+            )
+            self.assertEqual(parser.stats, {"files": 1, **stats})
+
+
+class MediaInfoMemoryMapTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.path = os.path.join(data_dir, "sample.mp4")
+        with open(self.path, "rb") as f:
+            self.expected = MediaInfo.parse(f)
+
+    def test_file(self) -> None:
+        with open(self.path, "rb") as f:
+            self.assertEqual(MediaInfo.parse(f, memory_map=True), self.expected)
+
+    def test_path(self) -> None:
+        # Unlike file objects, paths have a name and a modification date
+        self.assertEqual(
+            MediaInfo.parse(pathlib.Path(self.path), memory_map=True), MediaInfo.parse(self.path)
+        )
+
+    def test_fallback(self) -> None:
+        with open(self.path, "rb") as f:
+            media_info = MediaInfo.parse(io.BytesIO(f.read()), memory_map=True)
+        self.assertEqual(media_info, self.expected)
+        with tempfile.NamedTemporaryFile() as empty_file:
+            media_info = MediaInfo.parse(empty_file.name, memory_map=True)
+        self.assertEqual(media_info.general_tracks[0].file_size, 0)
+
+    def test_wrapped_file(self) -> None:
+        class DecompressingReader(io.RawIOBase):
+            # Exposes the descriptor of the compressed file
+            mode = "rb"
+
+            def __init__(self, file: Any) -> None:
+                super().__init__()
+                self.file = file
+                self.gzip_file = gzip.GzipFile(fileobj=file)
+
+            def readable(self) -> bool:
+                return True
+
+            def readinto(self, buffer: Any) -> int:
+                return self.gzip_file.readinto(buffer)
+
+            def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+                return self.gzip_file.seek(offset, whence)
+
+            def tell(self) -> int:
+                return self.gzip_file.tell()
+
+            def fileno(self) -> int:
+                return int(self.file.fileno())
+
+        with tempfile.TemporaryFile() as compressed_file:
+            with open(self.path, "rb") as f:
+                compressed_file.write(gzip.compress(f.read()))
+            compressed_file.seek(0)
+            media_info = MediaInfo.parse(DecompressingReader(compressed_file), memory_map=True)
+        self.assertEqual(media_info, self.expected)
+
+    def test_errors(self) -> None:
+        with open(os.path.join(data_dir, "sample.xml"), encoding="utf-8") as f:
+            self.assertRaises(ValueError, MediaInfo.parse, f, memory_map=True)
+        self.assertRaises(
+            FileNotFoundError, MediaInfo.parse, os.path.join(data_dir, "none"), memory_map=True
+        )
+
+
+def test_empty_buffer() -> None:
+    media_info = MediaInfo.parse(b"")
+    assert [track.track_type for track in media_info.tracks] == ["General"]
+
+
+class ProfileTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.path = os.path.join(data_dir, "sample.mp4")
+
+    def test_path(self) -> None:
+        with pymediainfo.profile() as profiles:
+            media_info = MediaInfo.parse(self.path)
+        self.assertEqual(len(profiles), 1)
+        profile = profiles[0]
+        self.assertEqual(profile.filename, self.path)
+        self.assertEqual(
+            list(profile.phases),
+            ["library", "options", "wait", "open", "inform", "close", "decode"],
+        )
+        self.assertTrue(all(duration >= 0 for duration in profile.phases.values()))
+        self.assertAlmostEqual(profile.total, sum(profile.phases.values()))
+        self.assertEqual((profile.bytes_fed, profile.seeks), (0, 0))
+        with MediaInfoParser() as parser:
+            self.assertEqual(profile.output_size, len(parser.inform(self.path)))
+        self.assertEqual(len(media_info.tracks), 3)
+
+    def test_file(self) -> None:
+        profiles: list[pymediainfo.ParseProfile] = []
+        with MediaInfoParser(buffer_size=16 * 1024) as parser:
+            with pymediainfo.profile(profiles.append), open(self.path, "rb") as f:
+                parser.parse(f)
+                parser.inform(f)
+        self.assertEqual(len(profiles), 2)
+        # The creation of the parser happened before profiling started
+        self.assertNotIn("library", profiles[0].phases)
+        self.assertIn("read", profiles[0].phases)
+        self.assertNotIn("decode", profiles[1].phases)
+        stats = parser.stats
+        self.assertEqual(sum(profile.bytes_fed for profile in profiles), stats["bytes_read"])
+        self.assertEqual(sum(profile.seeks for profile in profiles), stats["seeks"])
+        self.assertGreater(profiles[0].seeks, 0)
+
+    def test_disabled(self) -> None:
+        with pymediainfo.profile() as profiles:
+            pass
+        MediaInfo.parse(self.path)
+        self.assertEqual(profiles, [])
+
+    def test_nested(self) -> None:
+        with pymediainfo.profile() as outer:
+            MediaInfo.parse(self.path)
+            with pymediainfo.profile() as inner:
+                MediaInfo.parse(self.path, fields=["duration"])
+        self.assertEqual(len(outer), 2)
+        self.assertEqual(inner, outer[1:])
+        self.assertGreater(inner[0].output_size, 0)
+
+    def test_parse_many(self) -> None:
+        filenames = [self.path, os.path.join(data_dir, "sample.mkv")]
+        with pymediainfo.profile() as profiles:
+            list(MediaInfo.parse_many(filenames, workers=2))
+            asyncio.run(MediaInfo.aparse(self.path))
+        self.assertCountEqual([profile.filename for profile in profiles], [*filenames, self.path])
@@ -3,6 +3,7 @@
 
 import functools
 import http.server
+import io
 import json
 import os
 import pathlib
@@ -12,27 +13,14 @@ import tempfile
 import threading
 import unittest
 import xml
+from typing import Any
 
 import pytest
+from utils import data_dir, get_library_version, skip_if_not_thread_safe, test_media_files
 
-from pymediainfo import MediaInfo
-
-data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
-test_media_files = [
-    "sample.mkv",
-    "sample.mp4",
-    "sample_with_cover.mp3",
-    "mpeg4.mp4",
-    "mp3.mp3",
-    "mp4-with-audio.mp4",
-]
-
-
-def _get_library_version() -> tuple[str, tuple[int, ...]]:
-    lib, handle, lib_version_str, lib_version = MediaInfo._get_library()
-    lib.MediaInfo_Close(handle)
-    lib.MediaInfo_Delete(handle)
-    return lib_version_str, lib_version
+import pymediainfo
+from pymediainfo import MediaInfo, MediaInfoParser, MediaInfoParserPool
+from pymediainfo.cache import MemoryCache
 
 
 class MediaInfoTest(unittest.TestCase):
@@ -83,6 +71,77 @@ class MediaInfoTest(unittest.TestCase):
         self.assertTrue(self.media_info.tracks[0].does_not_exist is None)
 
 
+class MediaInfoXMLStreamTest(unittest.TestCase):
+    def test_from_xml_stream(self) -> None:
+        for xml_file in ("sample.xml", "issue100.xml", "other_track.xml"):
+            path = os.path.join(data_dir, xml_file)
+            with open(path, encoding="utf-8") as f:
+                expected = MediaInfo(f.read())
+            with open(path, "rb") as f:
+                self.assertEqual(MediaInfo.from_xml_stream(f), expected)
+            self.assertEqual(MediaInfo.from_xml_stream(path), expected)
+
+    def test_old_structure(self) -> None:
+        xml_data = '<File><track type="General"><Format>MPEG-4</Format></track></File>'
+        media_info = MediaInfo.from_xml_stream(io.BytesIO(xml_data.encode()))
+        self.assertEqual(media_info, MediaInfo(xml_data))
+        self.assertEqual(media_info.tracks[0].format, "MPEG-4")
+
+    def test_invalid_xml(self) -> None:
+        self.assertRaises(
+            xml.etree.ElementTree.ParseError,
+            MediaInfo.from_xml_stream,
+            os.path.join(data_dir, "invalid.xml"),
+        )
+
+
+class MediaInfoLazyTest(unittest.TestCase):
+    def setUp(self) -> None:
+        with open(os.path.join(data_dir, "sample.xml"), encoding="utf-8") as f:
+            self.xml_data = f.read()
+        self.media_info = MediaInfo(self.xml_data)
+        self.lazy_media_info = MediaInfo(self.xml_data, lazy=True)
+
+    def test_attributes(self) -> None:
+        for track, lazy_track in zip(self.media_info.tracks, self.lazy_media_info.tracks):
+            for name, value in track.to_data().items():
+                self.assertEqual(getattr(lazy_track, name), value)
+            self.assertIsNone(lazy_track.non_existing)
+
+    def test_decoding_on_access(self) -> None:
+        track = self.lazy_media_info.video_tracks[0]
+        self.assertNotIn("duration", track.__dict__)
+        self.assertEqual(track.other_duration, self.media_info.video_tracks[0].other_duration)
+        self.assertEqual(track.__dict__["duration"], 61394)
+
+    def test_to_data(self) -> None:
+        track = self.lazy_media_info.general_tracks[0]
+        setattr(track, "format", "custom")
+        data = track.to_data()
+        self.assertEqual(data["format"], "custom")
+        self.assertNotIn("_raw_fields", data)
+        self.assertEqual(list(data), list(self.media_info.general_tracks[0].to_data()))
+
+    def test_eq_and_pickle(self) -> None:
+        self.assertEqual(self.lazy_media_info, self.media_info)
+        lazy_media_info = MediaInfo(self.xml_data, lazy=True)
+        self.assertEqual(pickle.loads(pickle.dumps(lazy_media_info)), self.media_info)
+
+    def test_from_xml_stream(self) -> None:
+        media_info = MediaInfo.from_xml_stream(os.path.join(data_dir, "issue100.xml"), lazy=True)
+        self.assertEqual(media_info.general_tracks[0].other_format_list, "RTP / RTP")
+
+    def test_parse(self) -> None:
+        for backend in ("xml", "json"):
+            media_info = MediaInfo.parse(
+                os.path.join(data_dir, "sample.mp4"), backend=backend, lazy=True
+            )
+            self.assertEqual(media_info.video_tracks[0].width, 1920)
+            self.assertEqual(
+                media_info, MediaInfo.parse(os.path.join(data_dir, "sample.mp4"), backend=backend)
+            )
+
+
 class MediaInfoInvalidXMLTest(unittest.TestCase):
     def setUp(self) -> None:
         with open(os.path.join(data_dir, "invalid.xml"), "r", encoding="utf-8") as f:
@@ -126,6 +185,12 @@ class MediaInfoLibraryTest(unittest.TestCase):
                 )
             assert rf"Failed to load library from {nonexistent_library}" in str(exc.value)
 
+    def test_library_is_cached(self) -> None:
+        library = pymediainfo._library._get_cached_library()
+        self.assertIs(pymediainfo._library._get_cached_library(), library)
+        MediaInfo.clear_library_cache()
+        self.assertIsNot(pymediainfo._library._get_cached_library(), library)
+
 
 class MediaInfoFileLikeTest(unittest.TestCase):
     def test_can_parse(self) -> None:
@@ -186,6 +251,10 @@ class MediaInfoURLTest(unittest.TestCase):
         media_info = MediaInfo.parse(self.url)
         self.assertEqual(len(media_info.tracks), 3)
 
+    def test_parse_url_memory_map(self) -> None:
+        # URLs are not mapped, they are still opened by the library
+        self.assertEqual(MediaInfo.parse(self.url, memory_map=True), MediaInfo.parse(self.url))
+
 
 class MediaInfoPathlibTest(unittest.TestCase):
     def test_parse_pathlib_path(self) -> None:
@@ -201,12 +270,12 @@ class MediaInfoPathlibTest(unittest.TestCase):
 class MediaInfoFilenameTypesTest(unittest.TestCase):
     def test_normalize_filename_str(self) -> None:
         path = os.path.join(data_dir, "test.txt")
-        filename = MediaInfo._normalize_filename(path)
+        filename = pymediainfo._files._normalize_filename(path)
         self.assertEqual(filename, path)
 
     def test_normalize_filename_pathlib(self) -> None:
         path = pathlib.Path(data_dir, "test.txt")
-        filename = MediaInfo._normalize_filename(path)
+        filename = pymediainfo._files._normalize_filename(path)
         self.assertEqual(filename, os.path.join(data_dir, "test.txt"))
 
     def test_normalize_filename_pathlike(self) -> None:
@@ -216,11 +285,11 @@ class MediaInfoFilenameTypesTest(unittest.TestCase):
                 return os.path.join(data_dir, "test.txt")
 
         path = PathLikeObject()
-        filename = MediaInfo._normalize_filename(path)
+        filename = pymediainfo._files._normalize_filename(path)
         self.assertEqual(filename, os.path.join(data_dir, "test.txt"))
 
     def test_normalize_filename_url(self) -> None:
-        filename = MediaInfo._normalize_filename("https://localhost")
+        filename = pymediainfo._files._normalize_filename("https://localhost")
         self.assertEqual(filename, "https://localhost")
 
 
@@ -245,7 +314,7 @@ class MediaInfoCoverDataTest(unittest.TestCase):
         )
 
     def test_parse_no_cover_data(self) -> None:
-        lib_version_str, lib_version = _get_library_version()
+        lib_version_str, lib_version = get_library_version()
         if lib_version < (18, 3):
             pytest.skip(
                 "The Cover_Data option is not supported by this library version "
@@ -295,6 +364,12 @@ class MediaInfoEqTest(unittest.TestCase):
         pickled_mi = pickle.dumps(self.mp4_mi)
         self.assertEqual(self.mp4_mi, pickle.loads(pickled_mi))
 
+    def test_unpickled_attribute_names_are_shared(self) -> None:
+        pickled_track = pickle.dumps(self.mp4_mi.tracks[0])
+        first, second = (list(pickle.loads(pickled_track).to_data()) for _ in range(2))
+        for first_name, second_name in zip(first, second):
+            self.assertIs(first_name, second_name)
+
 
 class MediaInfoLegacyStreamDisplayTest(unittest.TestCase):
     def setUp(self) -> None:
@@ -310,7 +385,7 @@ class MediaInfoLegacyStreamDisplayTest(unittest.TestCase):
 
 class MediaInfoOptionsTest(unittest.TestCase):
     def setUp(self) -> None:
-        lib_version_str, lib_version = _get_library_version()
+        lib_version_str, lib_version = get_library_version()
         if lib_version < (19, 9):
             pytest.skip(
                 "The Reset option is not supported by this library version "
@@ -331,17 +406,28 @@ class MediaInfoOptionsTest(unittest.TestCase):
         self.assertEqual(self.normal_mi.tracks[1].other_language[0], "English")
         self.assertEqual(self.raw_language_mi.tracks[1].language, "en")
 
+    def test_parsers_with_different_options(self) -> None:
+        filename = os.path.join(data_dir, "sample.mkv")
+        with MediaInfoParser(mediainfo_options={"Language": "raw"}) as raw_parser:
+            with MediaInfoParser() as parser:
+                for _ in range(2):
+                    self.assertEqual(parser.parse(filename), self.normal_mi)
+                    self.assertEqual(MediaInfo.parse(filename), self.normal_mi)
+                    self.assertEqual(raw_parser.parse(filename), self.raw_language_mi)
+
+    def test_pool(self) -> None:
+        filename = os.path.join(data_dir, "sample.mkv")
+        with MediaInfoParserPool() as pool:
+            raw_language_mi = pool.parse(filename, mediainfo_options={"Language": "raw"})
+            self.assertEqual(raw_language_mi, self.raw_language_mi)
+            self.assertEqual(pool.parse(filename), self.normal_mi)
+
 
 # Unittests can't be parametrized
 # https://github.com/pytest-dev/pytest/issues/541
 @pytest.mark.parametrize("test_file", test_media_files)
 def test_thread_safety(test_file: str) -> None:
-    lib_version_str, lib_version = _get_library_version()
-    if lib_version < (20, 3):
-        pytest.skip(
-            "This version of the library is not thread-safe "
-            "(v{} detected, v20.03 required)".format(lib_version_str)
-        )
+    skip_if_not_thread_safe()
     expected_result = MediaInfo.parse(os.path.join(data_dir, test_file))
     results = []
     lock = threading.Lock()
@@ -371,19 +457,112 @@ def test_thread_safety(test_file: str) -> None:
         assert res == expected_result
 
 
-@pytest.mark.parametrize("test_file", test_media_files)
-def test_filelike_returns_the_same(test_file: str) -> None:
-    filename = os.path.join(data_dir, test_file)
-    mi_from_filename = MediaInfo.parse(filename)
-    with open(filename, "rb") as f:
-        mi_from_file = MediaInfo.parse(f)
-    assert len(mi_from_file.tracks) == len(mi_from_filename.tracks)
-    for track_from_file, track_from_filename in zip(mi_from_file.tracks, mi_from_filename.tracks):
-        # The General track will differ, typically not giving the file name
-        if track_from_file.track_type != "General":
-            # Test dicts first because they will produce a diff
-            assert track_from_file.to_data() == track_from_filename.to_data()
-            assert track_from_file == track_from_filename
+class MediaInfoTypedTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.path = os.path.join(data_dir, "sample.mp4")
+        self.media_info = MediaInfo.parse(self.path, typed=True)
+
+    def test_values(self) -> None:
+        general, video, audio = self.media_info.tracks
+        self.assertEqual(general.overall_bit_rate, 3302588)
+        self.assertEqual(video.frame_rate, 23.976)
+        self.assertIs(video.format_settings__cabac, True)
+        self.assertEqual(video.format_settings__reference_frames, 4)
+        self.assertEqual(video.track_id, 1)
+        self.assertEqual(audio.channel_s, 2)
+        # Values that aren't numbers are left unchanged
+        self.assertEqual(video.format, "AVC")
+        self.assertEqual(video.codec_id, "avc1")
+        untyped = MediaInfo.parse(self.path)
+        self.assertEqual(untyped.video_tracks[0].frame_rate, "23.976")
+
+    def test_lazy(self) -> None:
+        lazy_media_info = MediaInfo.parse(self.path, typed=True, lazy=True)
+        self.assertEqual(lazy_media_info.video_tracks[0].frame_rate, 23.976)
+        self.assertEqual(lazy_media_info, self.media_info)
+        self.assertNotIn("_schema", lazy_media_info.video_tracks[0].to_data())
+
+    def test_json_backend(self) -> None:
+        lib_version_str, lib_version = get_library_version()
+        if lib_version < (18, 3):
+            pytest.skip(
+                "This version of the library does not support JSON output "
+                "(v{} detected, v18.03 required)".format(lib_version_str)
+            )
+        media_info = MediaInfo.parse(self.path, typed=True, backend="json")
+        for track, expected_track in zip(media_info.tracks, self.media_info.tracks):
+            for name in ("duration", "bit_rate", "frame_rate", "channel_s", "stream_size"):
+                self.assertEqual(getattr(track, name), getattr(expected_track, name))
+
+    def test_converters(self) -> None:
+        self.assertEqual(pymediainfo._track._to_int("-12"), -12)
+        self.assertEqual(pymediainfo._track._to_int("12 / 24"), "12 / 24")
+        self.assertEqual(pymediainfo._track._to_float("44100"), 44100.0)
+        self.assertEqual(pymediainfo._track._to_float("1.5e3"), "1.5e3")
+        self.assertEqual(pymediainfo._track._to_duration("958"), 958)
+        self.assertEqual(pymediainfo._track._to_duration("958.5"), 958.5)
+        self.assertIs(pymediainfo._track._to_bool("No"), False)
+        self.assertEqual(pymediainfo._track._to_bool("Unknown"), "Unknown")
+
+
+class MediaInfoFieldsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.path = os.path.join(data_dir, "sample.mp4")
+        self.fields = ["track_id", "duration", "format", "other_width", "title"]
+
+    def _filter(self, media_info: MediaInfo, fields: dict[str, list[str]]) -> list[dict[str, Any]]:
+        return [
+            {
+                name: value
+                for name, value in track.to_data().items()
+                if name == "track_type"
+                or name in fields.get(track.track_type, [])
+                or f"other_{name}" in fields.get(track.track_type, [])
+                or name.startswith("other_")
+                and name[6:] in fields.get(track.track_type, [])
+            }
+            for track in media_info.tracks
+        ]
+
+    def test_fields(self) -> None:
+        for test_file in ("sample.mp4", "sample.mkv", "sample_with_cover.mp3"):
+            path = os.path.join(data_dir, test_file)
+            media_info = MediaInfo.parse(path, fields=self.fields)
+            expected = self._filter(
+                MediaInfo.parse(path), dict.fromkeys(pymediainfo._track._STREAM_KINDS, self.fields)
+            )
+            self.assertEqual([track.to_data() for track in media_info.tracks], expected)
+        self.assertIsNotNone(media_info.audio_tracks[0].duration)
+        self.assertIsNone(media_info.audio_tracks[0].sampling_rate)
+
+    def test_track_types(self) -> None:
+        fields = {"General": ["file_size"], "Video": ["width", "height"]}
+        media_info = MediaInfo.parse(self.path, fields=fields)
+        self.assertEqual(
+            [track.to_data() for track in media_info.tracks],
+            self._filter(MediaInfo.parse(self.path), fields),
+        )
+        self.assertEqual(media_info.audio_tracks[0].to_data(), {"track_type": "Audio"})
+
+    def test_not_full(self) -> None:
+        media_info = MediaInfo.parse(self.path, fields=self.fields, full=False, lazy=True)
+        expected = self._filter(
+            MediaInfo.parse(self.path, full=False),
+            dict.fromkeys(pymediainfo._track._STREAM_KINDS, self.fields),
+        )
+        self.assertEqual([track.to_data() for track in media_info.tracks], expected)
+
+    def test_options(self) -> None:
+        media_info = MediaInfo.parse(self.path, fields={"Video": ["frame_rate"]}, typed=True)
+        self.assertEqual(media_info.video_tracks[0].frame_rate, 23.976)
+        media_info = MediaInfo.parse(self.path, fields=["width"], lazy=True)
+        self.assertEqual(media_info.video_tracks[0].width, 1920)
+        self.assertRaises(ValueError, MediaInfo.parse, self.path, fields=["width"], output="")
+        pool = MediaInfoParserPool()
+        self.assertEqual(pool.parse(self.path, fields=["width"]), media_info)
+        pool.close()
+        cache = MemoryCache()
+        self.assertEqual(cache.parse(self.path, fields={"width"}), media_info)
 
 
 class MediaInfoOutputTest(unittest.TestCase):
@@ -392,7 +571,7 @@ class MediaInfoOutputTest(unittest.TestCase):
         self.assertRegex(media_info, r"Stream size\s+: 373836\b")
 
     def test_json_output(self) -> None:
-        lib_version_str, lib_version = _get_library_version()
+        lib_version_str, lib_version = get_library_version()
         if lib_version < (18, 3):
             pytest.skip(
                 "This version of the library does not support JSON output "
@@ -409,6 +588,48 @@ class MediaInfoOutputTest(unittest.TestCase):
         self.assertEqual(media_info, "404567")
 
 
+class MediaInfoJSONBackendTest(unittest.TestCase):
+    def setUp(self) -> None:
+        lib_version_str, lib_version = get_library_version()
+        if lib_version < (18, 3):
+            pytest.skip(
+                "This version of the library does not support JSON output "
+                "(v{} detected, v18.03 required)".format(lib_version_str)
+            )
+
+    def test_same_tracks(self) -> None:
+        for test_file in sorted(os.listdir(data_dir)):
+            if test_file.endswith((".txt", ".xml")):
+                continue
+            with self.subTest(test_file=test_file):
+                filename = os.path.join(data_dir, test_file)
+                xml_mi = MediaInfo.parse(filename, cover_data=True)
+                json_mi = MediaInfo.parse(filename, cover_data=True, backend="json")
+                self.assertEqual(
+                    [track.to_data() for track in json_mi.tracks],
+                    [track.to_data() for track in xml_mi.tracks],
+                )
+
+    def test_other_attributes(self) -> None:
+        media_info = MediaInfo.parse(os.path.join(data_dir, "sample.mp4"), backend="json")
+        self.assertEqual(media_info.tracks[0].file_size, 404567)
+        self.assertEqual(media_info.tracks[0].other_file_size[0], "395 KiB")
+        self.assertEqual(media_info.tracks[1].duration, 958)
+        self.assertEqual(media_info.tracks[1].codec_configuration_box, "avcC")
+
+    def test_fallback_to_xml(self) -> None:
+        filename = os.path.join(data_dir, "sample.mp4")
+        self.assertEqual(
+            MediaInfo.parse(filename, full=False, backend="json"),
+            MediaInfo.parse(filename, full=False),
+        )
+
+    def test_invalid_backend(self) -> None:
+        self.assertRaises(
+            ValueError, MediaInfo.parse, os.path.join(data_dir, "sample.mp4"), backend="yaml"
+        )
+
+
 class MediaInfoTrackShortcutsTests(unittest.TestCase):
     def setUp(self) -> None:
         self.mi_audio = MediaInfo.parse(os.path.join(data_dir, "sample.mp4"))
@@ -447,3 +668,35 @@ class MediaInfoTrackShortcutsTests(unittest.TestCase):
     def test_menu_tracks(self) -> None:
         self.assertEqual(len(self.mi_text.menu_tracks), 1)
         self.assertEqual(self.mi_text.menu_tracks[0].kind_of_stream, "Menu")
+
+    def test_new_lists(self) -> None:
+        self.assertIsNot(self.mi_audio.video_tracks, self.mi_audio.video_tracks)
+        self.mi_audio.audio_tracks.clear()
+        self.assertEqual(len(self.mi_audio.audio_tracks), 1)
+        self.assertIsNotNone(self.mi_audio.get_track("Audio"))
+
+    def test_modified_tracks(self) -> None:
+        self.assertEqual(len(self.mi_audio.audio_tracks), 1)
+        self.mi_audio.tracks.append(self.mi_audio.tracks[2])
+        self.assertEqual(len(self.mi_audio.audio_tracks), 2)
+        self.mi_audio.tracks = self.mi_audio.tracks[:2]
+        self.assertEqual(self.mi_audio.audio_tracks, [])
+
+    def test_get_track(self) -> None:
+        self.assertIs(self.mi_audio.get_track("Audio"), self.mi_audio.tracks[2])
+        self.assertIs(self.mi_other.get_track("Other", -1), self.mi_other.other_tracks[1])
+        self.assertIsNone(self.mi_audio.get_track("Audio", 1))
+        self.assertIsNone(self.mi_audio.get_track("Unknown"))
+
+    def test_get_track_by_id(self) -> None:
+        self.assertIs(self.mi_audio.get_track_by_id(2), self.mi_audio.tracks[2])
+        self.assertIs(self.mi_audio.get_track_by_id("1"), self.mi_audio.tracks[1])
+        self.assertIsNone(self.mi_audio.get_track_by_id(3))
+
+    def test_get_track_by_stream_order(self) -> None:
+        self.assertIs(self.mi_audio.get_track_by_stream_order(1), self.mi_audio.tracks[2])
+        self.assertIsNone(self.mi_audio.get_track_by_stream_order("2"))
+
+    def test_pickle(self) -> None:
+        self.assertIsNotNone(self.mi_audio.get_track("Video"))
+        self.assertNotIn("_indexes", pickle.loads(pickle.dumps(self.mi_audio)).__dict__)
@@ -0,0 +1,160 @@
+# pylint: disable=missing-module-docstring, missing-class-docstring, missing-function-docstring,
+# pylint: disable=protected-access
+
+import functools
+import http.client
+import http.server
+import io
+import os
+import re
+import tempfile
+import threading
+import unittest
+import urllib.request
+from typing import Any, Callable
+from unittest import mock
+
+from utils import data_dir
+
+from pymediainfo import MediaInfo
+from pymediainfo.remote import HTTPRangeReader
+
+
+class RangeRequestHandler(http.server.SimpleHTTPRequestHandler):
+    # Serves files from data_dir, supporting single byte ranges
+    def do_GET(self) -> None:
+        with open(self.translate_path(self.path), "rb") as f:
+            data = f.read()
+        match = re.fullmatch(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        if match is None:
+            self.send_error(400)
+            return
+        start, end = int(match.group(1)), min(int(match.group(2)), len(data) - 1)
+        if start >= len(data):
+            self.send_error(416)
+            return
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(data[start:][: end - start + 1])
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+class StubResponse:
+    # Returns the result of read, which may raise an exception, with a partial response status
+    def __init__(self, read: Callable[[], bytes], content_range: str) -> None:
+        self.status = 206
+        self.headers = {"Content-Range": content_range}
+        self.read = read
+
+    def __enter__(self) -> "StubResponse":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        pass
+
+
+class HTTPRangeReaderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.url = self._serve(data_dir)
+        with open(os.path.join(data_dir, "sample.mp4"), "rb") as f:
+            self.data = f.read()
+
+    def _serve(self, directory: str) -> str:
+        handler_class = functools.partial(RangeRequestHandler, directory=directory)
+        httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+        threading.Thread(target=httpd.serve_forever).start()
+        self.addCleanup(httpd.server_close)
+        self.addCleanup(httpd.shutdown)
+        return f"http://127.0.0.1:{httpd.socket.getsockname()[1]}/"
+
+    def test_read(self) -> None:
+        with HTTPRangeReader(
+            self.url + "sample.mp4", block_size=1000, cache_blocks=5, prefetch_blocks=1
+        ) as reader:
+            self.assertEqual(reader.size, len(self.data))
+            self.assertEqual(reader.stats["requests"], 1)
+            self.assertEqual(reader.read(1500), self.data[:1500])
+            # Served from the cache
+            self.assertEqual(reader.stats["requests"], 1)
+            reader.seek(-10, os.SEEK_END)
+            self.assertEqual(reader.read(), self.data[-10:])
+            reader.seek(2500)
+            # Three missing blocks are downloaded in one request
+            self.assertEqual(reader.read(3000), self.data[2500:5500])
+            self.assertEqual(reader.stats["requests"], 3)
+            reader.seek(0)
+            self.assertEqual(reader.read(10), self.data[:10])
+            self.assertEqual(reader.stats["requests"], 4)
+            reader.seek(100_000)
+            # Larger than the cache
+            self.assertEqual(reader.read(10_000), self.data[100_000:110_000])
+            self.assertEqual(reader.read(0), b"")
+
+    def test_parse(self) -> None:
+        with HTTPRangeReader(self.url + "sample.mp4", block_size=16 * 1024) as reader:
+            media_info = MediaInfo.parse(reader)
+            self.assertEqual(media_info, MediaInfo.parse(io.BytesIO(self.data)))
+            requests = reader.stats["requests"]
+            MediaInfo.parse(reader)
+            # The beginning and the end of the file are cached
+            self.assertEqual(reader.stats["requests"], requests)
+
+    def test_empty_file(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "empty"), "wb"):
+                pass
+            with HTTPRangeReader(self._serve(directory) + "empty") as reader:
+                self.assertEqual(reader.size, 0)
+                self.assertEqual(reader.read(), b"")
+
+    def test_errors(self) -> None:
+        self.assertRaises(OSError, HTTPRangeReader, self.url + "non_existent")
+        self.assertRaises(ValueError, HTTPRangeReader, self.url, cache_blocks=1, prefetch_blocks=1)
+        reader = HTTPRangeReader(self.url + "sample.mp4")
+        reader.close()
+        self.assertRaises(ValueError, reader.read)
+
+    def _stub_urlopen(self, read: Callable[[bytes], bytes]) -> Any:
+        # Returns a replacement for urlopen, responses to requests that do not start
+        # at the beginning of the file are returned by read
+        def urlopen(
+            # pylint: disable=unused-argument
+            request: urllib.request.Request,
+            timeout: Any = None,
+        ) -> StubResponse:
+            match = re.fullmatch(r"bytes=(\d+)-(\d+)", request.get_header("Range", ""))
+            assert match is not None
+            start, end = int(match.group(1)), int(match.group(2))
+            data = self.data[start:][: end - start + 1]
+            return StubResponse(
+                (lambda: data) if start == 0 else (lambda: read(data)),
+                f"bytes {start}-{end}/{len(self.data)}",
+            )
+
+        return mock.patch("urllib.request.urlopen", urlopen)
+
+    def test_truncated_response(self) -> None:
+        def read_truncated(data: bytes) -> bytes:
+            return data[:10]
+
+        def read_incomplete(data: bytes) -> bytes:
+            raise http.client.IncompleteRead(data[:10], len(data) - 10)
+
+        for read in (read_truncated, read_incomplete):
+            with (
+                self._stub_urlopen(read),
+                HTTPRangeReader(
+                    "http://example.com/sample.mp4",
+                    block_size=1000,
+                    cache_blocks=5,
+                    prefetch_blocks=1,
+                ) as reader,
+            ):
+                self.assertEqual(reader.read(10), self.data[:10])
+                reader.seek(5000)
+                with self.assertRaisesRegex(OSError, "Truncated response"):
+                    reader.read(10)
@@ -0,0 +1,39 @@
+"""
+Helpers shared by the tests.
+"""
+
+import os
+
+import pytest
+
+import pymediainfo
+
+data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+test_media_files = [
+    "sample.mkv",
+    "sample.mp4",
+    "sample_with_cover.mp3",
+    "mpeg4.mp4",
+    "mp3.mp3",
+    "mp4-with-audio.mp4",
+]
+
+
+def get_library_version() -> tuple[str, tuple[int, ...]]:
+    """
+    Return the version of the library used by the tests, as a string and as a tuple.
+    """
+    library = pymediainfo._library._get_cached_library()  # pylint: disable=protected-access
+    return library.version_str, library.version
+
+
+def skip_if_not_thread_safe() -> None:
+    """
+    Skip the current test if the library is not thread-safe.
+    """
+    lib_version_str, lib_version = get_library_version()
+    if lib_version < (20, 3):
+        pytest.skip(
+            "This version of the library is not thread-safe "
+            "(v{} detected, v20.03 required)".format(lib_version_str)
+        )